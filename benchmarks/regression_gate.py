@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""
+Compare the time each phase of building the tree takes and the peak memory allocated while building it for a
+fixed set of PDFs against the baseline JSON committed at BASELINE_PATH. Exits with REGRESSION_EXIT_CODE if anything
+got significantly slower or bigger. Needs no network access. Run from the repository root:
+
+    python -m benchmarks.regression_gate                     # Compare against benchmarks/baseline.json
+    python -m benchmarks.regression_gate --update-baseline   # Measure and overwrite the baseline
+
+Timings are compared after scaling the baseline by how long a fixed pure Python workload takes on this machine vs.
+the machine that recorded the baseline, so a baseline recorded on a laptop is still useful on a CI runner. A phase
+only counts as a regression if it's slower than the scaled baseline by more than both the relative tolerance and
+NOISE_MULTIPLIER times the run to run noise of either measurement (with MIN_TIME_DELTA seconds as a floor).
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from datetime import datetime
+from importlib.metadata import version
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from benchmarks.run_benchmarks import SCENARIOS, _output_suppressed
+from benchmarks.synthetic_pdf import SyntheticPdfSpec, write_synthetic_pdf
+
+PROJECT_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+BASELINE_PATH = path.join(PROJECT_DIR, 'benchmarks', 'baseline.json')
+
+# The PDFs whose timings are gated: the test suite's fixtures plus a couple of synthetic PDFs
+FIXTURE_PDFS = [
+    path.join('doc', 'Type1_Acrobat_Font_Explanation.pdf'),
+    path.join('doc', 'analyzing-malicious-document-files.pdf'),
+]
+
+SYNTHETIC_PDFS = {
+    'synthetic_small.pdf': SCENARIOS['small'],
+    'synthetic_fonts.pdf': SyntheticPdfSpec(pages=30, fonts=8),
+}
+
+TOTAL = 'total'
+PEAK_MEMORY = 'peak_memory'
+DEFAULT_REPEAT = 5
+DEFAULT_TIME_TOLERANCE = 0.35     # Fraction slower than the (scaled) baseline that's tolerated
+DEFAULT_MEMORY_TOLERANCE = 0.10   # Fraction bigger than the baseline peak memory that's tolerated
+MIN_TIME_DELTA = 0.05             # Seconds. Phases faster than this are all noise.
+MIN_MEMORY_DELTA = 256 * 1024     # Bytes
+NOISE_MULTIPLIER = 3
+CALIBRATION_REPEAT = 5
+REGRESSION_EXIT_CODE = 1
+BASELINE_ERROR_EXIT_CODE = 2
+
+# Status of a comparison
+OK = 'ok'
+FASTER = 'faster'
+REGRESSION = 'REGRESSION'
+NEW = 'new'
+
+
+class Timing(NamedTuple):
+    fastest: float  # Fastest run is the one least disturbed by whatever else the machine was doing
+    noise: float    # Scaled median absolute deviation of the runs, ~ standard deviation without the outlier sensitivity
+
+    @classmethod
+    def from_runs(cls, runs: List[float]) -> 'Timing':
+        median = statistics.median(runs)
+        return cls(min(runs), 1.4826 * statistics.median(abs(run - median) for run in runs))
+
+
+class Comparison(NamedTuple):
+    pdf: str
+    metric: str           # Phase name, TOTAL, or PEAK_MEMORY
+    baseline: Optional[float]
+    current: float
+    allowed: Optional[float]
+    status: str
+
+    @property
+    def delta_pct(self) -> Optional[float]:
+        if not self.baseline:
+            return None
+
+        return 100.0 * (self.current - self.baseline) / self.baseline
+
+
+def calibrate() -> float:
+    """Seconds a fixed pure Python workload takes on this machine (fastest of CALIBRATION_REPEAT runs)."""
+    timings = []
+
+    for _ in range(CALIBRATION_REPEAT):
+        start_time = time.perf_counter()
+        table = {}
+
+        for i in range(200_000):
+            table[str(i % 5_000)] = table.get(str(i % 5_000), 0) + i
+
+        sorted(table.items(), key=lambda kv: kv[1])
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+def measure_pdf(pdf_path: str, repeat: int = DEFAULT_REPEAT) -> dict:
+    """Build the tree for pdf_path once with tracemalloc on for memory and repeat times with it off for timings."""
+    from pdfalyzer.pdfalyzer import PHASES, Pdfalyzer
+    phase_peaks: Dict[str, int] = {}
+
+    @contextmanager
+    def peak_memory_hook(phase: str) -> Iterator[None]:
+        tracemalloc.reset_peak()
+
+        try:
+            yield
+        finally:
+            phase_peaks[phase] = tracemalloc.get_traced_memory()[1]
+
+    tracemalloc.start()
+
+    try:
+        Pdfalyzer(pdf_path, phase_hook=peak_memory_hook)
+    finally:
+        tracemalloc.stop()
+
+    runs: Dict[str, List[float]] = {phase: [] for phase in [*PHASES, TOTAL]}
+
+    for _ in range(repeat):
+        pdfalyzer = Pdfalyzer(pdf_path)
+
+        for phase in PHASES:
+            runs[phase].append(pdfalyzer.phase_timings[phase])
+
+        runs[TOTAL].append(sum(pdfalyzer.phase_timings.values()))
+
+    return {
+        'phases': {phase: Timing.from_runs(phase_runs)._asdict() for phase, phase_runs in runs.items()},
+        PEAK_MEMORY: max(phase_peaks.values()),
+    }
+
+
+def measure_gate_pdfs(repeat: int = DEFAULT_REPEAT) -> dict:
+    """Measure all the gated PDFs. Returns results in the same format as the baseline JSON."""
+    started_at = datetime.now()
+    pdfs = {}
+
+    with TemporaryDirectory() as tmp_dir, _output_suppressed():
+        pdf_paths = {path.basename(pdf): path.join(PROJECT_DIR, pdf) for pdf in FIXTURE_PDFS}
+
+        for name, spec in SYNTHETIC_PDFS.items():
+            pdf_paths[name] = path.join(tmp_dir, name)
+            write_synthetic_pdf(spec, pdf_paths[name])
+
+        calibration_seconds = calibrate()
+
+        for name, pdf_path in pdf_paths.items():
+            print(f"Measuring '{name}'...", file=sys.stderr)
+            pdfs[name] = measure_pdf(pdf_path, repeat)
+
+    return {
+        'pdfalyzer_version': version('pdfalyzer'),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': started_at.isoformat(timespec='seconds'),
+        'repeat': repeat,
+        'calibration_seconds': calibration_seconds,
+        'pdfs': pdfs,
+    }
+
+
+def compare(
+        baseline: dict,
+        current: dict,
+        time_tolerance: float = DEFAULT_TIME_TOLERANCE,
+        memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE,
+        scale_timings: bool = True
+    ) -> List[Comparison]:
+    """Compare every phase timing and peak memory in current to baseline."""
+    scale = current['calibration_seconds'] / baseline['calibration_seconds'] if scale_timings else 1.0
+    comparisons = []
+
+    for pdf, results in current['pdfs'].items():
+        baseline_results = baseline['pdfs'].get(pdf, {})
+        baseline_phases = baseline_results.get('phases', {})
+
+        for phase, timing in results['phases'].items():
+            timing = Timing(**timing)
+
+            if phase not in baseline_phases:
+                comparisons.append(Comparison(pdf, phase, None, timing.fastest, None, NEW))
+                continue
+
+            baseline_timing = Timing(**baseline_phases[phase])
+            expected = baseline_timing.fastest * scale
+            noise = NOISE_MULTIPLIER * max(baseline_timing.noise * scale, timing.noise)
+            allowed = expected + max(expected * time_tolerance, noise, MIN_TIME_DELTA)
+            status = _status(expected, timing.fastest, allowed)
+            comparisons.append(Comparison(pdf, phase, expected, timing.fastest, allowed, status))
+
+        if PEAK_MEMORY not in baseline_results:
+            comparisons.append(Comparison(pdf, PEAK_MEMORY, None, results[PEAK_MEMORY], None, NEW))
+            continue
+
+        expected = baseline_results[PEAK_MEMORY]
+        allowed = expected + max(expected * memory_tolerance, MIN_MEMORY_DELTA)
+        status = _status(expected, results[PEAK_MEMORY], allowed)
+        comparisons.append(Comparison(pdf, PEAK_MEMORY, expected, results[PEAK_MEMORY], allowed, status))
+
+    return comparisons
+
+
+def print_comparisons(comparisons: List[Comparison]) -> None:
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table('PDF', 'Metric', 'Baseline', 'Current', 'Allowed', 'Delta', 'Status', title='Regression Gate')
+
+    for c in comparisons:
+        format_value = _format_bytes if c.metric == PEAK_MEMORY else _format_seconds
+        delta = '' if c.delta_pct is None else f"{c.delta_pct:+.1f}%"
+        style = {REGRESSION: 'bold red', FASTER: 'green', NEW: 'cyan'}.get(c.status, '')
+        values = [format_value(value) for value in (c.baseline, c.current, c.allowed)]
+        table.add_row(c.pdf, c.metric, *values, delta, c.status, style=style)
+
+    console = Console()
+    console.width = max(console.width, 120)
+    console.print(table)
+
+
+def parse_gate_arguments(argv: Optional[List[str]] = None):
+    parser = ArgumentParser(description="Compare the pdfalyzer's phase timings and peak memory against a baseline.")
+
+    parser.add_argument('--baseline', metavar='FILE', default=BASELINE_PATH,
+                        help='baseline JSON to compare against (or write with --update-baseline)')
+
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='measure and write the baseline instead of comparing against it')
+
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='build each PDF\'s tree this many times and compare the fastest run')
+
+    parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help='fraction slower than the baseline a phase can be before it counts as a regression')
+
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help='fraction bigger than the baseline peak memory can be before it counts as a regression')
+
+    parser.add_argument('--no-scale', action='store_true',
+                        help="don't scale the baseline timings by this machine's speed relative to the baseline's")
+
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='also write the current measurements as JSON to FILE')
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_gate_arguments(argv)
+
+    if not args.update_baseline and not path.isfile(args.baseline):
+        print(f"Baseline '{args.baseline}' not found (create it with --update-baseline)", file=sys.stderr)
+        sys.exit(BASELINE_ERROR_EXIT_CODE)
+
+    current = measure_gate_pdfs(args.repeat)
+
+    for output_path in [args.output, args.baseline if args.update_baseline else None]:
+        if output_path:
+            with open(output_path, 'wt') as output_file:
+                output_file.write(json.dumps(current, indent=4) + "\n")
+
+            print(f"Wrote measurements to '{output_path}'", file=sys.stderr)
+
+    if args.update_baseline:
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    comparisons = compare(baseline, current, args.time_tolerance, args.memory_tolerance, not args.no_scale)
+    print_comparisons(comparisons)
+    regressions = [c for c in comparisons if c.status == REGRESSION]
+
+    if regressions:
+        print(f"{len(regressions)} significant regression(s) vs. '{args.baseline}'", file=sys.stderr)
+        sys.exit(REGRESSION_EXIT_CODE)
+
+
+def _status(expected: float, current: float, allowed: float) -> str:
+    if current > allowed:
+        return REGRESSION
+    elif current < expected - (allowed - expected):
+        return FASTER
+    else:
+        return OK
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    return '' if seconds is None else f"{seconds:.3f}s"
+
+
+def _format_bytes(num_bytes: Optional[float]) -> str:
+    return '' if num_bytes is None else f"{num_bytes / 1024 / 1024:.2f}MB"
+
+
+if __name__ == '__main__':
+    main()
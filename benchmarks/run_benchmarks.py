@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+Time the phases of building the tree, each presenter section, and each export format against the synthetic
+PDFs in SCENARIOS and write the results as JSON. Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                               # All scenarios, JSON to stdout
+    python -m benchmarks.run_benchmarks -s small -s wide_annots -o results.json
+    python -m benchmarks.run_benchmarks --pdf-dir corpus/             # Also keep the generated PDFs
+
+Each timing is the fastest of --repeat runs.
+"""
+import json
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from importlib.metadata import version
+from io import StringIO
+from os import devnull, makedirs, path
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, Iterator, List, Optional
+
+from benchmarks.synthetic_pdf import SyntheticPdf, SyntheticPdfSpec
+
+SCENARIOS = {
+    'small': SyntheticPdfSpec(),
+    'many_pages': SyntheticPdfSpec(pages=300, page_tree_depth=3, streams=300),
+    'wide_annots': SyntheticPdfSpec(pages=40, annots_per_page=50),
+    'shared_fonts': SyntheticPdfSpec(pages=100, fonts=25),
+    'big_streams': SyntheticPdfSpec(pages=10, streams=40, stream_size=256 * 1024),
+    'deep_arrays': SyntheticPdfSpec(pages=100, array_depth=60),
+}
+
+# Output of the sections and exports goes nowhere; there's a lot of it
+SECTIONS = ['docinfo', 'tree', 'rich', 'fonts', 'counts', 'yara', 'streams']
+EXPORT_SECTIONS = ['tree', 'rich']
+NDJSON = 'ndjson'
+HTML_REPORT = 'html_report'
+
+
+def run_scenario(name: str, spec: SyntheticPdfSpec, pdf_dir: str, repeat: int = 1) -> dict:
+    """Generate the PDF for spec in pdf_dir and time everything. Returns a dict of results."""
+    from pdfalyzer.output.html_report import HtmlReport
+    from pdfalyzer.output.json_presenter import JsonPresenter
+    from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+    from pdfalyzer.output.streaming_export import EXPORT_FORMATS, streaming_export
+    from pdfalyzer.pdfalyzer import PHASES, Pdfalyzer
+    from pdfalyzer.util.argument_parser import output_sections, parse_arguments
+
+    synthetic_pdf = SyntheticPdf(spec)
+    pdf_path = path.join(pdf_dir, f"{name}.pdf")
+    pdf_size = synthetic_pdf.write(pdf_path)
+    args = parse_arguments([pdf_path, *[f"--{section}" for section in SECTIONS]])
+    print(f"Benchmarking '{name}' ({pdf_size:,} bytes, {synthetic_pdf.object_count:,} objects)...", file=sys.stderr)
+
+    with _output_suppressed():
+        pdfalyzers = [Pdfalyzer(pdf_path) for _ in range(repeat)]
+        pdfalyzer = pdfalyzers[-1]
+        presenter = PdfalyzerPresenter(pdfalyzer)
+        sections = {section: method for section, method in output_sections(args, presenter)}
+        section_timings = {section: _fastest(method, repeat) for section, method in sections.items()}
+        export_timings = {}
+
+        for export_format in EXPORT_FORMATS:
+            def export() -> None:
+                for section in EXPORT_SECTIONS:
+                    with streaming_export(path.join(pdf_dir, f"{name}.{section}"), [export_format]):
+                        sections[section]()
+
+            export_timings[export_format] = _fastest(export, repeat)
+
+        export_timings[NDJSON] = _fastest(lambda: JsonPresenter(pdfalyzer, StringIO()).write_sections(SECTIONS), repeat)
+        html_report_path = path.join(pdf_dir, f"{name}.{HTML_REPORT}.html")
+        export_timings[HTML_REPORT] = _fastest(lambda: HtmlReport(pdfalyzer).write(html_report_path), repeat)
+
+    phase_timings = {phase: min(p.phase_timings[phase] for p in pdfalyzers) for phase in PHASES}
+    build_seconds = sum(phase_timings.values())
+    node_count = pdfalyzer.tree_summary()['node_count']
+
+    return {
+        'spec': spec._asdict(),
+        'pdf_bytes': pdf_size,
+        'pdf_objects': synthetic_pdf.object_count,
+        'nodes': node_count,
+        'fonts': len(pdfalyzer.font_infos),
+        'phases': _rounded(phase_timings),
+        'sections': _rounded(section_timings),
+        'exports': _rounded(export_timings),
+        'build_seconds': round(build_seconds, 4),
+        'nodes_per_second': round(node_count / build_seconds, 1),
+        'megabytes_per_second': round(pdf_size / build_seconds / 1024 / 1024, 3),
+    }
+
+
+def run_benchmarks(scenarios: List[str], repeat: int = 1, pdf_dir: Optional[str] = None) -> dict:
+    """Run the scenarios and return the results along with enough about the environment to compare them."""
+    started_at = datetime.now()
+
+    with (_kept_dir(pdf_dir) if pdf_dir else TemporaryDirectory()) as working_dir:
+        results = {name: run_scenario(name, SCENARIOS[name], working_dir, repeat) for name in scenarios}
+
+    return {
+        'pdfalyzer_version': version('pdfalyzer'),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'elapsed_seconds': round((datetime.now() - started_at).total_seconds(), 3),
+        'repeat': repeat,
+        'scenarios': results,
+    }
+
+
+def _fastest(fxn: Callable[[], None], repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        fxn()
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+
+def _rounded(timings: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v, 4) for k, v in timings.items()}
+
+
+@contextmanager
+def _kept_dir(dir: str) -> Iterator[str]:
+    makedirs(dir, exist_ok=True)
+    yield dir
+
+
+@contextmanager
+def _output_suppressed() -> Iterator[None]:
+    """Send stdout, the rich console, and the log handlers' output to devnull."""
+    from rich.logging import RichHandler
+    from yaralyzer.output.rich_console import console
+    from yaralyzer.util.logging import log
+
+    consoles = [console] + [h.console for h in log.handlers if isinstance(h, RichHandler)]
+    original_files = [c.file for c in consoles]
+
+    with open(devnull, 'w') as null_output, redirect_stdout(null_output):
+        for c in consoles:
+            c.file = null_output
+
+        try:
+            yield
+        finally:
+            for c, original_file in zip(consoles, original_files):
+                c.file = original_file
+
+
+def parse_benchmark_arguments(argv: Optional[List[str]] = None):
+    parser = ArgumentParser(description="Benchmark the pdfalyzer against synthetic PDFs.")
+
+    parser.add_argument('-s', '--scenario', action='append', dest='scenarios', choices=list(SCENARIOS.keys()),
+                        help='scenario to run (can be specified more than once; default is all of them)')
+
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='run each timing this many times and keep the fastest')
+
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='write the JSON results to FILE instead of stdout')
+
+    parser.add_argument('--pdf-dir', metavar='DIR',
+                        help='keep the generated PDFs and exports in DIR instead of a temporary directory')
+
+    args = parser.parse_args(argv)
+    args.scenarios = args.scenarios or list(SCENARIOS.keys())
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_benchmark_arguments(argv)
+    results = json.dumps(run_benchmarks(args.scenarios, args.repeat, args.pdf_dir), indent=4)
+
+    if args.output:
+        with open(args.output, 'wt') as output_file:
+            output_file.write(results + "\n")
+
+        print(f"Wrote results to '{args.output}'", file=sys.stderr)
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Deterministic generator of synthetic PDFs whose size and shape are controlled by a SyntheticPdfSpec.
+The same spec always produces the same bytes so timings of different versions are comparable.
+
+Shape of the generated document:
+    Trailer => /Root Catalog, /Info
+    Catalog => /Pages tree page_tree_depth levels deep with pages leaf /Page objects
+    Each /Page => /Contents (FlateDecode streams, spread across the pages), /Resources with all the shared fonts,
+                  /Annots (links to the next page and /URI actions), and a nested array array_depth levels deep
+    Each /Font => /FontDescriptor => /FontFile (Type1 style cleartext + pseudo random "encrypted" portion),
+                  /Widths, /ToUnicode CMap stream
+"""
+import random
+import zlib
+from math import ceil
+from typing import Dict, List, NamedTuple, Optional
+
+FONT_FIRST_CHAR = 32
+FONT_LAST_CHAR = 126
+PAGE_MEDIA_BOX = b'[0 0 612 792]'
+
+
+class SyntheticPdfSpec(NamedTuple):
+    pages: int = 10                # Leaf /Page objects
+    page_tree_depth: int = 1       # Levels of /Pages nodes between the catalog and the leaf pages
+    annots_per_page: int = 2       # /Annots fan out
+    fonts: int = 2                 # Fonts shared by every page's /Resources
+    font_file_size: int = 4096     # Bytes in the binary portion of each font's /FontFile
+    streams: int = 10              # Content streams, spread across the pages' /Contents
+    stream_size: int = 2048        # Decompressed bytes in each content stream
+    array_depth: int = 3           # Nesting of the array each page holds a reference to its first font in
+    seed: int = 0                  # Seed for the pseudo random bytes in the font files
+
+
+class SyntheticPdf:
+    def __init__(self, spec: SyntheticPdfSpec):
+        self.spec = spec
+        self.objects: Dict[int, bytes] = {}
+        self._next_idnum = 1
+        self._page_parents: Dict[int, int] = {}
+        self._random = random.Random(spec.seed)
+
+    def build(self) -> bytes:
+        """Build the PDF and return its bytes."""
+        catalog_id = self._allocate()
+        info_id = self._allocate()
+        pages_root_id = self._allocate()
+        font_ids = [self._build_font(i) for i in range(self.spec.fonts)]
+        page_ids = [self._allocate() for _ in range(self.spec.pages)]
+        stream_ids = [self._build_content_stream(i) for i in range(self.spec.streams)]
+
+        self._build_page_tree(pages_root_id, None, page_ids, self.spec.page_tree_depth)
+
+        for i, page_id in enumerate(page_ids):
+            next_page_id = page_ids[(i + 1) % len(page_ids)]
+            page_stream_ids = stream_ids[i::len(page_ids)]
+            self._build_page(page_id, i, next_page_id, page_stream_ids, font_ids)
+
+        self.objects[catalog_id] = _dict(Type=b'/Catalog', Pages=_ref(pages_root_id))
+        self.objects[info_id] = _dict(Producer=b'(pdfalyzer synthetic benchmark PDF)', Title=_pdf_string(str(self.spec)))
+        return self._serialize(catalog_id, info_id)
+
+    def write(self, pdf_path: str) -> int:
+        """Write the PDF to pdf_path and return the number of bytes written."""
+        pdf_bytes = self.build()
+
+        with open(pdf_path, 'wb') as pdf_file:
+            pdf_file.write(pdf_bytes)
+
+        return len(pdf_bytes)
+
+    @property
+    def object_count(self) -> int:
+        return len(self.objects)
+
+    def _build_page_tree(self, pages_id: int, parent_id: Optional[int], page_ids: List[int], depth: int) -> None:
+        """Split page_ids evenly into intermediate /Pages nodes until depth runs out."""
+        if depth <= 1 or len(page_ids) <= 1:
+            kids = page_ids
+            self._page_parents.update({page_id: pages_id for page_id in kids})
+        else:
+            fan_out = max(2, ceil(len(page_ids) ** (1 / depth)))
+            chunk_size = ceil(len(page_ids) / fan_out)
+            kids = []
+
+            for i in range(0, len(page_ids), chunk_size):
+                kid_id = self._allocate()
+                kids.append(kid_id)
+                self._build_page_tree(kid_id, pages_id, page_ids[i:i + chunk_size], depth - 1)
+
+        pages = {'Type': b'/Pages', 'Kids': _array([_ref(kid) for kid in kids]), 'Count': b'%d' % len(page_ids)}
+
+        if parent_id is not None:
+            pages['Parent'] = _ref(parent_id)
+
+        self.objects[pages_id] = _dict(**pages)
+
+    def _build_page(
+            self,
+            page_id: int,
+            page_num: int,
+            next_page_id: int,
+            stream_ids: List[int],
+            font_ids: List[int]
+        ) -> None:
+        annot_ids = [self._build_annot(page_id, next_page_id, page_num, i) for i in range(self.spec.annots_per_page)]
+        fonts = b'<< ' + b' '.join(b'/F%d %s' % (i, _ref(font_id)) for i, font_id in enumerate(font_ids)) + b' >>'
+        nested_array = _ref(font_ids[0]) if font_ids else str(page_num).encode()
+
+        for _ in range(self.spec.array_depth):
+            nested_array = b'[' + nested_array + b' ' + str(page_num).encode() + b']'
+
+        page = {
+            'Type': b'/Page',
+            'Parent': _ref(self._page_parents[page_id]),
+            'MediaBox': PAGE_MEDIA_BOX,
+            'Resources': b'<< /Font ' + fonts + b' /ProcSet [/PDF /Text] >>',
+            'Annots': _array([_ref(annot_id) for annot_id in annot_ids]),
+            'PieceInfo': b'<< /SyntheticNesting << /Private ' + nested_array + b' >> >>',
+        }
+
+        if len(stream_ids) == 1:
+            page['Contents'] = _ref(stream_ids[0])
+        elif len(stream_ids) > 1:
+            page['Contents'] = _array([_ref(stream_id) for stream_id in stream_ids])
+
+        self.objects[page_id] = _dict(**page)
+
+    def _build_annot(self, page_id: int, next_page_id: int, page_num: int, annot_num: int) -> int:
+        rect = b'[%d %d %d %d]' % (72, 700 - 20 * annot_num, 272, 715 - 20 * annot_num)
+
+        annot = {'Type': b'/Annot', 'Subtype': b'/Link', 'Rect': rect, 'Border': b'[0 0 0]', 'P': _ref(page_id)}
+
+        if annot_num % 2 == 0:
+            annot['Dest'] = b'[' + _ref(next_page_id) + b' /Fit]'
+        else:
+            annot['A'] = b'<< /S /URI /URI ' + _pdf_string(f"https://example.com/{page_num}/{annot_num}") + b' >>'
+
+        return self._add(_dict(**annot))
+
+    def _build_font(self, font_num: int) -> int:
+        font_name = b'/SynthFont%d' % font_num
+        cleartext = b'%!PS-AdobeFont-1.0: SynthFont' + str(font_num).encode() + b'\n/FontName ' + font_name + \
+            b' def\ncurrentfile eexec\n'
+        binary = bytes(self._random.getrandbits(8) for _ in range(self.spec.font_file_size))
+        trailer = b'0' * 512 + b'\ncleartomark\n'
+        lengths = b'/Length1 %d /Length2 %d /Length3 %d' % (len(cleartext), len(binary), len(trailer))
+        font_file_id = self._add_stream(cleartext + binary + trailer, lengths)
+
+        descriptor_id = self._add(_dict(
+            Type=b'/FontDescriptor',
+            FontName=font_name,
+            Flags=b'32',
+            FontBBox=b'[-50 -250 1000 900]',
+            ItalicAngle=b'0',
+            Ascent=b'900',
+            Descent=b'-250',
+            CapHeight=b'700',
+            StemV=b'80',
+            FontFile=_ref(font_file_id)
+        ))
+
+        to_unicode_id = self._add_stream(_to_unicode_cmap(font_num))
+        widths = _array([b'%d' % (400 + (c * 37 + font_num) % 300) for c in range(FONT_FIRST_CHAR, FONT_LAST_CHAR + 1)])
+
+        return self._add(_dict(
+            Type=b'/Font',
+            Subtype=b'/Type1',
+            BaseFont=font_name,
+            FirstChar=b'%d' % FONT_FIRST_CHAR,
+            LastChar=b'%d' % FONT_LAST_CHAR,
+            Widths=widths,
+            FontDescriptor=_ref(descriptor_id),
+            ToUnicode=_ref(to_unicode_id)
+        ))
+
+    def _build_content_stream(self, stream_num: int) -> int:
+        lines = []
+        size = 0
+
+        while size < self.spec.stream_size:
+            y_position = 720 - (len(lines) % 50) * 14
+            line = b'BT /F0 12 Tf 72 %d Td (Synthetic stream %d line %d) Tj ET\n' % (y_position, stream_num, len(lines))
+            lines.append(line)
+            size += len(line)
+
+        content = b''.join(lines)[:self.spec.stream_size]
+        return self._add_stream(zlib.compress(content, 6), b'/Filter /FlateDecode')
+
+    def _add_stream(self, data: bytes, extra_keys: bytes = b'') -> int:
+        header = b'<< /Length %d %s >>' % (len(data), extra_keys)
+        return self._add(header + b'\nstream\n' + data + b'\nendstream')
+
+    def _add(self, obj: bytes) -> int:
+        idnum = self._allocate()
+        self.objects[idnum] = obj
+        return idnum
+
+    def _allocate(self) -> int:
+        idnum = self._next_idnum
+        self._next_idnum += 1
+        return idnum
+
+    def _serialize(self, catalog_id: int, info_id: int) -> bytes:
+        pdf = bytearray(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        offsets = {}
+
+        for idnum in sorted(self.objects):
+            offsets[idnum] = len(pdf)
+            pdf += b'%d 0 obj\n' % idnum + self.objects[idnum] + b'\nendobj\n'
+
+        xref_offset = len(pdf)
+        size = max(self.objects) + 1
+        pdf += b'xref\n0 %d\n0000000000 65535 f \n' % size
+        pdf += b''.join(b'%010d 00000 n \n' % offsets[idnum] for idnum in range(1, size))
+        pdf += b'trailer\n' + _dict(Size=b'%d' % size, Root=_ref(catalog_id), Info=_ref(info_id))
+        pdf += b'\nstartxref\n%d\n%%%%EOF\n' % xref_offset
+        return bytes(pdf)
+
+
+def write_synthetic_pdf(spec: SyntheticPdfSpec, pdf_path: str) -> int:
+    """Write a PDF built from spec to pdf_path. Returns the number of bytes written."""
+    return SyntheticPdf(spec).write(pdf_path)
+
+
+def _to_unicode_cmap(font_num: int) -> bytes:
+    mappings = b'\n'.join(b'<%02X> <%04X>' % (c, c + font_num) for c in range(FONT_FIRST_CHAR, FONT_LAST_CHAR + 1))
+
+    return b'/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n' + \
+        b'/CMapName /SynthFont%d-UCS def\n/CMapType 2 def\n' % font_num + \
+        b'1 begincodespacerange\n<00> <FF>\nendcodespacerange\n' + \
+        b'%d beginbfchar\n' % (FONT_LAST_CHAR - FONT_FIRST_CHAR + 1) + mappings + b'\nendbfchar\n' + \
+        b'endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend'
+
+
+def _dict(**entries: bytes) -> bytes:
+    return b'<< ' + b' '.join(b'/' + key.encode() + b' ' + value for key, value in entries.items()) + b' >>'
+
+
+def _array(elements: List[bytes]) -> bytes:
+    return b'[' + b' '.join(elements) + b']'
+
+
+def _ref(idnum: int) -> bytes:
+    return b'%d 0 R' % idnum
+
+
+def _pdf_string(s: str) -> bytes:
+    return b'(' + s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode() + b')'
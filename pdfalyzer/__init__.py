@@ -1,78 +1,183 @@
-import code
-import logging
+"""
+Entry points for the command line scripts. Only the standard library is imported at the top of this file so
+'import pdfalyzer' (which happens before any code in the package runs) and things like 'pdfalyze --version'
+stay fast. Everything else is imported by the entry points and only when the chosen options need it.
+"""
+import os
 import sys
 from os import environ, getcwd, path
 
-from dotenv import load_dotenv
-
-from pdfalyzer.config import PdfalyzerConfig
-
-# load_dotenv() should be called as soon as possible (before parsing local classes) but not for pytest
+# load_dotenv() should be called as soon as possible (before parsing local classes) but not for pytest.
+# dotenv itself is only imported if there's a file to load.
 if not environ.get('INVOKED_BY_PYTEST', False):
     for dotenv_file in [path.join(dir, '.pdfalyzer') for dir in [getcwd(), path.expanduser('~')]]:
         if path.exists(dotenv_file):
+            from dotenv import load_dotenv
             load_dotenv(dotenv_path=dotenv_file)
             break
 
-from rich.columns import Columns
-from rich.panel import Panel
-from yaralyzer.helpers.rich_text_helper import prefix_with_plain_text_obj
-from yaralyzer.output.file_export import invoke_rich_export
-from yaralyzer.output.rich_console import console
-from yaralyzer.util.logging import log, log_and_print
-
-from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
-from pdfalyzer.output.styles.rich_theme import PDFALYZER_THEME_DICT
-from pdfalyzer.pdfalyzer import Pdfalyzer
-from pdfalyzer.util.pdf_parser_manager import PdfParserManager
-from pdfalyzer.util.argument_parser import output_sections, parse_arguments
-
 # For the table shown by running pdfalyzer_show_color_theme
 MAX_THEME_COL_SIZE = 35
 
 
 def pdfalyze():
+    if '--version' in sys.argv:
+        from importlib.metadata import version
+        print(f"pdfalyzer {version('pdfalyzer')}")
+        sys.exit()
+
+    from yaralyzer.output.rich_console import console
+    from yaralyzer.util.logging import log, log_and_print
+
+    from pdfalyzer.config import ALL_STREAMS, PdfalyzerConfig
+    from pdfalyzer.util.argument_parser import output_sections, parse_arguments, selected_sections
+
     args = parse_arguments()
-    pdfalyzer = Pdfalyzer(args.file_to_scan_path)
-    pdfalyzer = PdfalyzerPresenter(pdfalyzer)
-    output_basepath = None
+
+    # Triage is a special case that never touches PyPDF2
+    if args.triage:
+        from pdfalyzer.detection.keyword_triage import KeywordTriage
+        from pdfalyzer.output.tables.keyword_triage_table import keyword_triage_table
+        console.print(keyword_triage_table(KeywordTriage(args.file_to_scan_path)))
+        sys.exit()
+
+    # Keep stdout clean for the JSON; anything the rich console or log handlers would have shown goes to stderr
+    if args.ndjson:
+        from rich.logging import RichHandler
+        console.file = sys.stderr
+
+        for handler in [h for h in log.handlers if isinstance(h, RichHandler)]:
+            handler.console.file = sys.stderr
+
+    from pdfalyzer.pdfalyzer import Pdfalyzer
+    from pdfalyzer.util.exceptions import MemoryLimitExceeded
+    memory_accountant = None
+    stream_data_store = None
+
+    if args.max_memory or args.memory_report:
+        from pdfalyzer.util.memory_accounting import MemoryAccountant
+        memory_accountant = MemoryAccountant(args.max_memory)
+
+    if args.stream_memory is not None or args.spill_dir:
+        from pdfalyzer.binary.stream_data_store import DEFAULT_MAX_MEMORY_BYTES, StreamDataStore
+        stream_memory = DEFAULT_MAX_MEMORY_BYTES if args.stream_memory is None else args.stream_memory
+        stream_data_store = StreamDataStore(stream_memory, args.spill_dir)
+
+    try:
+        pdfalyzer = Pdfalyzer(
+            args.file_to_scan_path,
+            memory_accountant=memory_accountant,
+            stream_data_store=stream_data_store
+        )
+    except MemoryLimitExceeded as e:
+        from pdfalyzer.output.tables.memory_report_table import memory_report_tables
+        console.print(memory_report_tables(e.report))
+        log.error(str(e))
+        sys.exit(1)
+
+    # Tracing slows everything down so it stops once the tree is built
+    if memory_accountant:
+        if args.memory_report:
+            from pdfalyzer.output.tables.memory_report_table import memory_report_tables
+            console.print(memory_report_tables(memory_accountant.report(pdfalyzer)))
+
+        memory_accountant.stop()
+
+    if args.tree_root is not None and pdfalyzer.find_node_by_idnum(args.tree_root) is None:
+        log.error(f"--tree-root {args.tree_root} is not an object in the tree of '{args.file_to_scan_path}'")
+        sys.exit(1)
+
+    # Interactive browsing replaces all the other output
+    if args.browse:
+        from pdfalyzer.output.tree_browser import browse
+        browse(pdfalyzer)
+        sys.exit()
+
+    if args.html_report:
+        from pdfalyzer.output.html_report import HtmlReport
+        report_path = PdfalyzerConfig.get_output_basepath('html_report') + '.html'
+        log_and_print(f"Writing HTML report to '{report_path}'...")
+        HtmlReport(pdfalyzer).write(report_path)
+        log_and_print(f"HTML report written.\n")
+        sys.exit()
 
     # Binary stream extraction is a special case
     if args.extract_binary_streams:
+        from pdfalyzer.binary.stream_extractor import StreamExtractor
         log_and_print(f"Extracting binary streams in '{args.file_to_scan_path}' to files in '{args.output_dir}'...")
-        PdfParserManager(args.file_to_scan_path).extract_all_streams(args.output_dir)
-        log_and_print(f"Binary stream extraction complete, files written to '{args.output_dir}'.\nExiting.\n")
+        stream_extractor = StreamExtractor(pdfalyzer, args.output_dir, args.output_basename, args.raw_streams)
+        stream_extractor.extract_all_streams()
+        log_and_print(f"Binary stream extraction complete, files written to '{args.output_dir}'.")
+        log_and_print(f"Manifest written to '{stream_extractor.manifest_path}'.\nExiting.\n")
         sys.exit()
 
-    # Analysis exports wrap themselves around the methods that actually generate the analyses
-    for (arg, method) in output_sections(args, pdfalyzer):
-        if args.output_dir:
+    try:
+        if args.ndjson:
+            from pdfalyzer.output.json_presenter import JsonPresenter
+            stream_idnum = None if args.streams == ALL_STREAMS else args.streams
+            JsonPresenter(pdfalyzer, sys.stdout).write_sections(selected_sections(args), stream_idnum, args.suppress_boms)
+            sys.exit()
+
+        from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+        from pdfalyzer.output.streaming_export import streaming_export
+        pdfalyzer = PdfalyzerPresenter(pdfalyzer)
+        export_formats = [f for f in [args.export_txt, args.export_html, args.export_svg] if f]
+
+        # Analysis exports wrap themselves around the methods that actually generate the analyses. Rendered
+        # output is streamed to all the export files at once while the section prints.
+        for (arg, method) in output_sections(args, pdfalyzer):
+            if len(export_formats) == 0:
+                method()
+                continue
+
             output_basepath = PdfalyzerConfig.get_output_basepath(method)
             print(f'Exporting {arg} data to {output_basepath}...')
-            console.record = True
 
-        method()
+            with streaming_export(output_basepath, export_formats):
+                method()
+    except BrokenPipeError:
+        _exit_on_broken_pipe()
 
-        if args.export_txt:
-            invoke_rich_export(console.save_text, output_basepath)
+    # Drop into interactive shell if requested
+    if args.interact:
+        import code
+        code.interact(local=locals())
 
-        if args.export_html:
-            invoke_rich_export(console.save_html, output_basepath)
 
-        if args.export_svg:
-            invoke_rich_export(console.save_svg, output_basepath)
+def _exit_on_broken_pipe() -> None:
+    """
+    Whatever stdout was piped to (e.g. 'head' or 'less') stopped reading so stop writing. stdout is pointed
+    at devnull so python doesn't raise again trying to flush it on the way out.
+    See https://docs.python.org/3/library/signal.html#note-on-sigpipe
+    """
+    devnull_fd = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull_fd, sys.stdout.fileno())
+    sys.exit(1)
 
-        # Clear the buffer if we have one
-        if args.output_dir:
-            del console._record_buffer[:]
 
-    # Drop into interactive shell if requested
-    if args.interact:
-        code.interact(local=locals())
+def pdfalyzer_daemon() -> None:
+    """Long running analysis server. Invocable with 'pdfalyzer_daemon'."""
+    from pdfalyzer.daemon import AnalysisDaemon, serve_http, serve_unix_socket
+    from pdfalyzer.util.argument_parser import parse_daemon_arguments
+
+    args = parse_daemon_arguments()
+    analysis_daemon = AnalysisDaemon(args.cache_size, args.keep_decodes)
+
+    if args.socket:
+        serve_unix_socket(args.socket, analysis_daemon)
+    else:
+        serve_http(args.port, analysis_daemon)
 
 
 def pdfalyzer_show_color_theme() -> None:
     """Utility method to show pdfalyzer's color theme. Invocable with 'pdfalyzer_show_colors'."""
+    from rich.columns import Columns
+    from rich.panel import Panel
+    from yaralyzer.helpers.rich_text_helper import prefix_with_plain_text_obj
+    from yaralyzer.output.rich_console import console
+
+    from pdfalyzer.output.styles.rich_theme import PDFALYZER_THEME_DICT
+
     console.print(Panel('The Pdfalyzer Color Theme', style='reverse'))
 
     colors = [
@@ -0,0 +1,271 @@
+"""
+Options and output for one analysis. PdfalyzerConfig._args and YaralyzerConfig.args are class level globals
+and everything prints to yaralyzer's console, so two analyses with different options can't run at the same time
+in one process unless something keeps them apart. An AnalysisContext carries the parsed args and the output sink
+of one analysis and is passed to Pdfalyzer, PdfalyzerPresenter, BinaryScanner, and FontInfo. It also carries the
+listeners that are called with the analysis's events (see pdfalyzer/events.py) as things are found and can carry
+a DecodeMemo of its own so force decode results aren't shared with other analyses.
+
+While a context is active (per thread / asyncio task; it's tracked in a ContextVar) the process wide args and the
+console's output resolve to it. That covers what yaralyzer reads and prints internally (e.g. BytesMatch reading
+YaralyzerConfig.args.surrounding_bytes), which can't be handed a context. When no context is active they resolve
+to the process wide args set by parse_arguments() and to whatever file the console was given.
+
+That resolution needs proxies in YaralyzerConfig.args, PdfalyzerConfig._args, and the console's file, which
+install() puts in place. Importing pdfalyzer doesn't; install() is called by pdfalyzer_daemon, AsyncAnalyzer,
+AnalysisContext.from_argv(), and when a context with args or output of its own is activated.
+
+    context = AnalysisContext.from_argv([pdf_path, '--streams', '--extract-quoted', 'backtick'], output=StringIO())
+    presenter = PdfalyzerPresenter(Pdfalyzer(pdf_path, context=context))
+    presenter.print_streams_analysis()
+
+Still shared by every analysis in the process: the console's width, theme, and record buffer (so exports), the
+log level, and the EncodingDetector thresholds.
+"""
+import sys
+from argparse import Namespace
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import RLock
+from types import SimpleNamespace
+from typing import IO, TYPE_CHECKING, Callable, Iterator, List, Optional, Sequence
+
+from yaralyzer.config import YaralyzerConfig
+
+from pdfalyzer.config import PdfalyzerConfig
+
+if TYPE_CHECKING:
+    from pdfalyzer.binary.decode_memo import DecodeMemo
+    from pdfalyzer.events import AnalysisEvent, EventListener
+
+_active_context: ContextVar[Optional['AnalysisContext']] = ContextVar('active_analysis_context', default=None)
+_parsing_context: ContextVar[Optional['AnalysisContext']] = ContextVar('parsing_analysis_context', default=None)
+_install_lock = RLock()
+_installed = False
+
+
+class AnalysisContext:
+    def __init__(
+            self,
+            args: Optional[Namespace] = None,
+            output: Optional[IO[str]] = None,
+            listeners: Sequence['EventListener'] = (),
+            decode_memo: Optional['DecodeMemo'] = None
+        ):
+        """
+        args defaults to the process wide args (whatever parse_arguments() parsed most recently).
+        output defaults to wherever the console is writing.
+        listeners are called with each event the analysis emits.
+        decode_memo is where BinaryScanners remember force decodes. Pdfalyzer gives contexts without one a new
+        memo per analysis; pass one in to share decodes across analyses.
+        """
+        self._args = args
+        self.output = output
+        self.listeners: List['EventListener'] = list(listeners)
+        self.decode_memo = decode_memo
+
+    @classmethod
+    def from_argv(
+            cls,
+            argv: List[str],
+            output: Optional[IO[str]] = None,
+            listeners: Sequence['EventListener'] = (),
+            decode_memo: Optional['DecodeMemo'] = None
+        ) -> 'AnalysisContext':
+        """Parse command line style args for this context without changing the process wide args."""
+        from pdfalyzer.util.argument_parser import parse_arguments
+        install()
+        context = cls(Namespace(), output, listeners, decode_memo)
+        token = _parsing_context.set(context)
+
+        try:
+            parse_arguments(argv)
+        finally:
+            _parsing_context.reset(token)
+
+        return context
+
+    @property
+    def args(self) -> Namespace:
+        return _process_args() if self._args is None else self._args
+
+    def with_options(self, **options) -> 'AnalysisContext':
+        """Copy of this context with some options changed (the original's args are left alone)."""
+        args = Namespace(**{**vars(self.args), **options})
+        return AnalysisContext(args, self.output, self.listeners, self.decode_memo)
+
+    def with_decode_memo(self, decode_memo: 'DecodeMemo') -> 'AnalysisContext':
+        """Copy of this context that remembers force decodes in decode_memo (args are still resolved the same way)."""
+        return AnalysisContext(self._args, self.output, self.listeners, decode_memo)
+
+    def emit(self, event: 'AnalysisEvent') -> None:
+        """Call the listeners with event. Exceptions they raise are not caught."""
+        for listener in self.listeners:
+            listener(event)
+
+    @contextmanager
+    def activate(self) -> Iterator['AnalysisContext']:
+        """Make the process wide args and console output resolve to this context until the block exits."""
+        if self._args is not None or self.output is not None:
+            install()
+
+        token = _active_context.set(self)
+
+        try:
+            yield self
+        finally:
+            _active_context.reset(token)
+
+    def __repr__(self) -> str:
+        args = 'process args' if self._args is None else 'own args'
+        return f"AnalysisContext({args}, output={self.output!r})"
+
+
+def current_context() -> AnalysisContext:
+    """The active context or, if there isn't one, a context for the process wide args and output."""
+    return _active_context.get() or PROCESS_CONTEXT
+
+
+def in_analysis_context(method: Callable) -> Callable:
+    """Decorator for methods of objects with a 'context' property that activates it for the duration of the call."""
+    @wraps(method)
+    def run_in_context(self, *args, **kwargs):
+        with self.context.activate():
+            return method(self, *args, **kwargs)
+
+    return run_in_context
+
+
+def set_process_args(args: Namespace) -> None:
+    """Set the process wide args (or the args of the context being built by AnalysisContext.from_argv())."""
+    parsing_context = _parsing_context.get()
+
+    if parsing_context is not None:
+        parsing_context._args = args
+        return
+
+    with _install_lock:
+        object.__setattr__(_PROCESS_ARGS, 'process_args', args)
+        YaralyzerConfig.args = PdfalyzerConfig._args = _PROCESS_ARGS if _installed else args
+
+
+def install() -> None:
+    """
+    Put the ContextArgs in YaralyzerConfig.args and PdfalyzerConfig._args, route yaralyzer's set_args() through
+    set_process_args(), and wrap the console's file in a ContextOutput. Safe to call more than once.
+    """
+    global _installed
+
+    with _install_lock:
+        if not _installed:
+            object.__setattr__(_PROCESS_ARGS, 'process_args', vars(YaralyzerConfig).get('args'))
+            YaralyzerConfig.set_args = classmethod(_set_yaralyzer_args)
+            YaralyzerConfig.args = PdfalyzerConfig._args = _PROCESS_ARGS
+            _installed = True
+
+        _install_output_proxy()
+
+
+class ContextArgs:
+    """
+    Stands in for the process wide args namespace in YaralyzerConfig.args and PdfalyzerConfig._args. Reads and
+    writes go to the active context's args or to process_args if no context (or a context without args) is active.
+    """
+    __slots__ = ('process_args',)
+
+    def __init__(self, process_args: Optional[Namespace]):
+        object.__setattr__(self, 'process_args', process_args)
+
+    @property
+    def __dict__(self) -> dict:
+        return vars(self._resolve())
+
+    def _resolve(self) -> Namespace:
+        context = _active_context.get()
+        return _process_args() if context is None or context._args is None else context._args
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resolve()
+
+    def __repr__(self) -> str:
+        return f"ContextArgs({self._resolve()!r})"
+
+
+class ContextOutput:
+    """Stands in for the console's file. Writes go to the active context's output if it has one."""
+    def __init__(self, file: Optional[IO[str]]):
+        """file is where output goes otherwise (None means sys.stdout at the time of the write, like rich)."""
+        self.file = file
+
+    def _resolve(self) -> IO[str]:
+        context = _active_context.get()
+
+        if context is not None and context.output is not None:
+            return context.output
+
+        return self.file or sys.stdout
+
+    def write(self, text: str) -> int:
+        return self._resolve().write(text)
+
+    def flush(self) -> None:
+        self._resolve().flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self._resolve(), name)
+
+
+def _install_output_proxy() -> None:
+    """(Re)install the ContextOutput in case something gave the console a new file since the last time."""
+    from yaralyzer.output.rich_console import console
+
+    with _install_lock:
+        if not isinstance(console._file, ContextOutput):
+            console.file = ContextOutput(console._file)
+
+
+def _process_args() -> Namespace:
+    """The process wide args. yaralyzer's defaults become the process wide args if nothing's been parsed."""
+    if _PROCESS_ARGS.process_args is None:
+        token = _parsing_context.set(None)
+
+        try:
+            YaralyzerConfig.set_default_args()
+
+            if not _installed:
+                set_process_args(vars(YaralyzerConfig)['args'])
+        finally:
+            _parsing_context.reset(token)
+
+    return _PROCESS_ARGS.process_args
+
+
+def _set_yaralyzer_args(_cls, args: Namespace) -> None:
+    """
+    Merge the YARALYZER_* env vars (which is how .yaralyzer files are applied) into args the way yaralyzer's own
+    set_args() does and then install them with set_process_args(). args is the namespace that was just parsed
+    for the process or for the context being built, so the merge never touches another context's args.
+    """
+    # yaralyzer's set_args() also assigns YaralyzerConfig.args; give it a stand in so the ContextArgs stays put
+    stand_in = SimpleNamespace(
+        _argparse_keys=YaralyzerConfig._argparse_keys,
+        ONLY_CLI_ARGS=YaralyzerConfig.ONLY_CLI_ARGS,
+        get_default_arg=YaralyzerConfig.get_default_arg
+    )
+
+    _yaralyzer_set_args(stand_in, args)
+    set_process_args(args)
+
+
+# yaralyzer's argument parser calls YaralyzerConfig.set_args(); once install() has run it's routed through
+# set_process_args() so the ContextArgs stays in place.
+_yaralyzer_set_args = YaralyzerConfig.set_args.__func__
+_PROCESS_ARGS = ContextArgs(None)
+PROCESS_CONTEXT = AnalysisContext()
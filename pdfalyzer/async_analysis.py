@@ -0,0 +1,228 @@
+"""
+asyncio API for services that want to analyze PDFs without blocking their event loop. Building the tree and
+scanning it are CPU bound so each analysis runs in a bounded thread pool and its findings are streamed back to the
+event loop as they're produced. The findings are the same dicts that --ndjson writes one line at a time.
+
+    async for event in analyze_events(pdf_path, sections=['tree', 'yara']):
+        ...
+
+    events = await analyze(pdf_path, sections=['fonts'], options=['--suppress-boms'])
+
+Each analysis has its own AnalysisContext (so its own args and output) and its own DecodeMemo. What's still shared
+by concurrent analyses is listed in pdfalyzer/analysis_context.py; notably the EncodingDetector thresholds set by
+--force-decode-threshold and --force-display-threshold are process wide. --max-memory and --memory-report are
+rejected because tracemalloc can't tell concurrent analyses apart.
+
+Typed events (see pdfalyzer/events.py) can be had by passing listeners; they're called in the analysis's thread
+as things are found, before the corresponding findings reach the event loop.
+
+At most max_queued_events findings wait for the consumer; after that the analysis waits for the consumer to
+catch up. If the task awaiting an analysis is cancelled (or stops iterating) the analysis stops at its next
+checkpoint, i.e. at the start of the next phase of building the tree or the next event, and its thread goes back
+to the pool.
+"""
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from os import cpu_count, devnull
+from threading import Event
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence
+
+from yaralyzer.util.logging import log
+
+from pdfalyzer.analysis_context import AnalysisContext, install
+from pdfalyzer.binary.decode_memo import DecodeMemo
+from pdfalyzer.binary.stream_data_store import DEFAULT_MAX_MEMORY_BYTES, StreamDataStore
+from pdfalyzer.config import ALL_STREAMS
+from pdfalyzer.events import EventListener
+from pdfalyzer.output.json_presenter import JsonPresenter
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.argument_parser import ALL_SECTIONS, DEFAULT_SECTIONS
+from pdfalyzer.util.exceptions import AnalysisCancelled
+
+DEFAULT_MAX_WORKERS = min(4, cpu_count() or 1)
+DEFAULT_MAX_QUEUED_EVENTS = 1000
+CANCELLATION_CHECK_SECONDS = 0.1  # How often an analysis waiting for the consumer checks if it's been abandoned
+_DONE = object()  # Queued after an analysis's last event
+
+_default_analyzer: Optional['AsyncAnalyzer'] = None
+
+
+class AsyncAnalyzer:
+    def __init__(
+            self,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            executor: Optional[Executor] = None,
+            max_queued_events: int = DEFAULT_MAX_QUEUED_EVENTS
+        ):
+        """
+        At most max_workers analyses run at once; any more wait for a free thread. Pass an executor to run the
+        analyses in a pool of your own instead (a process pool won't work; events are handed back in memory).
+        max_queued_events is how many of an analysis's events can wait for the consumer before the analysis waits.
+        """
+        self.executor = executor or ThreadPoolExecutor(max_workers, thread_name_prefix='pdfalyzer')
+        self.max_queued_events = max_queued_events
+        install()  # Analyses run side by side with their own args and output
+
+    async def analyze_events(
+            self,
+            pdf_path: str,
+            sections: Optional[Sequence[str]] = None,
+            options: Sequence[str] = (),
+            listeners: Sequence[EventListener] = ()
+        ) -> AsyncIterator[dict]:
+        """
+        Yield the events for sections (defaults to DEFAULT_SECTIONS) as the analysis produces them. options are
+        any other pdfalyze command line options. listeners are called (in the analysis's thread) with the typed
+        events. Errors in the analysis are raised when the events run out.
+        """
+        sections = _validate_sections(sections)
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued_events)
+        cancelled = Event()
+
+        def put_event(event: Any) -> None:
+            """Called in the analysis's thread. Waits while the queue is full unless the consumer goes away."""
+            _raise_if_cancelled(cancelled, pdf_path)
+            queued = asyncio.run_coroutine_threadsafe(events.put(event), loop)
+
+            while True:
+                try:
+                    return queued.result(timeout=CANCELLATION_CHECK_SECONDS)
+                except FutureTimeoutError:
+                    if cancelled.is_set():
+                        queued.cancel()
+                        _raise_if_cancelled(cancelled, pdf_path)
+
+        def run_analysis() -> None:
+            try:
+                _analyze(pdf_path, sections, list(options), listeners, put_event, cancelled)
+            finally:
+                if not cancelled.is_set():
+                    put_event(_DONE)
+
+        analysis = loop.run_in_executor(self.executor, run_analysis)
+
+        try:
+            while (event := await events.get()) is not _DONE:
+                yield event
+
+            await analysis
+        finally:
+            cancelled.set()
+            analysis.add_done_callback(_discard_result)
+
+    async def analyze(
+            self,
+            pdf_path: str,
+            sections: Optional[Sequence[str]] = None,
+            options: Sequence[str] = (),
+            listeners: Sequence[EventListener] = ()
+        ) -> List[dict]:
+        """All of the events from analyze_events() in one list."""
+        return [event async for event in self.analyze_events(pdf_path, sections, options, listeners)]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+def analyze_events(
+        pdf_path: str,
+        sections: Optional[Sequence[str]] = None,
+        options: Sequence[str] = (),
+        listeners: Sequence[EventListener] = ()
+    ) -> AsyncIterator[dict]:
+    """AsyncAnalyzer.analyze_events() on a process wide AsyncAnalyzer with DEFAULT_MAX_WORKERS threads."""
+    return default_analyzer().analyze_events(pdf_path, sections, options, listeners)
+
+
+async def analyze(
+        pdf_path: str,
+        sections: Optional[Sequence[str]] = None,
+        options: Sequence[str] = (),
+        listeners: Sequence[EventListener] = ()
+    ) -> List[dict]:
+    """AsyncAnalyzer.analyze() on a process wide AsyncAnalyzer with DEFAULT_MAX_WORKERS threads."""
+    return await default_analyzer().analyze(pdf_path, sections, options, listeners)
+
+
+def default_analyzer() -> AsyncAnalyzer:
+    global _default_analyzer
+
+    if _default_analyzer is None:
+        _default_analyzer = AsyncAnalyzer()
+
+    return _default_analyzer
+
+
+def _analyze(
+        pdf_path: str,
+        sections: List[str],
+        options: List[str],
+        listeners: Sequence[EventListener],
+        on_event: Callable[[dict], None],
+        cancelled: Event
+    ) -> None:
+    """Runs in the executor. Builds the tree and hands each event for sections to on_event."""
+    _raise_if_cancelled(cancelled, pdf_path)
+    argv = [pdf_path, *[f"--{section}" for section in sections], *options]
+
+    @contextmanager
+    def phase_checkpoint(_phase: str) -> Iterator[None]:
+        _raise_if_cancelled(cancelled, pdf_path)
+        yield
+
+    # Anything the analysis prints (e.g. tree verification warnings) is thrown away
+    with open(devnull, 'w') as null_output:
+        try:
+            context = AnalysisContext.from_argv(argv, null_output, listeners, DecodeMemo())
+        except SystemExit:
+            raise ValueError(f"Invalid options: {options}")
+
+        args = context.args
+        stream_idnum = None if args.streams == ALL_STREAMS else args.streams
+        stream_data_store = None
+
+        if args.max_memory or args.memory_report:
+            raise ValueError("--max-memory and --memory-report trace the whole process; use pdfalyze instead")
+        elif args.stream_memory is not None or args.spill_dir:
+            stream_memory = DEFAULT_MAX_MEMORY_BYTES if args.stream_memory is None else args.stream_memory
+            stream_data_store = StreamDataStore(stream_memory, args.spill_dir)
+
+        try:
+            with context.activate():
+                pdfalyzer = Pdfalyzer(
+                    pdf_path,
+                    phase_hook=phase_checkpoint,
+                    stream_data_store=stream_data_store,
+                    context=context
+                )
+
+                presenter = JsonPresenter(pdfalyzer, on_event=on_event)
+                presenter.write_sections(sections, stream_idnum, args.suppress_boms)
+        finally:
+            # Spilled stream data is deleted as soon as the analysis is done
+            if stream_data_store:
+                stream_data_store.close()
+
+
+def _validate_sections(sections: Optional[Sequence[str]]) -> List[str]:
+    sections = list(DEFAULT_SECTIONS if sections is None else sections)
+    invalid_sections = [section for section in sections if section not in ALL_SECTIONS]
+
+    if len(invalid_sections) > 0:
+        raise ValueError(f"Invalid sections {invalid_sections} (valid sections are {ALL_SECTIONS})")
+
+    return sections
+
+
+def _raise_if_cancelled(cancelled: Event, pdf_path: str) -> None:
+    if cancelled.is_set():
+        raise AnalysisCancelled(f"Analysis of '{pdf_path}' was cancelled")
+
+
+def _discard_result(future: asyncio.Future) -> None:
+    """Retrieve the outcome of an abandoned analysis so asyncio doesn't complain that nobody did."""
+    if not future.cancelled() and future.exception() is not None:
+        log.debug(f"Abandoned analysis ended with {future.exception()!r}")
@@ -3,7 +3,7 @@ Class for handling binary data - scanning through it for various suspicious patt
 various character encodings upon it to see what comes out.
 """
 from collections import defaultdict
-from typing import Iterator, Optional, Tuple
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
 
 from rich.panel import Panel
 from rich.text import Text
@@ -18,30 +18,52 @@ from yaralyzer.yara.yara_rule_builder import HEX, REGEX, safe_label
 from yaralyzer.yaralyzer import Yaralyzer
 from yaralyzer.util.logging import log
 
-from pdfalyzer.config import PdfalyzerConfig
+from pdfalyzer.analysis_context import AnalysisContext, current_context, in_analysis_context
+from pdfalyzer.binary.decode_memo import DecodeMemo, DecodeMemoKey, MemoizedDecoder, decode_memo_key
+from pdfalyzer.binary.encoding_pruner import PruningBytesDecoder, encodings_to_prune
+from pdfalyzer.binary.type1_font_decryption import decrypt_type1_font, font_file_lengths
 from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
 from pdfalyzer.detection.constants.binary_regexes import (BACKTICK,
      DANGEROUS_PDF_KEYS_TO_HUNT_ONLY_IN_FONTS, DANGEROUS_STRINGS, FRONTSLASH, GUILLEMET,
      QUOTE_PATTERNS)
+from pdfalyzer.events import DecodeResult
 from pdfalyzer.helpers.string_helper import generate_hyphen_line
 from pdfalyzer.output.layout import print_headline_panel, print_section_sub_subheader
+from pdfalyzer.output.tables.repeated_matches_table import RepeatedMatches, repeated_matches_table
 from pdfalyzer.util.adobe_strings import CONTENTS, CURRENTFILE_EEXEC, FONT_FILE_KEYS
 
 
 class BinaryScanner:
-    def __init__(self, _bytes: bytes, owner: PdfTreeNode, label: Optional[Text] = None):
-        """owner is an optional link back to the object containing this binary"""
+    def __init__(
+            self,
+            _bytes: bytes,
+            owner: PdfTreeNode,
+            label: Optional[Text] = None,
+            decode_memo: Optional[DecodeMemo] = None,
+            context: Optional[AnalysisContext] = None
+        ):
+        """
+        owner is an optional link back to the object containing this binary.
+        decode_memo is where force decode results are remembered (defaults to the context's memo or, if it doesn't
+        have one, a new memo for just this scanner).
+        context is the options and output of the analysis (defaults to the active context).
+        """
         self.bytes = _bytes
         self.label = label
         self.owner = owner
         self.stream_length = len(_bytes)
+        self.context = context or current_context()
+        decode_memo = self.context.decode_memo if decode_memo is None else decode_memo
+        self.decode_memo = DecodeMemo() if decode_memo is None else decode_memo
 
         if label is None and isinstance(owner, PdfTreeNode):
              self.label = owner.__rich__()
 
         self.suppression_notice_queue = []
         self.regex_extraction_stats = defaultdict(lambda: RegexMatchMetrics())
+        self.pruned_encodings: Dict[str, FrozenSet[str]] = {}  # Patterns whose encodings have been ranked
 
+    @in_analysis_context
     def check_for_dangerous_instructions(self) -> None:
         """Scan for all the strings in DANGEROUS_INSTRUCTIONS list and decode bytes around them"""
         subheader = "Scanning Binary For Anything That Could Be Described As 'Sus'..."
@@ -61,6 +83,7 @@ class BinaryScanner:
                 yaralyzer.highlight_style = 'bright_red bold'
                 self.process_yara_matches(yaralyzer, instruction, force=True)
 
+    @in_analysis_context
     def check_for_boms(self) -> None:
         """Check the binary data for BOMs"""
         print_section_sub_subheader("Scanning Binary for any BOMs...", style='BOM')
@@ -70,12 +93,13 @@ class BinaryScanner:
             yaralyzer.highlight_style = 'BOM'
             self.process_yara_matches(yaralyzer, bom_name, force=True)
 
+    @in_analysis_context
     def force_decode_quoted_bytes(self) -> None:
         """
         Find all strings matching QUOTE_PATTERNS (AKA between quote chars) and decode them with various encodings.
         The --quote-type arg will limit this decode to just one kind of quote.
         """
-        quote_selections = PdfalyzerConfig._args.extract_quoteds
+        quote_selections = self.context.args.extract_quoteds
 
         if len(quote_selections) == 0:
             headline = "Skipping extract/decode of quoted bytes (--extract-quoted is empty)"
@@ -90,7 +114,8 @@ class BinaryScanner:
             quote_pattern = QUOTE_PATTERNS[quote_type]
             print_section_sub_subheader(f"Forcing Decode of {quote_type.capitalize()} Quoted Strings", style=BYTES_NO_DIM)
             yaralyzer = self._quote_yaralyzer(quote_pattern, quote_type)
-            self.process_yara_matches(yaralyzer, f"{quote_type}_quoted")
+            sample_size = self.context.args.prune_encodings
+            self.process_yara_matches(yaralyzer, f"{quote_type}_quoted", sample_size=sample_size)
 
     # -------------------------------------------------------------------------------
     # These extraction iterators will iterate over all matches for a specific pattern.
@@ -108,9 +133,10 @@ class BinaryScanner:
         """Returns an interator over all strings surrounded by front_slashes (hint: regular expressions)"""
         return self._quote_yaralyzer(QUOTE_PATTERNS[FRONTSLASH], FRONTSLASH).match_iterator()
 
+    @in_analysis_context
     def print_stream_preview(self, num_bytes=None, title_suffix=None) -> None:
         """Print a preview showing the beginning and end of the embedded stream data"""
-        num_bytes = num_bytes or PdfalyzerConfig._args.preview_stream_length or console_width()
+        num_bytes = num_bytes or self.context.args.preview_stream_length or console_width()
         snipped_byte_count = self.stream_length - (num_bytes * 2)
         console.line()
 
@@ -133,8 +159,25 @@ class BinaryScanner:
         console.print(generate_hyphen_line(title="END " + title), style='dim')
         console.line()
 
-    def process_yara_matches(self, yaralyzer: Yaralyzer, pattern: str, force: bool = False) -> None:
-        """Decide whether to attempt to decode the matched bytes, track stats. force param ignores min/max length"""
+    @in_analysis_context
+    def process_yara_matches(
+            self,
+            yaralyzer: Yaralyzer,
+            pattern: str,
+            force: bool = False,
+            sample_size: Optional[int] = None
+        ) -> None:
+        """
+        Decide whether to attempt to decode the matched bytes, track stats. force param ignores min/max length.
+        Bytes that were already decoded (with the same surrounding bytes) are counted in the stats but not decoded
+        or printed again; they're summarized in a table at the end instead. If sample_size is given the encodings
+        are ranked after that many matches and the ones that rarely decode are pruned for the rest of this binary.
+        A DecodeResult event is emitted for each match that's decoded (or looked up in the memo).
+        """
+        repeats: Dict[DecodeMemoKey, RepeatedMatches] = {}
+        stats = self.regex_extraction_stats[pattern]
+        label = self.label.plain if self.label else ''
+
         for bytes_match, decoder in yaralyzer.match_iterator():
             log.debug(f"Trackings stats for match: {pattern}, bytes_match: {bytes_match}, is_decodable: {bytes_match.is_decodable()}")
 
@@ -143,13 +186,33 @@ class BinaryScanner:
                 self.suppression_notice_queue.append(bytes_match.suppression_notice())
                 continue
 
-            # Print out any queued suppressed notices before printing non suppressed matches
-            self._print_suppression_notices()
-            console.print(decoder)
-            self.regex_extraction_stats[pattern].tally_match(decoder) # TODO: This call must come after print(decoder)
+            pruned_encodings = self.pruned_encodings.get(pattern, frozenset())
+            memo_key = decode_memo_key(bytes_match, pruned_encodings)
+            memoized = self.decode_memo.get(memo_key)
+
+            if memoized is not None:
+                repeat = repeats.get(memo_key, RepeatedMatches(bytes_match.bytes, memoized.first_match, 0))
+                repeats[memo_key] = repeat._replace(count=repeat.count + 1)
+                memoized_decoder = MemoizedDecoder(bytes_match, memoized.decodings)
+                stats.tally_match(memoized_decoder)
+                self.context.emit(DecodeResult(self.owner, label, pattern, bytes_match, memoized.decodings, True))
+            else:
+                # Print out any queued suppressed notices before printing non suppressed matches
+                self._print_suppression_notices()
+                decoder = PruningBytesDecoder(decoder, pruned_encodings)
+                console.print(decoder)
+                stats.tally_match(decoder)
+                self.decode_memo.put(memo_key, decoder, f"{label}: {bytes_match}")
+                self.context.emit(DecodeResult(self.owner, label, pattern, bytes_match, decoder.decodings, False))
+
+            if sample_size and pattern not in self.pruned_encodings and stats.match_count >= sample_size:
+                self.pruned_encodings[pattern] = encodings_to_prune(stats, sample_size)
 
         self._print_suppression_notices()
 
+        if len(repeats) > 0:
+            console.print(repeated_matches_table(list(repeats.values())))
+
         # This check initializes the defaultdict for 'pattern'
         if self.regex_extraction_stats[pattern].match_count == 0:
             pass
@@ -158,6 +221,19 @@ class BinaryScanner:
         """Get the bytes after the 'eexec' demarcation line (if it appears). See Adobe docs for details."""
         return self.bytes.split(CURRENTFILE_EEXEC)[1] if CURRENTFILE_EEXEC in self.bytes else self.bytes
 
+    def eexec_decrypted_scanner(self) -> Optional['BinaryScanner']:
+        """
+        BinaryScanner for the plaintext of a Type 1 font's eexec encrypted section (with the charstrings also
+        decrypted) or None if there's no 'currentfile eexec' in the binary.
+        """
+        if CURRENTFILE_EEXEC not in self.bytes:
+            return None
+
+        stream_obj = self.owner.obj if isinstance(self.owner, PdfTreeNode) else getattr(self.owner, 'font_file', None)
+        plaintext = decrypt_type1_font(self.bytes, *font_file_lengths(stream_obj))
+        label = Text.assemble(self.label or '', (' (eexec decrypted)', 'bright_red'))
+        return BinaryScanner(plaintext, self.owner, label, self.decode_memo, self.context)
+
     def _quote_yaralyzer(self, quote_pattern: str, quote_type: str):
         """Helper method to build a Yaralyzer for a quote_pattern"""
         label = f"{quote_type}_Quoted"
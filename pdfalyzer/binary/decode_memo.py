@@ -0,0 +1,118 @@
+"""
+Memoization of force decode results. Content streams repeat the same quoted byte sequences (font names, operators,
+etc.) thousands of times and decoding each one with every encoding in ENCODINGS_TO_ATTEMPT is expensive. The
+first time a sequence is matched it's decoded and printed as usual; after that the outcome of each decoding attempt
+is looked up in a DecodeMemo so the stats still count every match but nothing is decoded or printed again. (chardet
+still looks at every match because Yaralyzer.match_iterator() builds a BytesDecoder for each one.)
+
+Results are keyed by a hash of the match and the bytes surrounding it (which is everything decoding looks at) along
+with the options that change what decoding does, so a memo kept across analyses with different options (e.g. by
+pdfalyzer_daemon --keep-decodes) never hands one analysis outcomes computed under another's options. Every
+BinaryScanner in a run shares its AnalysisContext's memo so repeats are found across all the streams in the run.
+Each Pdfalyzer gets a memo of its own unless its context was given one, so separate runs in one process don't see
+each other's decodes unless the caller shares a memo on purpose.
+"""
+import hashlib
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, FrozenSet, NamedTuple, Optional, Tuple
+
+from yaralyzer.bytes_match import BytesMatch
+from yaralyzer.config import YaralyzerConfig
+from yaralyzer.decoding.bytes_decoder import BytesDecoder
+from yaralyzer.encoding_detection.encoding_detector import EncodingDetector
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Options that change whether bytes are decoded or how the decoding attempts turn out
+DECODE_OPTIONS = [
+    'suppress_chardet',
+    'suppress_decoding_attempts',
+    'suppress_decodes_table',
+    'surrounding_bytes',
+    'min_decode_length',
+    'max_decode_length',
+    'min_chardet_bytes',
+    'min_chardet_table_confidence',
+]
+
+DecodeSettings = Tuple[Any, ...]
+DecodeMemoKey = Tuple[str, int, int, FrozenSet[str], DecodeSettings]
+
+
+class DecodeOutcome(NamedTuple):
+    """What RegexMatchMetrics.tally_match() needs to know about a DecodingAttempt."""
+    encoding: str
+    failed_to_decode: bool
+    was_force_decoded: bool
+
+
+class MemoizedDecode(NamedTuple):
+    first_match: str                        # Where the bytes were first matched and decoded
+    decodings: Tuple[DecodeOutcome, ...]
+
+
+class MemoizedDecoder(NamedTuple):
+    """Stands in for the BytesDecoder of a repeated match when its stats are tallied."""
+    bytes_match: BytesMatch
+    decodings: Tuple[DecodeOutcome, ...]
+
+
+class DecodeMemo:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Least recently used entries are forgotten once there are more than max_entries."""
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memo: OrderedDict = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key: DecodeMemoKey) -> Optional[MemoizedDecode]:
+        with self._lock:
+            memoized = self._memo.get(key)
+
+            if memoized is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._memo.move_to_end(key)
+
+            return memoized
+
+    def put(self, key: DecodeMemoKey, decoder: BytesDecoder, first_match: str) -> None:
+        """Remember the outcome of each of decoder's decoding attempts (call after the decoder has been printed)."""
+        decodings = tuple(DecodeOutcome(d.encoding, d.failed_to_decode, d.was_force_decoded) for d in decoder.decodings)
+
+        with self._lock:
+            self._memo[key] = MemoizedDecode(first_match, decodings)
+            self._memo.move_to_end(key)
+
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+
+def decode_memo_key(bytes_match: BytesMatch, pruned_encodings: FrozenSet[str] = frozenset()) -> DecodeMemoKey:
+    """
+    Hash of the bytes decoding looks at plus where in them the match is, which encodings weren't attempted, and
+    the current decode_settings().
+    """
+    surrounding_hash = hashlib.sha256(bytes_match.surrounding_bytes).hexdigest()
+    match_location = (bytes_match.highlight_start_idx, bytes_match.match_length)
+    return (surrounding_hash, *match_location, pruned_encodings, decode_settings())
+
+
+def decode_settings() -> DecodeSettings:
+    """The current analysis's DECODE_OPTIONS and the EncodingDetector's force decode/display thresholds."""
+    args = YaralyzerConfig.args
+    thresholds = (EncodingDetector.force_decode_threshold, EncodingDetector.force_display_threshold)
+    return (*[getattr(args, option, None) for option in DECODE_OPTIONS], *thresholds)
+
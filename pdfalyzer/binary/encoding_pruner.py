@@ -0,0 +1,154 @@
+"""
+Adaptive pruning of the encodings that forced decodes attempt. Every match is normally decoded with every encoding
+in ENCODINGS_TO_ATTEMPT but in a given stream some encodings fail (or only decode by force, i.e. garbage) for
+almost every match. Once a pattern has matched enough times in a stream the encodings are ranked by how often they
+decoded without being forced and the ones that almost never did are skipped for the rest of the stream (unless
+chardet thinks a particular match is likely to be in that encoding).
+"""
+from operator import attrgetter
+from typing import Dict, FrozenSet, List, NamedTuple
+
+from rich.align import Align
+from rich.console import Console, ConsoleOptions, NewLine, RenderResult
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+from yaralyzer.config import YaralyzerConfig
+from yaralyzer.decoding.bytes_decoder import SCORE_SCALER, WAS_DECODABLE_YES_NO, BytesDecoder
+from yaralyzer.decoding.decoding_attempt import DecodingAttempt
+from yaralyzer.encoding_detection.character_encodings import ENCODING, ENCODINGS_TO_ATTEMPT
+from yaralyzer.encoding_detection.encoding_assessment import EncodingAssessment
+from yaralyzer.helpers.rich_text_helper import CENTER
+from yaralyzer.output.decoding_attempts_table import (assessment_only_row, build_decoding_attempts_table,
+     decoding_table_row)
+from yaralyzer.output.regex_match_metrics import RegexMatchMetrics
+from yaralyzer.util.logging import log
+
+from pdfalyzer.config import DEFAULT_PRUNING_SAMPLE_SIZE
+
+MIN_EASY_DECODE_RATE = 0.05   # Encodings that decode fewer than this fraction of the sampled matches get pruned
+
+
+class EncodingRank(NamedTuple):
+    encoding: str
+    attempts: int
+    easy_decode_rate: float
+
+
+def rank_encodings(stats: RegexMatchMetrics) -> List[EncodingRank]:
+    """ENCODINGS_TO_ATTEMPT ranked by the fraction of the matches in stats they decoded without forcing."""
+    ranks = []
+
+    for encoding in ENCODINGS_TO_ATTEMPT.keys():
+        encoding_stats = stats.per_encoding_stats.get(encoding)
+
+        if encoding_stats is None:
+            continue
+
+        attempts = encoding_stats.match_count + encoding_stats.undecodable_count
+        easy_decodes = encoding_stats.match_count - encoding_stats.forced_decode_count
+        ranks.append(EncodingRank(encoding, attempts, easy_decodes / attempts if attempts else 0.0))
+
+    return sorted(ranks, key=attrgetter('easy_decode_rate'), reverse=True)
+
+
+def encodings_to_prune(stats: RegexMatchMetrics, sample_size: int = DEFAULT_PRUNING_SAMPLE_SIZE) -> FrozenSet[str]:
+    """
+    Encodings that were tried on at least sample_size matches and rarely decoded any of them without forcing.
+    The best ranked encoding is never pruned so there's always at least one decoding to look at.
+    """
+    ranks = rank_encodings(stats)
+    log.info(f"Encoding ranks after {stats.match_count} matches: {ranks}")
+
+    return frozenset(
+        rank.encoding for rank in ranks[1:]
+        if rank.attempts >= sample_size and rank.easy_decode_rate < MIN_EASY_DECODE_RATE
+    )
+
+
+class PruningBytesDecoder:
+    def __init__(self, decoder: BytesDecoder, pruned_encodings: FrozenSet[str]) -> None:
+        """
+        Renders like yaralyzer's BytesDecoder (which it's built from) but doesn't attempt pruned_encodings unless
+        chardet insists on them. Only public yaralyzer pieces are used: decoder's chardet assessments, DecodingAttempt,
+        and the decoding attempts table helpers (BytesDecoder has no hook for choosing the encodings).
+        """
+        self.bytes_match = decoder.bytes_match
+        self.label = decoder.label
+        self.encoding_detector = decoder.encoding_detector
+        self.pruned_encodings = pruned_encodings
+        self.decodings: List[DecodingAttempt] = []
+
+        if self.bytes_match.is_decodable() and not YaralyzerConfig.args.suppress_decoding_attempts:
+            self.decodings = self._attempt_decodings()
+
+    def __rich_console__(self, _console: Console, options: ConsoleOptions) -> RenderResult:
+        headline = Text('Found ', style='decode.subheading') + self.bytes_match.__rich__()
+        yield NewLine(2)
+        yield Align(Panel(headline, style='decode.subheading', expand=False), CENTER)
+
+        if not YaralyzerConfig.args.suppress_chardet:
+            yield NewLine()
+            yield Align(self.encoding_detector, CENTER)
+            yield NewLine()
+
+        if self.bytes_match.is_decodable():
+            yield self._decodings_table()
+        elif YaralyzerConfig.args.standalone_mode:
+            yield build_decoding_attempts_table(self.bytes_match)
+
+        yield NewLine()
+        yield Align(self.bytes_match.bytes_hashes_table(), CENTER, style='dim')
+
+    def _attempt_decodings(self) -> List[DecodingAttempt]:
+        """ENCODINGS_TO_ATTEMPT less the pruned ones plus whatever chardet is confident enough about."""
+        encodings = [encoding for encoding in ENCODINGS_TO_ATTEMPT.keys() if encoding not in self.pruned_encodings]
+        forced_decodes = self.encoding_detector.force_decode_assessments
+        encodings += [a.encoding for a in forced_decodes if a.encoding not in encodings]
+        undecoded_displays = self._undecoded_displays(encodings)
+
+        # chardet's top choice is always decoded
+        if len(undecoded_displays) > 0:
+            encodings.append(undecoded_displays[0].encoding)
+
+        return [DecodingAttempt(self.bytes_match, encoding) for encoding in encodings]
+
+    def _undecoded_displays(self, encodings: List[str]) -> List[EncodingAssessment]:
+        """Assessments over chardet's display threshold for encodings that aren't in encodings."""
+        return [a for a in self.encoding_detector.force_display_assessments if a.encoding not in encodings]
+
+    def _decodings_table(self) -> Table:
+        """Raw and hex rows, then the decodings and chardet's undecoded assessments sorted by score."""
+        table = build_decoding_attempts_table(self.bytes_match)
+        decoded_strings: Dict[str, str] = {}  # Decoded string => first encoding that decoded to it
+        rows = []
+
+        for decoding in self.decodings:
+            assessment = self.encoding_detector.get_encoding_assessment(decoding.encoding)
+            sort_score = assessment.confidence * SCORE_SCALER
+            plain_decoded_string = decoding.decoded_string.plain
+
+            if plain_decoded_string in decoded_strings:
+                display_text = Text('same output as ', style='color(66) dim italic')
+                display_text.append(decoded_strings[plain_decoded_string], style=ENCODING).append('...', style='white')
+            else:
+                decoded_strings[plain_decoded_string] = decoding.encoding
+                display_text = decoding.decoded_string
+
+            # Failures sort last, forced decodes a little below unforced ones
+            if decoding.failed_to_decode:
+                sort_score = sort_score * -1 - 100
+            elif decoding.was_force_decoded:
+                sort_score -= 10
+
+            was_forced = WAS_DECODABLE_YES_NO[int(decoding.was_force_decoded)]
+            rows.append(decoding_table_row(assessment, was_forced, display_text, sort_score))
+
+        decoded_encodings = [decoding.encoding for decoding in self.decodings]
+        undecoded_displays = self._undecoded_displays(decoded_encodings)
+        rows += [assessment_only_row(a, a.confidence * SCORE_SCALER) for a in undecoded_displays]
+
+        for row in sorted(rows, key=attrgetter('sort_score'), reverse=True):
+            table.add_row(*row[0:4])
+
+        return table
@@ -0,0 +1,144 @@
+"""
+Holds decoded stream data so the whole of it doesn't have to fit in memory. Up to max_memory_bytes of it is kept
+in memory; when that's exceeded the least recently used data is spilled to a file in a temporary directory and
+read back the next time it's needed (at which point it's the most recently used data in memory again). Data only
+has to be written to disk once; after that evicting it from memory just forgets it.
+
+Data bigger than the whole budget never enters the LRU: it's written to disk and each get() reads it back for the
+caller without evicting anything else. Data is read back as a bytes copy (not an mmap) because callers split it,
+hash it, hand it to YARA, and compare it to other bytes.
+
+PyPDF2 occasionally hands back decoded stream data as a str. It's budgeted by its length in characters and spilled
+as UTF-8; get() returns a str again.
+"""
+from collections import OrderedDict
+from os import path, remove
+from tempfile import TemporaryDirectory
+from threading import RLock
+from typing import Dict, Hashable, NamedTuple, Optional, Union
+
+from yaralyzer.util.logging import log
+
+from pdfalyzer.util.limits import DEFAULT_MAX_MEMORY_BYTES
+SPILL_DIR_PREFIX = 'pdfalyzer_stream_data_'
+
+StreamData = Union[bytes, str]  # PyPDF2 occasionally hands back decoded stream data as a str
+
+
+class SpilledData(NamedTuple):
+    spill_path: str
+    length: int      # Bytes on disk
+    is_str: bool     # True if the data was a str (written as UTF-8)
+
+
+class StreamDataStore:
+    def __init__(self, max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES, spill_dir: Optional[str] = None):
+        """spill_dir is where the temporary directory for spilled data is made (default is the system temp dir)."""
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0   # Size of the data currently in memory
+        self.spilled_bytes = 0  # Size of the data written to disk
+        self.spill_dir = spill_dir
+        self._in_memory: OrderedDict[Hashable, StreamData] = OrderedDict()  # Least recently used first
+        self._spilled: Dict[Hashable, SpilledData] = {}
+        self._tmp_dir: Optional[TemporaryDirectory] = None
+        self._spill_count = 0
+        self._lock = RLock()  # Streams are read from a thread pool by the StreamExtractor
+
+    def put(self, key: Hashable, data: StreamData) -> None:
+        """Store data under key (replacing whatever was there)."""
+        with self._lock:
+            self.discard(key)
+            self._remember(key, data)
+
+    def get(self, key: Hashable) -> Optional[StreamData]:
+        """Data stored under key (read back from disk if it was spilled) or None if there's nothing there."""
+        with self._lock:
+            if key in self._in_memory:
+                self._in_memory.move_to_end(key)
+                return self._in_memory[key]
+            elif key not in self._spilled:
+                return None
+
+            data = self._read_spilled(key)
+            self._remember(key, data)
+            return data
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the data stored under key (if any)."""
+        with self._lock:
+            if key in self._in_memory:
+                self.memory_bytes -= len(self._in_memory.pop(key))
+
+            if key in self._spilled:
+                spilled = self._spilled.pop(key)
+                self.spilled_bytes -= spilled.length
+                remove(spilled.spill_path)
+
+    def close(self) -> None:
+        """Delete the spilled data on disk and forget everything."""
+        with self._lock:
+            self._in_memory.clear()
+            self._spilled.clear()
+            self.memory_bytes = self.spilled_bytes = 0
+
+            if self._tmp_dir is not None:
+                self._tmp_dir.cleanup()
+                self._tmp_dir = None
+
+    def is_spilled(self, key: Hashable) -> bool:
+        return key in self._spilled
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_memory or key in self._spilled
+
+    def __len__(self) -> int:
+        return len(self._in_memory.keys() | self._spilled.keys())
+
+    def _remember(self, key: Hashable, data: StreamData) -> None:
+        """
+        Put data in memory as the most recently used and evict least recently used data until under budget.
+        Data bigger than the whole budget goes straight to disk instead (it's returned to the caller, not kept).
+        """
+        if len(data) > self.max_memory_bytes:
+            if key not in self._spilled:
+                self._write_spill_file(key, data)
+
+            return
+
+        self._in_memory[key] = data
+        self.memory_bytes += len(data)
+
+        # data fits in the budget so it's never evicted itself
+        while self.memory_bytes > self.max_memory_bytes:
+            self._spill(next(iter(self._in_memory)))
+
+    def _spill(self, key: Hashable) -> None:
+        data = self._in_memory.pop(key)
+        self.memory_bytes -= len(data)
+
+        if key not in self._spilled:
+            self._write_spill_file(key, data)
+
+    def _write_spill_file(self, key: Hashable, data: StreamData) -> None:
+        if self._tmp_dir is None:
+            self._tmp_dir = TemporaryDirectory(prefix=SPILL_DIR_PREFIX, dir=self.spill_dir)
+            log.info(f"Spilling decoded stream data to '{self._tmp_dir.name}'")
+
+        self._spill_count += 1
+        spill_path = path.join(self._tmp_dir.name, f"stream_{self._spill_count}.bin")
+        is_str = isinstance(data, str)
+        data = data.encode('utf-8', 'surrogatepass') if is_str else data
+
+        with open(spill_path, 'wb') as spill_file:
+            spill_file.write(data)
+
+        self._spilled[key] = SpilledData(spill_path, len(data), is_str)
+        self.spilled_bytes += len(data)
+
+    def _read_spilled(self, key: Hashable) -> StreamData:
+        spilled = self._spilled[key]
+
+        with open(spilled.spill_path, 'rb') as spill_file:
+            data = spill_file.read()
+
+        return data.decode('utf-8', 'surrogatepass') if spilled.is_str else data
@@ -0,0 +1,90 @@
+"""
+Write the streams embedded in a PDF to separate files along with a JSON manifest describing them.
+Works off the streams PyPDF2 already decoded while the Pdfalyzer was building the tree so the PDF
+is not re-parsed for each stream.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from typing import List, Optional
+
+from yaralyzer.output.file_hashes_table import compute_file_hashes
+from yaralyzer.util.logging import log
+
+from pdfalyzer.decorators.pdf_tree_node import DECODE_FAILURE_LEN, PdfTreeNode
+from pdfalyzer.helpers.pdf_object_helper import stream_filters
+from pdfalyzer.pdfalyzer import Pdfalyzer
+
+MANIFEST_SUFFIX = 'streams_manifest.json'
+RAW = 'raw'
+DECODED = 'decoded'
+
+
+class StreamExtractor:
+    def __init__(
+            self,
+            pdfalyzer: Pdfalyzer,
+            output_dir: str,
+            output_basename: Optional[str] = None,
+            include_raw: bool = False,
+            max_workers: Optional[int] = None
+        ):
+        """
+        include_raw: also write the stream bytes as they appear in the PDF (before /Filter decoding).
+        max_workers: size of the thread pool that hashes and writes the streams (None means python's default).
+        """
+        self.pdfalyzer = pdfalyzer
+        self.output_dir = output_dir
+        self.output_basename = output_basename or pdfalyzer.pdf_basename
+        self.include_raw = include_raw
+        self.max_workers = max_workers
+        self.manifest_path = path.join(output_dir, f"{self.output_basename}.{MANIFEST_SUFFIX}")
+
+    def extract_all_streams(self) -> List[dict]:
+        """Write every stream (decoded and optionally raw) and the manifest. Returns the manifest entries."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            manifest = list(executor.map(self._extract_stream, self.pdfalyzer.stream_nodes()))
+
+        with open(self.manifest_path, 'w') as manifest_file:
+            json.dump({'pdf': self.pdfalyzer.pdf_basename, 'streams': manifest}, manifest_file, indent=4)
+
+        log.info(f"Wrote manifest of {len(manifest)} streams to '{self.manifest_path}'")
+        return manifest
+
+    def stream_file_path(self, node: PdfTreeNode, kind: str = DECODED) -> str:
+        """e.g. 'some.pdf.object_44.bin' for decoded streams or 'some.pdf.object_44.raw.bin' for raw."""
+        extension = 'bin' if kind == DECODED else f"{RAW}.bin"
+        return path.join(self.output_dir, f"{self.output_basename}.object_{node.idnum}.{extension}")
+
+    def _extract_stream(self, node: PdfTreeNode) -> dict:
+        """Write one node's stream(s) to disk and build its manifest entry. Runs in the thread pool."""
+        entry = {
+            'idnum': node.idnum,
+            'label': node.label,
+            'address': node.tree_address(max_length=None),
+            'filters': stream_filters(node.obj),
+            'decode_failed': node.stream_length == DECODE_FAILURE_LEN,
+        }
+
+        if entry['decode_failed']:
+            log.warning(f"{node} stream could not be decoded; no decoded stream will be written")
+        else:
+            entry[DECODED] = self._write_bytes(node, DECODED, node.stream_data or b'')
+
+        if self.include_raw:
+            entry[RAW] = self._write_bytes(node, RAW, node.obj._data or b'')
+
+        return entry
+
+    def _write_bytes(self, node: PdfTreeNode, kind: str, _bytes: bytes) -> dict:
+        if not isinstance(_bytes, bytes):
+            log.warning(f"{kind} stream in {node} is {type(_bytes).__name__} not bytes; reencoding before write")
+            _bytes = _bytes.encode()
+
+        file_path = self.stream_file_path(node, kind)
+        log.debug(f"Writing {len(_bytes)} {kind} bytes from {node} to '{file_path}'")
+
+        with open(file_path, 'wb') as stream_file:
+            stream_file.write(_bytes)
+
+        return {'file': path.basename(file_path), **compute_file_hashes(_bytes)._asdict()}
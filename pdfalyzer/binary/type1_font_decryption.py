@@ -0,0 +1,227 @@
+"""
+Decryption of the eexec encrypted section of Type 1 fonts (and of the charstrings in it). See Adobe's "Type 1 Font
+Format" spec, chapter 7. Each plaintext byte is the ciphertext byte XORed with the high byte of a 16 bit key that's
+updated with every ciphertext byte:
+
+    plain = cipher ^ (r >> 8)
+    r = ((cipher + r) * C1 + C2) & 0xFFFF
+
+That's a sequential recurrence but the key sequence only depends on the ciphertext, and each step is the same affine
+map r => C1 * r + (C1 * cipher + C2) mod 2**16, so with numpy the ciphertext is split into ~sqrt(n) rows that are
+stepped through together and the whole key sequence takes ~2 * sqrt(n) Python level steps instead of one per byte
+(see _decrypt_numpy()). numpy is optional; without it (or for ciphertext shorter than NUMPY_MIN_BYTES) decryption
+falls back to pure Python.
+"""
+import re
+from binascii import unhexlify
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from yaralyzer.util.logging import log
+
+from pdfalyzer.util.adobe_strings import CURRENTFILE_EEXEC, FONT_LENGTHS
+
+EEXEC_KEY = 55665
+CHARSTRING_KEY = 4330
+C1 = 52845
+C2 = 22719
+DEFAULT_LEN_IV = 4       # Number of random bytes at the start of the plaintext that are thrown away
+NUMPY_MIN_BYTES = 4096   # Below this numpy's overhead outweighs the vectorization
+MIN_TRAILING_ZEROS = 64  # Fonts are supposed to have 512 of them after the encrypted section
+
+HEX_DIGITS = b'0123456789abcdefABCDEF'
+EEXEC_WHITESPACE = b' \t\r\n'
+CLEARTOMARK = b'cleartomark'
+LEN_IV_REGEX = re.compile(rb'/lenIV\s+(-?\d+)')
+# Charstrings and Subrs look like '/glyph 34 RD <34 binary bytes>' or 'dup 5 23 -| <23 binary bytes>'
+CHARSTRING_REGEX = re.compile(rb'(\d+)\s+(RD|-\|) ')
+
+
+def decrypt(ciphertext: bytes, key: int = EEXEC_KEY, discard: int = DEFAULT_LEN_IV) -> bytes:
+    """Decrypt ciphertext and drop the first 'discard' bytes of the plaintext."""
+    np = _numpy() if len(ciphertext) >= NUMPY_MIN_BYTES else None
+    plaintext = _decrypt_numpy(np, ciphertext, key) if np else _decrypt_python(ciphertext, key)
+    return plaintext[max(discard, 0):]
+
+
+def encrypt(plaintext: bytes, key: int = EEXEC_KEY, random_bytes: bytes = b'\x00' * DEFAULT_LEN_IV) -> bytes:
+    """Inverse of decrypt() (random_bytes are prepended to the plaintext). Mostly useful for building test fonts."""
+    r = key
+    ciphertext = bytearray()
+
+    for plain in random_bytes + plaintext:
+        cipher = plain ^ (r >> 8)
+        ciphertext.append(cipher)
+        r = ((cipher + r) * C1 + C2) & 0xFFFF
+
+    return bytes(ciphertext)
+
+
+def decrypt_type1_font(
+        font_bytes: bytes,
+        cleartext_length: Optional[int] = None,
+        encrypted_length: Optional[int] = None
+    ) -> Optional[bytes]:
+    """
+    The cleartext part of a Type 1 font followed by its decrypted eexec section with the charstrings in it also
+    decrypted, or None if there's no eexec section. cleartext_length and encrypted_length are a /FontFile's /Length1
+    and /Length2; without them the encrypted section's boundaries are found by looking for CURRENTFILE_EEXEC and
+    the zeros before CLEARTOMARK.
+    """
+    if CURRENTFILE_EEXEC not in font_bytes:
+        return None
+
+    eexec_idx = font_bytes.find(CURRENTFILE_EEXEC) + len(CURRENTFILE_EEXEC)
+
+    if cleartext_length is not None and eexec_idx <= cleartext_length < len(font_bytes):
+        start = cleartext_length
+    else:
+        start = eexec_idx
+
+        # Whitespace after 'eexec' isn't part of the ciphertext (unless it's binary and happens to start with some)
+        while start < len(font_bytes) and font_bytes[start] in EEXEC_WHITESPACE and start - eexec_idx < 2:
+            start += 1
+
+    if encrypted_length and start + encrypted_length <= len(font_bytes):
+        end = start + encrypted_length
+    else:
+        end = _encrypted_section_end(font_bytes, start)
+
+    ciphertext = font_bytes[start:end]
+
+    if _is_hex_encoded(ciphertext):
+        ciphertext = _unhex(ciphertext)
+
+    private_dict = decrypt(ciphertext, EEXEC_KEY)
+    return font_bytes[:start] + decrypt_charstrings(private_dict)
+
+
+def font_file_lengths(stream_obj) -> Tuple[Optional[int], Optional[int]]:
+    """/Length1 (cleartext) and /Length2 (encrypted) of a /FontFile stream object (None for any that are missing)."""
+    if not isinstance(stream_obj, dict):
+        return (None, None)
+
+    lengths = [stream_obj.get(length_key) for length_key in FONT_LENGTHS[:2]]
+    return tuple(int(length) if isinstance(length, int) else None for length in lengths)
+
+
+def decrypt_charstrings(private_dict: bytes) -> bytes:
+    """Replace each of the charstrings and Subrs in a decrypted private dict with its decrypted bytes."""
+    len_iv_match = LEN_IV_REGEX.search(private_dict)
+    len_iv = int(len_iv_match.group(1)) if len_iv_match else DEFAULT_LEN_IV
+
+    # A negative /lenIV means the charstrings aren't encrypted
+    if len_iv < 0:
+        return private_dict
+
+    decrypted = bytearray()
+    position = 0
+
+    while (match := CHARSTRING_REGEX.search(private_dict, position)) is not None:
+        charstring_start = match.end()
+        charstring_length = int(match.group(1))
+        charstring_end = charstring_start + charstring_length
+
+        if charstring_end > len(private_dict):
+            log.warning(f"Charstring at {charstring_start} is {charstring_length} bytes but private dict ends first")
+            break
+
+        charstring = decrypt(private_dict[charstring_start:charstring_end], CHARSTRING_KEY, len_iv)
+        decrypted += private_dict[position:match.start()]
+        decrypted += b'%d %s ' % (len(charstring), match.group(2))
+        decrypted += charstring
+        position = charstring_end
+
+    return bytes(decrypted + private_dict[position:])
+
+
+def _decrypt_python(ciphertext: bytes, key: int) -> bytes:
+    r = key
+    plaintext = bytearray(len(ciphertext))
+
+    for i, cipher in enumerate(ciphertext):
+        plaintext[i] = cipher ^ (r >> 8)
+        r = ((cipher + r) * C1 + C2) & 0xFFFF
+
+    return bytes(plaintext)
+
+
+def _decrypt_numpy(np, ciphertext: bytes, key: int) -> bytes:
+    """
+    Each step of the key recurrence is the affine map r => C1 * r + b[i] with b[i] = C1 * cipher[i] + C2. The
+    ciphertext is split into ~sqrt(n) rows of ~sqrt(n) bytes and the recurrence is run down all the rows at once
+    (one vectorized step per column) as if each row's starting key were 0. Then each row's real starting key is
+    carried over from the end of the previous row and folded back in as C1**(k + 1) * start_key. That's ~2 * sqrt(n)
+    Python level steps instead of n. 65535 * 65535 + 65535 < 2**32 so uint32 never overflows before it's masked.
+    """
+    length = len(ciphertext)
+    width = max(int(length ** 0.5), 1)
+    rows = -(-length // width)
+    cipher = np.zeros(rows * width, dtype=np.uint8)
+    cipher[:length] = np.frombuffer(ciphertext, dtype=np.uint8)
+    offsets = np.ascontiguousarray(((cipher.astype(np.uint32) * C1 + C2) & 0xFFFF).reshape(rows, width).T)
+    row_keys = np.empty_like(offsets)  # Key after each byte if each row started with a key of 0, column major
+    r = np.zeros(rows, dtype=np.uint32)
+
+    for column in range(width):
+        r = (r * C1 + offsets[column]) & 0xFFFF
+        row_keys[column] = r
+
+    # C1 ** (column + 1) is what a row's starting key is multiplied by after that column
+    powers = np.empty(width, dtype=np.uint32)
+    power = 1
+
+    for column in range(width):
+        power = (power * C1) & 0xFFFF
+        powers[column] = power
+
+    start_keys = np.empty(rows, dtype=np.uint32)
+    start_key = key
+    row_end_keys = row_keys[-1].tolist()
+
+    for row in range(rows):
+        start_keys[row] = start_key
+        start_key = (row_end_keys[row] + power * start_key) & 0xFFFF
+
+    keys_after = ((row_keys.T + powers * start_keys[:, None]) & 0xFFFF).ravel()
+    keys = np.empty(length, dtype=np.uint32)
+    keys[0] = key
+    keys[1:] = keys_after[:length - 1]
+    return (cipher[:length] ^ (keys >> 8).astype(np.uint8)).tobytes()
+
+
+def _encrypted_section_end(font_bytes: bytes, start: int) -> int:
+    """Fonts end with 512 ASCII zeros (with whitespace in between) and CLEARTOMARK; they aren't ciphertext."""
+    cleartomark_idx = font_bytes.rfind(CLEARTOMARK, start)
+
+    if cleartomark_idx == -1:
+        return len(font_bytes)
+
+    end = cleartomark_idx
+
+    while end > start and font_bytes[end - 1] in b'0' + EEXEC_WHITESPACE:
+        end -= 1
+
+    # A few '0's could just be the last bytes of binary ciphertext
+    return end if font_bytes.count(b'0', end, cleartomark_idx) >= MIN_TRAILING_ZEROS else cleartomark_idx
+
+
+def _is_hex_encoded(ciphertext: bytes) -> bool:
+    """Adobe's rule: the ciphertext is binary unless the first 4 bytes are all hex digits."""
+    return len(ciphertext) >= 4 and all(byte in HEX_DIGITS for byte in ciphertext[:4])
+
+
+def _unhex(ciphertext: bytes) -> bytes:
+    hex_digits = re.sub(rb'[^0-9a-fA-F]', b'', ciphertext)
+    return unhexlify(hex_digits[:len(hex_digits) - len(hex_digits) % 2])
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    """numpy if it's installed (imported the first time it's needed so it doesn't slow down startup)."""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        log.debug("numpy is not installed, eexec decryption will be done in pure Python")
+        return None
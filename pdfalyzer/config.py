@@ -6,6 +6,7 @@ from yaralyzer.config import YaralyzerConfig, is_env_var_set_and_not_false, is_i
 
 PDFALYZE = 'pdfalyze'
 ALL_STREAMS = -1
+DEFAULT_PRUNING_SAMPLE_SIZE = 25  # Matches of a pattern in a stream to decode with every encoding before pruning
 PYTEST_FLAG = 'INVOKED_BY_PYTEST'
 PROJECT_ROOT = path.join(str(importlib.resources.files('pdfalyzer')), pardir)
 
@@ -30,8 +31,8 @@ class PdfalyzerConfig:
 
     @classmethod
     def get_output_basepath(cls, export_method):
-        """Build the path to an output file - everything but the extension"""
-        export_type = export_method.__name__.removeprefix('print_')
+        """Build the path to an output file - everything but the extension. export_method can also be a string."""
+        export_type = export_method if isinstance(export_method, str) else export_method.__name__.removeprefix('print_')
         output_basename = f"{cls._args.output_basename}.{export_type}"
 
         if export_type == 'streams_analysis':
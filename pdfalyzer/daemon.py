@@ -0,0 +1,454 @@
+"""
+Long running analysis server. Pays the cost of python startup, imports, and YARA rule compilation once
+and then accepts analysis jobs as JSON either over a unix domain socket (one JSON object per line in each
+direction) or POSTed to a localhost HTTP endpoint.
+
+Jobs look like this (only 'file' is required):
+    {
+        "file": "/path/to/some.pdf",
+        "sections": ["tree", "fonts"],        # Defaults to the same sections pdfalyze defaults to
+        "format": "txt",                      # One of 'txt', 'html', 'svg', 'ndjson'
+        "options": ["--suppress-boms"]        # Other pdfalyze options (only the ones in JOB_OPTIONS)
+    }
+
+Responses have the file, format, elapsed time, and a 'sections' dict of section name => exported output
+(plus a 'memory_report' if '--memory-report' was one of the options). Failures are returned as {"error": "..."}
+along with the 'memory_report' if the failure was because of a '--max-memory' ceiling.
+
+Jobs can't write files, read YARA rules, or change process wide settings; options that would are rejected.
+HTTP requests must have an 'Authorization: Bearer <token>' header (the token is PDFALYZER_DAEMON_TOKEN or is
+generated and shown at startup) and requests with a foreign Host or Origin header (i.e. from a web page, perhaps
+via DNS rebinding) are refused. The unix socket is only accessible by the user that started the daemon.
+"""
+import hmac
+import json
+import secrets
+import socketserver
+import time
+from argparse import ArgumentError, Namespace
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from os import devnull, environ, path, remove, umask
+from threading import Condition, Lock
+from typing import Iterator, List, Optional
+
+from yaralyzer.output.file_export import YARALYZER_TERMINAL_THEME
+from yaralyzer.output.rich_console import console
+from yaralyzer.util.logging import log
+
+from pdfalyzer.analysis_context import AnalysisContext, install
+from pdfalyzer.binary.decode_memo import DecodeMemo
+from pdfalyzer.binary.stream_data_store import DEFAULT_MAX_MEMORY_BYTES, StreamDataStore
+from pdfalyzer.config import ALL_STREAMS
+from pdfalyzer.detection.yaralyzer_helper import compiled_yara_rules
+from pdfalyzer.output.json_presenter import JsonPresenter
+from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.argument_parser import ALL_SECTIONS, DEFAULT_SECTIONS, output_sections
+from pdfalyzer.util.exceptions import MemoryLimitExceeded
+from pdfalyzer.util.memory_accounting import MemoryAccountant
+
+ANALYZE_PATH = '/analyze'
+STATUS_PATH = '/status'
+NDJSON = 'ndjson'
+EXPORT_FORMATS = ['txt', 'html', 'svg', NDJSON]
+LOCALHOST = '127.0.0.1'
+TOKEN_ENV_VAR = 'PDFALYZER_DAEMON_TOKEN'
+SOCKET_UMASK = 0o177  # Unix socket is only readable and writable by the user running the daemon
+
+# The only pdfalyze options jobs can use. Anything that writes files (exports, --charmap-dir, --spill-dir), reads
+# other files (YARA rules), or changes process wide state (log level, console width, chardet thresholds) is out.
+JOB_OPTIONS = [
+    '--surrounding-bytes',
+    '--suppress-decodes-table',
+    '--suppress-decoding-attempts',
+    '--min-decode-length',
+    '--max-decode-length',
+    '--suppress-chardet',
+    '--min-chardet-bytes',
+    '--min-chardet-table-confidence',
+    '--max-match-length',
+    '--extract-quoted',
+    '--prune-encodings',
+    '--suppress-boms',
+    '--preview-stream-length',
+    '--max-depth',
+    '--max-children',
+    '--max-nodes',
+    '--tree-root',
+    '--max-charmap-entries',
+    '--max-charmap-rows',
+    '--max-memory',
+    '--memory-report',
+    '--stream-memory',
+]
+
+
+class AnalysisDaemon:
+    def __init__(self, cache_size: int = 32, keep_decodes: bool = False):
+        """
+        cache_size is the number of job results kept in memory for repeat requests. If keep_decodes is True
+        force decode results are remembered across jobs so bytes decoded by an earlier job aren't decoded again
+        (they're counted in the stats and listed as repeats of the earlier job's match instead).
+        """
+        self.cache_size = cache_size
+        self.keep_decodes = keep_decodes
+        self.decode_memo = DecodeMemo() if keep_decodes else None  # Otherwise each job gets a memo of its own
+        self.started_at = time.time()
+        self.jobs_run = 0
+        self._results: OrderedDict = OrderedDict()
+        self._results_lock = Lock()
+        # Each job has its own AnalysisContext but exports come from the console's shared record buffer and memory
+        # is traced for the whole process so those jobs run alone. ndjson jobs run concurrently with each other.
+        self._jobs_lock = SharedExclusiveLock()
+        self._null_output = open(devnull, 'w')
+        install()  # Jobs run side by side with their own args and output
+        compiled_yara_rules()
+
+    def run_job(self, job: dict) -> dict:
+        """Run an analysis job, returning either the results or an {'error': msg} dict. Never raises."""
+        try:
+            file_path, sections, export_format, options = self._validate_job(job)
+            stat = path.getmtime(file_path), path.getsize(file_path)
+            cache_key = (path.realpath(file_path), *stat, tuple(sections), export_format, tuple(options))
+
+            with self._results_lock:
+                if cache_key in self._results:
+                    log.info(f"Returning cached result for {job}")
+                    self._results.move_to_end(cache_key)
+                    return self._results[cache_key]
+
+            # Identical jobs that arrive together are both run; whichever finishes last is cached
+            result = self._analyze(file_path, sections, export_format, options)
+
+            with self._results_lock:
+                self._results[cache_key] = result
+
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+
+            return result
+        except (ArgumentError, OSError, ValueError) as e:
+            return {'error': f"{type(e).__name__}: {e}"}
+        except MemoryLimitExceeded as e:
+            return {'error': f"{type(e).__name__}: {e}", 'memory_report': e.report}
+        except SystemExit:
+            return {'error': f"Invalid options in job: {job}"}
+        except Exception as e:
+            log.exception(f"Job {job} failed")
+            return {'error': f"{type(e).__name__}: {e}"}
+
+    def status(self) -> dict:
+        status = {
+            'cached_results': len(self._results),
+            'jobs_run': self.jobs_run,
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+        }
+
+        if self.decode_memo is not None:
+            memo = self.decode_memo
+            status['decode_memo'] = {'entries': len(memo), 'hits': memo.hits, 'misses': memo.misses}
+
+        return status
+
+    def _analyze(self, file_path: str, sections: List[str], export_format: str, options: List[str]) -> dict:
+        """Build the Pdfalyzer and export each section."""
+        start_time = time.perf_counter()
+        argv = [file_path, *[f"--{section}" for section in sections], *options]
+        decode_memo = DecodeMemo() if self.decode_memo is None else self.decode_memo
+        # Nothing is shown on the daemon's own terminal; output is only recorded for export
+        context = AnalysisContext.from_argv(argv, output=self._null_output, decode_memo=decode_memo)
+        args = context.args
+        exports = {}
+        memory_accountant = MemoryAccountant(args.max_memory) if (args.max_memory or args.memory_report) else None
+        stream_data_store = None
+
+        if args.stream_memory is not None or args.spill_dir:
+            stream_memory = DEFAULT_MAX_MEMORY_BYTES if args.stream_memory is None else args.stream_memory
+            stream_data_store = StreamDataStore(stream_memory, args.spill_dir)
+
+        # Recording to the console and tracemalloc are process wide so those jobs need the daemon to themselves
+        if export_format == NDJSON and memory_accountant is None:
+            jobs_lock = self._jobs_lock.shared
+        else:
+            jobs_lock = self._jobs_lock.exclusive
+
+        with jobs_lock(), context.activate():
+            try:
+                pdfalyzer = Pdfalyzer(
+                    file_path,
+                    memory_accountant=memory_accountant,
+                    stream_data_store=stream_data_store,
+                    context=context
+                )
+                memory_report = memory_accountant.report(pdfalyzer) if args.memory_report else None
+
+                if memory_accountant:
+                    memory_accountant.stop()
+
+                if export_format == NDJSON:
+                    exports = self._ndjson_exports(pdfalyzer, sections, args)
+                    return self._result(file_path, export_format, exports, start_time, memory_report)
+
+                presenter = PdfalyzerPresenter(pdfalyzer, context)
+                console.record = True
+
+                for section, method in output_sections(args, presenter):
+                    method()
+                    exports[section] = self._export(export_format, f"{presenter.pdfalyzer.pdf_basename}.{section}")
+            finally:
+                console.record = True
+                console.export_text()  # Clears whatever the last section left in the recording
+                console.record = False
+
+                if memory_accountant:
+                    memory_accountant.stop()
+
+                # Spilled stream data is deleted as soon as the job is done
+                if stream_data_store:
+                    stream_data_store.close()
+
+        return self._result(file_path, export_format, exports, start_time, memory_report)
+
+    def _result(
+            self,
+            file_path: str,
+            export_format: str,
+            exports: dict,
+            start_time: float,
+            memory_report: Optional[dict] = None
+        ) -> dict:
+        with self._results_lock:
+            self.jobs_run += 1
+
+        result = {
+            'file': file_path,
+            'format': export_format,
+            'elapsed_seconds': round(time.perf_counter() - start_time, 4),
+            'sections': exports,
+        }
+
+        if memory_report is not None:
+            result['memory_report'] = memory_report
+
+        return result
+
+    @staticmethod
+    def _ndjson_exports(pdfalyzer: Pdfalyzer, sections: List[str], args: Namespace) -> dict:
+        """NDJSON events for each section (the rich and tree sections will have the same events)."""
+        stream_idnum = None if args.streams == ALL_STREAMS else args.streams
+        exports = {}
+
+        for section in sections:
+            ndjson = StringIO()
+            JsonPresenter(pdfalyzer, ndjson).write_sections([section], stream_idnum, args.suppress_boms)
+            exports[section] = ndjson.getvalue()
+
+        return exports
+
+    def _export(self, export_format: str, title: str) -> str:
+        """Export (and clear) whatever the console has recorded."""
+        if export_format == 'txt':
+            return console.export_text(styles=True)
+        elif export_format == 'html':
+            return console.export_html(theme=YARALYZER_TERMINAL_THEME, inline_styles=True)
+        else:
+            return console.export_svg(theme=YARALYZER_TERMINAL_THEME, title=title)
+
+    @staticmethod
+    def _validate_job(job: dict):
+        if not isinstance(job, dict) or 'file' not in job:
+            raise ValueError(f"Jobs must be JSON objects with a 'file' key, got {job}")
+
+        file_path = job['file']
+        sections = job.get('sections') or DEFAULT_SECTIONS
+        export_format = job.get('format', 'txt')
+        options = job.get('options', [])
+
+        if not path.isfile(file_path):
+            raise ValueError(f"'{file_path}' is not a file")
+        elif not set(sections).issubset(ALL_SECTIONS):
+            raise ValueError(f"Unknown sections {sorted(set(sections) - set(ALL_SECTIONS))}, choose from {ALL_SECTIONS}")
+        elif export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format '{export_format}', choose from {EXPORT_FORMATS}")
+        elif not (isinstance(options, list) and all(isinstance(option, str) for option in options)):
+            raise ValueError(f"'options' must be a list of strings, got {options}")
+
+        # Anything that looks like an option (not just the first token) so option values can't smuggle one in
+        forbidden_options = [
+            option for option in options
+            if option.startswith('-') and option.split('=')[0] not in JOB_OPTIONS
+        ]
+
+        if len(forbidden_options) > 0:
+            raise ValueError(f"Options {forbidden_options} aren't allowed in jobs (allowed: {JOB_OPTIONS})")
+
+        return file_path, sections, export_format, options
+
+
+class SharedExclusiveLock:
+    """Any number of shared holders or one exclusive holder. A waiting exclusive holder blocks new shared ones."""
+    def __init__(self):
+        self._condition = Condition()
+        self._shared_holders = 0
+        self._exclusive_held = False
+        self._exclusive_waiting = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: not (self._exclusive_held or self._exclusive_waiting))
+            self._shared_holders += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared_holders -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._condition:
+            self._exclusive_waiting += 1
+            self._condition.wait_for(lambda: not (self._exclusive_held or self._shared_holders))
+            self._exclusive_waiting -= 1
+            self._exclusive_held = True
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive_held = False
+                self._condition.notify_all()
+
+
+class UnixSocketJobHandler(socketserver.StreamRequestHandler):
+    """Newline delimited JSON in, newline delimited JSON out. Connections can send any number of jobs."""
+    def handle(self) -> None:
+        for line in self.rfile:
+            if len(line.strip()) == 0:
+                continue
+
+            try:
+                response = self.server.analysis_daemon.run_job(json.loads(line))
+            except json.JSONDecodeError as e:
+                response = {'error': f"Invalid JSON: {e}"}
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class HttpJobHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if not self._is_authorized():
+            return
+        elif self.path == STATUS_PATH:
+            self._respond(200, self.server.analysis_daemon.status())
+        else:
+            self._respond(404, {'error': f"GET {STATUS_PATH} or POST {ANALYZE_PATH}"})
+
+    def do_POST(self) -> None:
+        if not self._is_authorized():
+            return
+        elif self.path != ANALYZE_PATH:
+            self._respond(404, {'error': f"POST jobs to {ANALYZE_PATH}"})
+            return
+
+        try:
+            job = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        except json.JSONDecodeError as e:
+            self._respond(400, {'error': f"Invalid JSON: {e}"})
+            return
+
+        response = self.server.analysis_daemon.run_job(job)
+        self._respond(400 if 'error' in response else 200, response)
+
+    def log_message(self, format: str, *args) -> None:
+        log.info(format % args)
+
+    def _is_authorized(self) -> bool:
+        """Refuse (and respond to) requests without the token or from web pages. Returns False if refused."""
+        port = self.server.server_address[1]
+        local_hosts = [f"{LOCALHOST}:{port}", f"localhost:{port}"]
+        origin = self.headers.get('Origin')
+        authorization = self.headers.get('Authorization', '')
+
+        if self.headers.get('Host') not in local_hosts:
+            self._respond(403, {'error': f"Host header must be one of {local_hosts}"})
+        elif origin is not None and origin not in [f"http://{host}" for host in local_hosts]:
+            self._respond(403, {'error': f"Requests from '{origin}' are not allowed"})
+        elif not hmac.compare_digest(authorization.encode(), f"Bearer {self.server.token}".encode()):
+            self._respond(401, {'error': "Missing or wrong 'Authorization: Bearer <token>' header"})
+        else:
+            return True
+
+        return False
+
+    def _respond(self, status: int, response: dict) -> None:
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnixSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        """The socket is created with owner only permissions (chmod()ing it after bind() would leave a window)."""
+        old_umask = umask(SOCKET_UMASK)
+
+        try:
+            super().server_bind()
+        finally:
+            umask(old_umask)
+
+
+class HttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve_unix_socket(socket_path: str, analysis_daemon: Optional[AnalysisDaemon] = None) -> None:
+    """Serve jobs on a unix domain socket at socket_path until interrupted."""
+    if path.exists(socket_path):
+        log.warning(f"Removing stale socket at '{socket_path}'")
+        remove(socket_path)
+
+    try:
+        with UnixSocketServer(socket_path, UnixSocketJobHandler) as server:
+            server.analysis_daemon = analysis_daemon or AnalysisDaemon()
+            _serve(server, f"unix socket '{socket_path}'")
+    finally:
+        if path.exists(socket_path):
+            remove(socket_path)
+
+
+def serve_http(port: int, analysis_daemon: Optional[AnalysisDaemon] = None, token: Optional[str] = None) -> None:
+    """
+    Serve jobs POSTed to http://127.0.0.1:port/analyze until interrupted. Requests must have the token in an
+    'Authorization: Bearer <token>' header. token defaults to PDFALYZER_DAEMON_TOKEN or a random token.
+    """
+    token = token or environ.get(TOKEN_ENV_VAR)
+
+    if not token:
+        token = secrets.token_urlsafe(32)
+        console.print(f"No {TOKEN_ENV_VAR} set; clients must send 'Authorization: Bearer {token}'")
+
+    with HttpServer((LOCALHOST, port), HttpJobHandler) as server:
+        server.analysis_daemon = analysis_daemon or AnalysisDaemon()
+        server.token = token
+        _serve(server, f"http://{LOCALHOST}:{port}{ANALYZE_PATH}")
+
+
+def _serve(server: socketserver.BaseServer, description: str) -> None:
+    console.print(f"pdfalyzer daemon listening on {description}...", style='event.attn')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("pdfalyzer daemon shutting down.", style='event.lowpriority')
@@ -6,11 +6,11 @@ Child/parent relationships should be set using the add_child()/set_parent()
 methods and not set directly. (TODO: this could be done better with anytree
 hooks)
 """
-from typing import Callable, List, Optional, Set
+from typing import TYPE_CHECKING, Callable, List, Optional, Set, Union
 
 from anytree import NodeMixin, SymlinkNode
 from PyPDF2.errors import PdfReadError
-from PyPDF2.generic import IndirectObject, PdfObject, StreamObject
+from PyPDF2.generic import EncodedStreamObject, IndirectObject, PdfObject, StreamObject
 from rich.markup import escape
 from rich.text import Text
 from yaralyzer.helpers.string_helper import comma_join
@@ -23,6 +23,9 @@ from pdfalyzer.pdf_object_relationship import PdfObjectRelationship
 from pdfalyzer.util.adobe_strings import *
 from pdfalyzer.util.exceptions import PdfWalkError
 
+if TYPE_CHECKING:
+    from pdfalyzer.binary.stream_data_store import StreamDataStore
+
 DEFAULT_MAX_ADDRESS_LENGTH = 90
 DECODE_FAILURE_LEN = -1
 
@@ -36,6 +39,7 @@ class PdfTreeNode(NodeMixin, PdfObjectProperties):
         """
         PdfObjectProperties.__init__(self, obj, address, idnum)
         self.non_tree_relationships: List[PdfObjectRelationship] = []
+        self._stream_data_store: Optional['StreamDataStore'] = None
 
         if isinstance(obj, StreamObject):
             try:
@@ -124,6 +128,45 @@ class PdfTreeNode(NodeMixin, PdfObjectProperties):
         """Returns all nodes referenced from node.obj (see PdfObjectRelationship definition)"""
         return PdfObjectRelationship.build_node_references(from_node=self)
 
+    @property
+    def stream_data(self) -> Optional[Union[bytes, str]]:
+        """Decoded stream data (read back from the StreamDataStore if it's been moved there)."""
+        if self._stream_data_store is not None:
+            return self._stream_data_store.get(self.idnum)
+
+        return self._stream_data
+
+    @stream_data.setter
+    def stream_data(self, stream_data: Optional[Union[bytes, str]]) -> None:
+        if self._stream_data_store is not None:
+            self._stream_data_store.discard(self.idnum)
+            self._stream_data_store = None
+
+        self._stream_data = stream_data
+
+    def has_stream_data(self) -> bool:
+        """True if there's decoded stream data (without reading it back from the StreamDataStore)."""
+        return self._stream_data_store is not None or self._stream_data is not None
+
+    def store_stream_data(self, store: 'StreamDataStore') -> None:
+        """Move the decoded stream data (if any) into store, keyed by idnum, and forget PyPDF2's cached copy."""
+        if self._stream_data is None:
+            return
+
+        store.put(self.idnum, self._stream_data)
+        self._stream_data = None
+        self._stream_data_store = store
+        self._drop_decoded_self()
+
+    def drop_stream_data(self) -> None:
+        """Forget the decoded stream data (and PyPDF2's cached copy of it). stream_length is kept."""
+        self.stream_data = None
+        self._drop_decoded_self()
+
+    def _drop_decoded_self(self) -> None:
+        if isinstance(self.obj, EncodedStreamObject):
+            self.obj.decoded_self = None
+
     def contains_stream(self) -> bool:
         """Returns True for ContentStream, DecodedStream, and EncodedStream objects"""
         return isinstance(self.obj, StreamObject)
@@ -144,12 +187,19 @@ class PdfTreeNode(NodeMixin, PdfObjectProperties):
 
         return '...' + address[-max_length:][3:]
 
-    def address_of_this_node_in_other(self, from_node: 'PdfTreeNode') -> Optional[str]:
-        """Find the local address used in from_node to refer to this node"""
-        refs_to_this_node = [
-            ref for ref in from_node.references_to_other_nodes()
-            if ref.to_obj.idnum == self.idnum
-        ]
+    def address_of_this_node_in_other(
+            self,
+            from_node: 'PdfTreeNode',
+            from_node_references: Optional[List[PdfObjectRelationship]] = None
+        ) -> Optional[str]:
+        """
+        Find the local address used in from_node to refer to this node. Pass from_node_references if you
+        already have from_node.references_to_other_nodes() to avoid scanning from_node's object again.
+        """
+        if from_node_references is None:
+            from_node_references = from_node.references_to_other_nodes()
+
+        refs_to_this_node = [ref for ref in from_node_references if ref.to_obj.idnum == self.idnum]
 
         if len(refs_to_this_node) == 1:
             return refs_to_this_node[0].address
@@ -91,6 +91,7 @@ class PdfTreeVerifier:
                         placeable = False
 
                 if placeable:
-                    self.pdfalyzer.pdf_tree.add_child(self.pdfalyzer._build_or_find_node(ref, XREF_STREAM))
+                    with self.pdfalyzer._node_placement_events(idnum):
+                        self.pdfalyzer.pdf_tree.add_child(self.pdfalyzer._build_or_find_node(ref, XREF_STREAM))
             else:
                 log.warning(f"{XREF} Obj {idnum} not found in tree!")
@@ -0,0 +1,34 @@
+"""
+Names and YARA patterns for the kinds of quote chars whose contents can be force decoded. Kept apart from
+binary_regexes (which re-exports them) because the command line parser needs the names and nothing else.
+"""
+
+# Quote capture regexes
+DOUBLE_QUOTE = 'double_quote'
+SINGLE_QUOTE = 'single_quote'
+
+BACKSLASH = 'backslash'
+BACKTICK = 'backtick'
+BRACKET = 'bracket'
+CURLY_BRACKET = 'curly_bracket'
+DOUBLE_LESS_THAN = 'double_lessthan'
+ESCAPED_SINGLE = f"escaped_{SINGLE_QUOTE}"
+ESCAPED_DOUBLE = f"escaped_{DOUBLE_QUOTE}"
+FRONTSLASH = 'frontslash'
+GUILLEMET = 'guillemet'
+LESS_THAN = 'lessthan'
+PARENTHESES = 'parentheses'
+
+
+QUOTE_PATTERNS = {
+    BACKTICK: '`.+`',
+    BRACKET: '\\[.+\\]',  # { 91 [-] 93 }
+    CURLY_BRACKET: '{.+}',  # { 123 [-] 125 }
+    DOUBLE_LESS_THAN: '<<.+>>', # Hex { 60 60 [-] 62 62 }
+    ESCAPED_SINGLE: "\\'.+\\'",
+    ESCAPED_DOUBLE: '\\".+\\"',
+    FRONTSLASH: '/.+/',  # { 47 [-] 47 }
+    GUILLEMET: 'AB [-] BB',  # Guillemet quotes are not ANSI so require byte pattern
+    LESS_THAN: '<.+>',  # Hex { 60 [-] 62 }
+    PARENTHESES: '\\(.+\\)', # Hex { 28 [-] 29 }
+}
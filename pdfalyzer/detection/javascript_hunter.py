@@ -1,18 +1,156 @@
 """
-Count the Javascript (at least the 3+ letter words, record big matches
+Count the Javascript (at least the 3+ letter words) and score how likely things are to be Javascript.
+
+The keywords are compiled into a single regex shaped like a trie of the keywords (common prefixes are only matched
+once, e.g. 'final(?:ly)?') that only matches whole words, so 'for' in 'before' doesn't count. JavascriptHunter scores
+every node in the tree in one pass: the strings in the node's object (including /JS values) and its stream data.
 """
-from os import path
 import re
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Set, Tuple, Union
+
+from anytree import SymlinkNode
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
 
-from pdfalyzer.config import PdfalyzerConfig
 from pdfalyzer.detection.constants.javascript_reserved_keywords import JAVASCRIPT_RESERVED_KEYWORDS
 from pdfalyzer.helpers.string_helper import count_regex_matches_in_text
+from pdfalyzer.util.adobe_strings import JS
+
+if TYPE_CHECKING:
+    from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
+    from pdfalyzer.pdfalyzer import Pdfalyzer
+
+# Thresholds for calling something likely JavaScript (anything that's the value of a /JS key always is)
+LIKELY_JS_DENSITY = 0.1        # Fraction of the words that are keywords
+MIN_LIKELY_JS_KEYWORDS = 5
+MIN_LIKELY_JS_DISTINCT_KEYWORDS = 3
+
+JS_KEYWORDS_3_OR_MORE_LETTERS = sorted(set(kw.strip() for kw in JAVASCRIPT_RESERVED_KEYWORDS if len(kw.strip()) > 2))
+IDENTIFIER_CHARS = r'\w$'
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex that matches any of words, built from a trie of them so each shared prefix is only matched once."""
+    trie = {}
+
+    for word in words:
+        trie_node = trie
+
+        for char in word:
+            trie_node = trie_node.setdefault(char, {})
+
+        trie_node[''] = {}  # End of a word
+
+    return _trie_node_pattern(trie)
+
+
+def _trie_node_pattern(trie_node: dict) -> str:
+    branches = [re.escape(char) + _trie_node_pattern(child) for char, child in sorted(trie_node.items()) if char]
+
+    if len(branches) == 0:
+        return ''
+    elif '' not in trie_node and len(branches) == 1:
+        return branches[0]
+
+    return '(?:' + '|'.join(branches) + ')' + ('?' if '' in trie_node else '')
+
+
+_NOT_AFTER_IDENTIFIER_CHAR = f"(?<![{IDENTIFIER_CHARS}])"
+_NOT_BEFORE_IDENTIFIER_CHAR = f"(?![{IDENTIFIER_CHARS}])"
+_KEYWORD_TRIE = _trie_pattern(JS_KEYWORDS_3_OR_MORE_LETTERS)
+_WHOLE_WORD_KEYWORDS = _NOT_AFTER_IDENTIFIER_CHAR + _KEYWORD_TRIE + _NOT_BEFORE_IDENTIFIER_CHAR
+_WORD = _NOT_AFTER_IDENTIFIER_CHAR + f"[A-Za-z_$][{IDENTIFIER_CHARS}]*"
+JS_KEYWORD_REGEX = re.compile(_WHOLE_WORD_KEYWORDS)
+JS_KEYWORD_BYTES_REGEX = re.compile(_WHOLE_WORD_KEYWORDS.encode())
+WORD_REGEX = re.compile(_WORD)
+WORD_BYTES_REGEX = re.compile(_WORD.encode())
+
+
+class JavascriptScore(NamedTuple):
+    keyword_count: int = 0
+    word_count: int = 0
+    keywords: FrozenSet[str] = frozenset()  # Distinct keywords found
+    js_key: bool = False                     # True if this is (or contains) the value of a /JS key
+
+    @property
+    def density(self) -> float:
+        """Fraction of the words that are JavaScript keywords."""
+        return self.keyword_count / self.word_count if self.word_count else 0.0
+
+    @property
+    def is_likely_javascript(self) -> bool:
+        if self.js_key:
+            return True
 
-JS_KEYWORDS_3_OR_MORE_LETTERS = [kw for kw in JAVASCRIPT_RESERVED_KEYWORDS if len(kw) > 2]
-JS_KEYWORD_REGEX = re.compile('|'.join(JS_KEYWORDS_3_OR_MORE_LETTERS))
+        return self.keyword_count >= MIN_LIKELY_JS_KEYWORDS \
+            and len(self.keywords) >= MIN_LIKELY_JS_DISTINCT_KEYWORDS \
+            and self.density >= LIKELY_JS_DENSITY
+
+    def merged_with(self, other: 'JavascriptScore') -> 'JavascriptScore':
+        return JavascriptScore(
+            self.keyword_count + other.keyword_count,
+            self.word_count + other.word_count,
+            self.keywords | other.keywords,
+            self.js_key or other.js_key
+        )
+
+
+NO_JAVASCRIPT = JavascriptScore()
 
 
 class JavascriptHunter:
+    def __init__(self, pdfalyzer: 'Pdfalyzer'):
+        """Scores every node in pdfalyzer's tree immediately."""
+        self.scores: Dict[int, JavascriptScore] = {}
+        self.nodes: Dict[int, 'PdfTreeNode'] = {}
+        js_value_idnums: Set[int] = set()  # Objects that are the value of some /JS key
+
+        for node in pdfalyzer.node_iterator():
+            if isinstance(node, SymlinkNode):
+                continue
+
+            score = NO_JAVASCRIPT
+
+            for text, is_js_value in _strings_in(node.obj, js_value_idnums):
+                score = score.merged_with(self.score_text(text)._replace(js_key=is_js_value))
+
+            if node.contains_stream() and node.stream_data is not None:
+                score = score.merged_with(self.score_text(node.stream_data))
+
+            self.scores[node.idnum] = score
+            self.nodes[node.idnum] = node
+
+        for idnum in js_value_idnums.intersection(self.scores):
+            self.scores[idnum] = self.scores[idnum]._replace(js_key=True)
+
+    def score(self, node: 'PdfTreeNode') -> JavascriptScore:
+        return self.scores.get(node.idnum, NO_JAVASCRIPT)
+
+    def likely_javascript(self) -> List[Tuple['PdfTreeNode', JavascriptScore]]:
+        """Nodes that are likely JavaScript (and their scores), highest keyword density first."""
+        likely = [(self.nodes[idnum], score) for idnum, score in self.scores.items() if score.is_likely_javascript]
+        return sorted(likely, key=lambda node_score: (-node_score[1].density, node_score[0].idnum))
+
+    def prioritize(self, nodes: List['PdfTreeNode']) -> List['PdfTreeNode']:
+        """nodes with the likely JavaScript ones first (highest keyword density first), the rest in the same order."""
+        def priority(node: 'PdfTreeNode') -> Tuple[bool, float]:
+            score = self.score(node)
+            return (False, -score.density) if score.is_likely_javascript else (True, 0.0)
+
+        return sorted(nodes, key=priority)
+
+    @classmethod
+    def score_text(cls, text: Union[bytes, str]) -> JavascriptScore:
+        if isinstance(text, bytes):
+            keywords = JS_KEYWORD_BYTES_REGEX.findall(text)
+            distinct_keywords = frozenset(keyword.decode() for keyword in set(keywords))
+            word_count = len(WORD_BYTES_REGEX.findall(text))
+        else:
+            keywords = JS_KEYWORD_REGEX.findall(text)
+            distinct_keywords = frozenset(keywords)
+            word_count = len(WORD_REGEX.findall(text))
+
+        return JavascriptScore(len(keywords), word_count, distinct_keywords)
+
     @classmethod
     def count_js_keywords_in_text(cls, text: str) -> int:
         return count_regex_matches_in_text(JS_KEYWORD_REGEX, text)
@@ -20,3 +158,25 @@ class JavascriptHunter:
     @classmethod
     def js_keyword_matches(cls, text: str) -> [str]:
         return JS_KEYWORD_REGEX.findall(text)
+
+
+def _strings_in(
+        obj,
+        js_value_idnums: Set[int],
+        is_js_value: bool = False
+    ) -> Iterator[Tuple[Union[bytes, str], bool]]:
+    """
+    Yield (string, is_js_value) for every string in obj and the dicts and arrays inside it without following
+    references. The idnums of referenced objects that are the value of a /JS key are added to js_value_idnums.
+    """
+    if isinstance(obj, (bytes, str)) and not isinstance(obj, NameObject):
+        yield (obj, is_js_value)
+    elif isinstance(obj, DictionaryObject):
+        for key, value in obj.items():
+            if key == JS and isinstance(value, IndirectObject):
+                js_value_idnums.add(value.idnum)
+
+            yield from _strings_in(value, js_value_idnums, key == JS)
+    elif isinstance(obj, ArrayObject):
+        for value in obj:
+            yield from _strings_in(value, js_value_idnums, is_js_value)
@@ -0,0 +1,88 @@
+"""
+pdfid style triage: count suspicious PDF keywords and structural tokens in the raw bytes of a file
+without ever handing it to PyPDF2. Hex escaped names (e.g. '/J#61vaScript') are normalized before
+they are counted so obfuscation doesn't hide anything.
+"""
+import mmap
+import re
+from collections import defaultdict
+from os import path
+from typing import Dict, List
+
+from yaralyzer.util.logging import log
+
+from pdfalyzer.detection.constants.binary_regexes import DANGEROUS_PDF_KEYS_TO_HUNT_WITH_SLASH
+from pdfalyzer.util.adobe_strings import AA, DANGEROUS_PDF_KEYS
+
+# Tokens that describe the physical structure of the file (as opposed to its logical tree)
+STRUCTURAL_TOKENS = ['obj', 'endobj', 'stream', 'endstream', 'xref', 'trailer', 'startxref']
+
+# DANGEROUS_PDF_KEYS has a few dupes (e.g. /GoTo) so dedupe while preserving order
+TRIAGE_PDF_KEYS = list(dict.fromkeys(DANGEROUS_PDF_KEYS + DANGEROUS_PDF_KEYS_TO_HUNT_WITH_SLASH + [AA]))
+
+# Chars that terminate a PDF name (whitespace + delimiters, see PDF spec 7.2.2)
+PDF_NAME_TERMINATORS = b'\\x00\\t\\n\\x0c\\r ()<>\\[\\]{}/%'
+HEX_ESCAPE_REGEX = re.compile(b'#([0-9A-Fa-f]{2})')
+
+
+def _name_pattern(pdf_key: str) -> bytes:
+    """Regex that matches pdf_key with any combination of its chars written as '#xx' hex escapes."""
+    char_patterns = [
+        b'(?:' + re.escape(c.encode()) + b'|#' + _case_insensitive_hex(ord(c)) + b')'
+        for c in pdf_key[1:]
+    ]
+
+    return b'/' + b''.join(char_patterns) + b'(?![^' + PDF_NAME_TERMINATORS + b'])'
+
+
+def _case_insensitive_hex(char_ord: int) -> bytes:
+    return b''.join(f"[{c.upper()}{c.lower()}]".encode() if c.isalpha() else c.encode() for c in f"{char_ord:02x}")
+
+
+# One alternation for everything so the file only needs to be scanned once. Longest alternatives first.
+_KEY_PATTERNS = [_name_pattern(key) for key in sorted(TRIAGE_PDF_KEYS, key=len, reverse=True)]
+_TOKEN_PATTERN = b'(?<![A-Za-z])(?:' + b'|'.join(t.encode() for t in sorted(STRUCTURAL_TOKENS, key=len, reverse=True)) + b')(?![A-Za-z])'
+TRIAGE_REGEX = re.compile(b'|'.join(_KEY_PATTERNS + [_TOKEN_PATTERN]))
+
+
+class KeywordTriage:
+    def __init__(self, pdf_path: str):
+        """Scans the file at pdf_path immediately. No PDF parsing is done."""
+        self.pdf_path = pdf_path
+        self.pdf_basename = path.basename(pdf_path)
+        self.file_size = path.getsize(pdf_path)
+        self.keyword_counts: Dict[str, int] = defaultdict(int)
+        self.hex_escaped_counts: Dict[str, int] = defaultdict(int)
+        self.token_counts: Dict[str, int] = defaultdict(int)
+        self._scan()
+
+    def dangerous_keys_found(self) -> List[str]:
+        """Keys from TRIAGE_PDF_KEYS that appear in the file at least once."""
+        return [key for key in TRIAGE_PDF_KEYS if self.keyword_counts[key] > 0]
+
+    def is_suspicious(self) -> bool:
+        return len(self.dangerous_keys_found()) > 0
+
+    def _scan(self) -> None:
+        """Single pass over a memory mapped view of the file."""
+        if self.file_size == 0:
+            log.warning(f"'{self.pdf_path}' is empty; nothing to triage")
+            return
+
+        with open(self.pdf_path, 'rb') as pdf_file:
+            with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_bytes:
+                for match in TRIAGE_REGEX.finditer(pdf_bytes):
+                    self._tally(match.group())
+
+        log.info(f"Triage of '{self.pdf_basename}': {dict(self.keyword_counts)}, {dict(self.token_counts)}")
+
+    def _tally(self, token: bytes) -> None:
+        if not token.startswith(b'/'):
+            self.token_counts[token.decode()] += 1
+            return
+
+        if b'#' in token:
+            token = HEX_ESCAPE_REGEX.sub(lambda m: bytes.fromhex(m.group(1).decode()), token)
+            self.hex_escaped_counts[token.decode()] += 1
+
+        self.keyword_counts[token.decode()] += 1
@@ -1,9 +1,13 @@
 """
 Class to help with the pre-configured YARA rules in /yara.
 """
+from functools import lru_cache
 from importlib.resources import as_file, files
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
+import yara
+from yaralyzer.helpers.string_helper import comma_join
+from yaralyzer.util.logging import log
 from yaralyzer.yaralyzer import Yaralyzer
 
 YARA_RULES_DIR = files('pdfalyzer').joinpath('yara_rules')
@@ -24,10 +28,19 @@ def get_bytes_yaralyzer(scannable: bytes, label: str) -> Yaralyzer:
     return _build_yaralyzer(scannable, label)
 
 
-def _build_yaralyzer(scannable: Union[bytes, str], label: Optional[str] = None) -> Yaralyzer:
+@lru_cache(maxsize=1)
+def compiled_yara_rules() -> Tuple[yara.Rules, str]:
+    """Compile the bundled rules files once per process. Returns the rules and their label."""
     # TODO: ugh this sucks (handling to extract .yara files from a python pkg zip)
     with as_file(YARA_RULES_DIR.joinpath(YARA_RULES_FILES[0])) as yara0:
         with as_file(YARA_RULES_DIR.joinpath(YARA_RULES_FILES[1])) as yara1:
             with as_file(YARA_RULES_DIR.joinpath(YARA_RULES_FILES[2])) as yara2:
-                rules_paths = [str(y) for y in [yara0, yara1, yara2]]
-                return Yaralyzer.for_rules_files(rules_paths, scannable, label)
+                rules_paths = [yara0, yara1, yara2]
+                log.info(f"Compiling YARA rules in {[str(p) for p in rules_paths]}...")
+                rules = yara.compile(filepaths={p.name: str(p) for p in rules_paths})
+                return rules, comma_join(YARA_RULES_FILES)
+
+
+def _build_yaralyzer(scannable: Union[bytes, str], label: Optional[str] = None) -> Yaralyzer:
+    rules, rules_label = compiled_yara_rules()
+    return Yaralyzer(rules, rules_label, scannable, label)
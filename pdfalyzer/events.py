@@ -0,0 +1,122 @@
+"""
+Typed events emitted while an analysis runs, as opposed to the rich output printed once it's done. Listeners are
+any callables that take an event; they're attached to the AnalysisContext and called synchronously, in the
+analysis's thread, as soon as each thing is found. A listener that raises stops the analysis (the exception
+propagates out of e.g. Pdfalyzer()), which is how a service would quarantine a file on the first /JavaScript:
+
+    class Quarantine(AnalysisVisitor):
+        def on_dangerous_key_found(self, event: DangerousKeyFound) -> None:
+            if event.key == JAVASCRIPT:
+                raise Quarantined(event.node)
+
+    Pdfalyzer(pdf_path, context=AnalysisContext(listeners=[Quarantine()]))
+
+Events are emitted as they're discovered so listeners can aggregate without keeping the tree (or the console's
+record buffer) around. Events hold references to the live nodes, so listeners that outlive the analysis should
+copy what they need.
+
+When they're emitted:
+    NodeDiscovered     Walk phase, when a PDF object is wrapped in a PdfTreeNode (the trailer is the first one)
+    StreamDecoded      Right after NodeDiscovered for nodes with a stream (decode_failed if PyPDF2 couldn't)
+    DangerousKeyFound  Right after NodeDiscovered, once per DANGEROUS_PDF_KEYS key in the node's object (including
+                       dicts nested in it directly, like a catalog's /Names, but not ones it references)
+    NodePlaced         When a node gets its parent, during the walk or when indeterminate nodes are resolved
+    DecodeResult       Each force decoded match while binary streams are scanned (repeats are memoized decodes)
+    YaraMatchFound     Each YARA rule match, whether the scan was for --yara or --ndjson
+"""
+from typing import TYPE_CHECKING, Any, Callable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from pdfalyzer.util.adobe_strings import DANGEROUS_PDF_KEYS
+
+if TYPE_CHECKING:
+    from yaralyzer.bytes_match import BytesMatch
+    from yaralyzer.decoding.decoding_attempt import DecodingAttempt
+
+    from pdfalyzer.binary.decode_memo import DecodeOutcome
+    from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
+
+# Event types
+NODE_DISCOVERED = 'node_discovered'
+NODE_PLACED = 'node_placed'
+DANGEROUS_KEY_FOUND = 'dangerous_key_found'
+STREAM_DECODED = 'stream_decoded'
+DECODE_RESULT = 'decode_result'
+YARA_MATCH_FOUND = 'yara_match_found'
+EVENT_TYPES = [NODE_DISCOVERED, NODE_PLACED, DANGEROUS_KEY_FOUND, STREAM_DECODED, DECODE_RESULT, YARA_MATCH_FOUND]
+
+
+class NodeDiscovered(NamedTuple):
+    node: 'PdfTreeNode'
+    event_type = NODE_DISCOVERED
+
+
+class NodePlaced(NamedTuple):
+    node: 'PdfTreeNode'
+    parent: 'PdfTreeNode'
+    event_type = NODE_PLACED
+
+
+class DangerousKeyFound(NamedTuple):
+    node: 'PdfTreeNode'
+    key: str
+    event_type = DANGEROUS_KEY_FOUND
+
+
+class StreamDecoded(NamedTuple):
+    node: 'PdfTreeNode'
+    stream_length: int
+    decode_failed: bool
+    event_type = STREAM_DECODED
+
+
+class DecodeResult(NamedTuple):
+    owner: Any                       # The PdfTreeNode or FontInfo whose binary was scanned (can be None)
+    label: str                       # Label of the scanned binary
+    pattern: str                     # The pattern or quote type whose match was decoded
+    bytes_match: 'BytesMatch'
+    # DecodingAttempts (with the decoded strings) or, for repeats of bytes already decoded, their memoized outcomes
+    decodings: Sequence[Union['DecodingAttempt', 'DecodeOutcome']]
+    is_repeat: bool
+    event_type = DECODE_RESULT
+
+
+class YaraMatchFound(NamedTuple):
+    node: Optional['PdfTreeNode']    # None if the whole PDF was scanned
+    label: str                       # Label of the scanned bytes
+    rule: str
+    namespace: str
+    tags: List[str]
+    eexec_decrypted: bool = False    # True if the scanned bytes were a Type 1 font's decrypted eexec section
+    event_type = YARA_MATCH_FOUND
+
+
+AnalysisEvent = Union[NodeDiscovered, NodePlaced, DangerousKeyFound, StreamDecoded, DecodeResult, YaraMatchFound]
+EventListener = Callable[[AnalysisEvent], None]
+
+
+class AnalysisVisitor:
+    """
+    Listener that calls the on_<event_type>() method for each event (e.g. on_node_discovered()). Subclasses
+    only need to define the methods for the events they care about.
+    """
+    def __call__(self, event: AnalysisEvent) -> None:
+        handler = getattr(self, f"on_{event.event_type}", None)
+
+        if handler is not None:
+            handler(event)
+
+
+def dangerous_keys(obj: Any) -> Iterator[str]:
+    """
+    Yield the DANGEROUS_PDF_KEYS in obj and in the dicts and arrays nested in it, depth first. IndirectObjects
+    aren't followed; they're nodes of their own.
+    """
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in DANGEROUS_PDF_KEYS:
+                yield key
+
+            yield from dangerous_keys(value)
+    elif isinstance(obj, list):
+        for element in obj:
+            yield from dangerous_keys(element)
@@ -0,0 +1,127 @@
+"""
+Caches shared by all the FontInfo objects extracted from a PDF so each distinct font file is decoded once and each
+distinct /ToUnicode CMap is parsed once no matter how many /Font objects (on how many pages) use them. Both are keyed
+by a hash of the raw (still encoded) stream bytes so identical copies stored as separate PDF objects are also shared.
+
+FontCache.build_char_map() is PyPDF2's _cmap.build_char_map() put back together from the same PyPDF2 pieces but with
+the /ToUnicode parsing (prepare_cm() then process_cm_line() for every line) coming from the cache. Those pieces
+have had the signatures used here since PyPDF2 2.11 (the oldest version pyproject.toml allows).
+"""
+import hashlib
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+from PyPDF2._cmap import _default_fonts_space_width, compute_space_width, parse_encoding, prepare_cm, process_cm_line
+from PyPDF2.generic import DictionaryObject, StreamObject
+
+from pdfalyzer.util.adobe_strings import FILTER, SUBTYPE, TO_UNICODE
+
+DECODE_PARMS = '/DecodeParms'
+DEFAULT_SPACE_CODE = 32
+
+StreamData = Union[bytes, str]
+CharMap = Tuple[str, float, Union[str, Dict[int, str]], dict, DictionaryObject]  # Same as build_char_map()'s
+
+
+class ToUnicodeMap(NamedTuple):
+    prepared_cm: bytes         # prepare_cm() output
+    map_dict: dict             # Character code => unicode string (map_dict[-1] is the number of bytes per code)
+    space_code: Optional[int]  # Character code that maps to ' ' (if there is one)
+    int_entry: List[int]       # Character codes as ints
+
+
+class FontCache:
+    def __init__(self):
+        self.font_file_data: Dict[str, StreamData] = {}             # Content hash => decoded font file
+        self.font_file_store_keys: Dict[str, Hashable] = {}         # Content hash => StreamDataStore key
+        self.to_unicode_maps: Dict[Hashable, ToUnicodeMap] = {}     # Content hash (or name) => parsed CMap
+        self.font_file_decodes = 0
+        self.to_unicode_parses = 0
+
+    def decoded_font_file(self, font_file: StreamObject) -> StreamData:
+        """Decoded data of font_file, only decoded the first time a font file with the same contents is seen."""
+        content_hash = _content_hash(font_file)
+
+        if content_hash not in self.font_file_data:
+            self.font_file_data[content_hash] = font_file.get_data()
+            self.font_file_decodes += 1
+
+        return self.font_file_data[content_hash]
+
+    def font_file_store_key(self, font_file: StreamObject, store_key: Hashable) -> Hashable:
+        """StreamDataStore key for font_file: store_key unless a font file with the same contents was seen first."""
+        return self.font_file_store_keys.setdefault(_content_hash(font_file), store_key)
+
+    def to_unicode_map(self, font: DictionaryObject) -> Optional[ToUnicodeMap]:
+        """Parsed /ToUnicode CMap of font (or None if there isn't one)."""
+        if TO_UNICODE not in font:
+            return None
+
+        to_unicode = font[TO_UNICODE]
+        key = _content_hash(to_unicode) if isinstance(to_unicode, StreamObject) else str(to_unicode)
+
+        if key not in self.to_unicode_maps:
+            self.to_unicode_maps[key] = _parse_to_unicode(font)
+            self.to_unicode_parses += 1
+
+        return self.to_unicode_maps[key]
+
+    def build_char_map(self, font: DictionaryObject, space_width: float) -> CharMap:
+        """Same as PyPDF2's build_char_map() for font but the /ToUnicode map is parsed once and shared."""
+        font_type = font[SUBTYPE]
+        encoding, space_code = parse_encoding(font, DEFAULT_SPACE_CODE)
+        to_unicode_map = self.to_unicode_map(font)
+
+        if to_unicode_map is None:
+            map_dict, int_entry = {}, []
+        else:
+            map_dict, int_entry = to_unicode_map.map_dict, to_unicode_map.int_entry
+
+            if to_unicode_map.space_code is not None:
+                space_code = to_unicode_map.space_code
+
+        if encoding == '':
+            encoding = 'charmap' if (-1 not in map_dict or map_dict[-1] == 1) else 'utf-16-be'
+        elif isinstance(encoding, dict):
+            for x in int_entry:
+                if x <= 255:
+                    encoding[x] = chr(x)
+
+        space_width = _default_fonts_space_width.get(str(font.get('/BaseFont')), space_width)
+
+        if isinstance(space_code, str):
+            try:
+                space_code = space_code.encode('charmap')[0]
+            except Exception:
+                space_code_bytes = space_code.encode('utf-16-be')
+                space_code = space_code_bytes[0] + 256 * space_code_bytes[1]
+
+        space_width = compute_space_width(font, space_code, space_width)
+        return (font_type, float(space_width / 2), encoding, map_dict, font)
+
+
+def _parse_to_unicode(font: DictionaryObject) -> ToUnicodeMap:
+    """Same as PyPDF2's _cmap.parse_to_unicode() but also returns the prepare_cm() output it starts from."""
+    prepared_cm = prepare_cm(font)
+    map_dict = {}
+    int_entry = []
+    space_code = None
+    process_rg, process_char, multiline_rg = False, False, None
+
+    for line in prepared_cm.split(b"\n"):
+        process_rg, process_char, multiline_rg = process_cm_line(
+            line.strip(b" "), process_rg, process_char, multiline_rg, map_dict, int_entry
+        )
+
+    for code, value in map_dict.items():
+        if value == ' ':
+            space_code = code
+
+    return ToUnicodeMap(prepared_cm, map_dict, space_code, int_entry)
+
+
+def _content_hash(stream: StreamObject) -> str:
+    """Hash of a stream's raw data and the filters needed to decode it."""
+    raw_data = stream._data.encode() if isinstance(stream._data, str) else stream._data
+    hasher = hashlib.sha256(raw_data)
+    hasher.update(repr((stream.get(FILTER), stream.get(DECODE_PARMS))).encode())
+    return hasher.hexdigest()
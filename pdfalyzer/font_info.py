@@ -2,30 +2,47 @@
 Unify font information spread across a bunch of PdfObjects (Font, FontDescriptor,
 and FontFile) into a single class.
 """
+from functools import cached_property
+from typing import TYPE_CHECKING, Hashable, Optional, Set, Union
 
-from PyPDF2._cmap import build_char_map, prepare_cm
-from PyPDF2.generic import IndirectObject, PdfObject
+from PyPDF2.generic import EncodedStreamObject, IndirectObject, PdfObject
 from rich.text import Text
 from yaralyzer.output.rich_console import console
 from yaralyzer.util.logging import log
 
+from pdfalyzer.analysis_context import AnalysisContext, current_context, in_analysis_context
 from pdfalyzer.binary.binary_scanner import BinaryScanner
+from pdfalyzer.font_cache import CharMap, FontCache
 from pdfalyzer.output.character_mapping import print_character_mapping, print_prepared_charmap
 from pdfalyzer.output.tables.font_summary_table import font_summary_table
 from pdfalyzer.output.layout import print_section_subheader
+from pdfalyzer.output.render_limits import DEFAULT_CHARMAP_LIMITS, CharMapLimits
 from pdfalyzer.output.styles.node_colors import get_label_style
 from pdfalyzer.util.adobe_strings import (FONT, FONT_DESCRIPTOR, FONT_FILE, FONT_LENGTHS, RESOURCES,
-     SUBTYPE, TO_UNICODE, TYPE, W, WIDTHS)
+     SUBTYPE, TYPE, W, WIDTHS)
+
+if TYPE_CHECKING:
+    from pdfalyzer.binary.stream_data_store import StreamDataStore
 
 FONT_SECTION_PREVIEW_LEN = 30
 
 
 class FontInfo:
     @classmethod
-    def extract_font_infos(cls, obj_with_resources: PdfObject) -> ['FontInfo']:
+    def extract_font_infos(
+            cls,
+            obj_with_resources: PdfObject,
+            stream_data_store: Optional['StreamDataStore'] = None,
+            font_cache: Optional[FontCache] = None,
+            known_font_ids: Optional[Set[int]] = None,
+            context: Optional[AnalysisContext] = None
+        ) -> ['FontInfo']:
         """
         Extract all the fonts from a given /Resources PdfObject node.
         obj_with_resources must have '/Resources' because that's what _cmap module expects
+        If there's a stream_data_store the font files' decoded data is kept there instead of in the FontInfo.
+        Fonts whose IDs are in known_font_ids are skipped before anything is built; the IDs of the fonts that
+        are built are added to it. Pass the same font_cache and known_font_ids for every page of a PDF.
         """
         resources = obj_with_resources[RESOURCES]
 
@@ -39,14 +56,34 @@ class FontInfo:
             return []
 
         fonts = fonts.get_object()
-        return [cls.build(label, font, obj_with_resources) for label, font in fonts.items()]
+        font_cache = font_cache or FontCache()
+        known_font_ids = set() if known_font_ids is None else known_font_ids
+        font_infos = []
+
+        for label, font in fonts.items():
+            if font.idnum in known_font_ids:
+                continue
+
+            font_infos.append(cls.build(label, font, obj_with_resources, stream_data_store, font_cache, context))
+            known_font_ids.add(font.idnum)
+
+        return font_infos
 
     @classmethod
-    def build(cls, label: str, font_ref: IndirectObject, obj_with_resources) -> 'FontInfo':
+    def build(
+            cls,
+            label: str,
+            font_ref: IndirectObject,
+            obj_with_resources,
+            stream_data_store: Optional['StreamDataStore'] = None,
+            font_cache: Optional[FontCache] = None,
+            context: Optional[AnalysisContext] = None
+        ) -> 'FontInfo':
         """Build a FontInfo object from a IndirectObject ref to a /Font"""
         font_obj = font_ref.get_object()
         font_descriptor = None
         font_file = None
+        font_file_idnum = None
 
         if font_obj.get(TYPE) != FONT:
             raise TypeError(f"{TYPE} of {font_ref} is not {FONT}")
@@ -61,15 +98,52 @@ class FontInfo:
             elif len(font_file_keys) == 0:
                 log.info(f"No font_file found in {font_descriptor}")
             else:
-                font_file = font_descriptor[font_file_keys[0]].get_object()
+                font_file_ref = font_descriptor.raw_get(font_file_keys[0])  # [] would resolve the IndirectObject
+                font_file = font_file_ref.get_object()
+                font_file_idnum = getattr(font_file_ref, 'idnum', None)
 
-        return cls(label, font_ref.idnum, font_obj, font_descriptor, font_file, obj_with_resources)
+        return cls(
+            label,
+            font_ref.idnum,
+            font_obj,
+            font_descriptor,
+            font_file,
+            obj_with_resources,
+            stream_data_store,
+            font_file_idnum,
+            font_cache,
+            context
+        )
 
-    def __init__(self, label, idnum, font, font_descriptor, font_file, obj_with_resources):
+    def __init__(
+            self,
+            label,
+            idnum,
+            font,
+            font_descriptor,
+            font_file,
+            obj_with_resources,
+            stream_data_store: Optional['StreamDataStore'] = None,
+            font_file_idnum: Optional[int] = None,
+            font_cache: Optional[FontCache] = None,
+            context: Optional[AnalysisContext] = None
+        ):
+        """
+        If there's a stream_data_store the font file's decoded data is kept there under font_file_idnum, the same
+        key as the font file's PdfTreeNode, so it's shared with the node instead of being a second copy.
+        font_cache shares decoded font files and parsed /ToUnicode maps with the other fonts in the PDF.
+        context is the options and output of the analysis (defaults to the active context).
+        """
         self.label = label
         self.idnum = idnum
         self.font_file = font_file
         self.descriptor = font_descriptor
+        self._stream_data: Optional[Union[bytes, str]] = None
+        self._stream_data_store = stream_data_store
+        self._font_file_key: Hashable = font_file_idnum if font_file_idnum is not None else (FONT_FILE, idnum)
+        self._font_cache = font_cache or FontCache()
+        self._binary_scanner: Optional[BinaryScanner] = None
+        self.context = context or current_context()
 
         # /Font attributes
         self.font = font
@@ -97,30 +171,82 @@ class FontInfo:
             self.bounding_box = None
             self.flags = None
 
-        # /FontFile attributes
+        # /FontFile attributes. Decoding the font file and building the char maps waits until they're needed.
         if font_file is not None:
             self.lengths = [font_file[k] for k in FONT_LENGTHS if k in font_file]
-            self.stream_data = font_file.get_data()
             self.advertised_length = sum(self.lengths)
-            scanner_label = Text(self.display_title, get_label_style(FONT_FILE))
-            self.binary_scanner = BinaryScanner(self.stream_data, self, scanner_label)
-            self.prepared_char_map = prepare_cm(font) if TO_UNICODE in font else None
-            # TODO: shouldn't we be passing ALL the widths?
-            self._char_map = build_char_map(label, self.widths[0], obj_with_resources)
-
-            try:
-                self.character_mapping = self._char_map[3]
-            except (IndexError, TypeError):
-                log.warning(f"Exception trying to get character mapping for {self}")
-                self.character_mapping = []
         else:
             self.lengths = None
-            self.stream_data = None
             self.advertised_length = None
-            self.binary_scanner = None
-            self.prepared_char_map = None
-            self._char_map = None
-            self.character_mapping = None
+            self._stream_data_store = None
+
+    @property
+    def stream_data(self) -> Optional[Union[bytes, str]]:
+        """The font file's decoded data (decoded the first time it's needed or read back from the StreamDataStore)."""
+        if self.font_file is None:
+            return None
+        elif self._stream_data_store is None:
+            return self._load_stream_data() if self._stream_data is None else self._stream_data
+
+        stream_data = self._stream_data_store.get(self._stream_data_key)
+        return self._load_stream_data() if stream_data is None else stream_data
+
+    @property
+    def binary_scanner(self) -> Optional[BinaryScanner]:
+        """
+        BinaryScanner for the font file's data. When the data is in a StreamDataStore a new one is built each
+        time so the scanner doesn't keep the data in memory after it's done with it.
+        """
+        if self.font_file is None:
+            return None
+        elif self._binary_scanner is not None:
+            return self._binary_scanner
+
+        scanner_label = Text(self.display_title, get_label_style(FONT_FILE))
+        binary_scanner = BinaryScanner(self.stream_data, self, scanner_label, context=self.context)
+
+        if self._stream_data_store is None:
+            self._binary_scanner = binary_scanner
+
+        return binary_scanner
+
+    @cached_property
+    def stream_length(self) -> Optional[int]:
+        return None if self.font_file is None else len(self.stream_data)
+
+    @cached_property
+    def prepared_char_map(self) -> Optional[bytes]:
+        """The /ToUnicode CMap prepared for parsing by PyPDF2 (None if there's no font file or no /ToUnicode)."""
+        if self.font_file is None:
+            return None
+
+        to_unicode_map = self._font_cache.to_unicode_map(self.font)
+        return to_unicode_map.prepared_cm if to_unicode_map else None
+
+    @cached_property
+    def character_mapping(self) -> Optional[dict]:
+        if self._char_map is None:
+            return None
+
+        try:
+            return self._char_map[3]
+        except (IndexError, TypeError):
+            log.warning(f"Exception trying to get character mapping for {self}")
+            return []
+
+    @cached_property
+    def _char_map(self) -> Optional[CharMap]:
+        """PyPDF2 build_char_map() output (None if there's no font file)."""
+        if self.font_file is None:
+            return None
+
+        # TODO: shouldn't we be passing ALL the widths?
+        return self._font_cache.build_char_map(self.font, self.widths[0])
+
+    @cached_property
+    def _stream_data_key(self) -> Hashable:
+        """StreamDataStore key: the font file node's idnum unless a font file with the same contents got there first."""
+        return self._font_cache.font_file_store_key(self.font_file, self._font_file_key)
 
     def width_stats(self):
         if self.widths is None:
@@ -133,13 +259,14 @@ class FontInfo:
             'unique_count': len(set(self.widths)),
         }
 
-    def print_summary(self):
-        """Prints a table of info about the font drawn from the various PDF objects. quote_type of None means all."""
+    @in_analysis_context
+    def print_summary(self, charmap_limits: CharMapLimits = DEFAULT_CHARMAP_LIMITS):
+        """Prints a table of info about the font drawn from the various PDF objects and its character mappings."""
         print_section_subheader(str(self), style='font.title')
-        console.print(font_summary_table(self))
+        console.print(font_summary_table(self, charmap_limits.max_entries))
         console.line()
-        print_character_mapping(self)
-        print_prepared_charmap(self)
+        print_character_mapping(self, charmap_limits)
+        print_prepared_charmap(self, charmap_limits)
         console.line()
 
     # TODO: currently unused
@@ -157,5 +284,26 @@ class FontInfo:
 
         print(f"\nfinal bytes back from {self.stream_data.lengths[2]} + 10: {self.stream_data[-10 - -f.lengths[2]:]}")
 
+    def _load_stream_data(self) -> Union[bytes, str]:
+        """
+        Decode the font file (unless it's already in the StreamDataStore) and keep the data in the store if there
+        is one or in the FontInfo if there isn't.
+        """
+        if self._stream_data_store is None:
+            self._stream_data = self._font_cache.decoded_font_file(self.font_file)
+            return self._stream_data
+
+        stream_data = self._stream_data_store.get(self._stream_data_key)
+
+        # Also happens if the font file's node shared the key and its stream data was dropped
+        if stream_data is None:
+            stream_data = self.font_file.get_data()
+            self._stream_data_store.put(self._stream_data_key, stream_data)
+
+            if isinstance(self.font_file, EncodedStreamObject):
+                self.font_file.decoded_self = None
+
+        return stream_data
+
     def __str__(self) -> str:
         return self.display_title
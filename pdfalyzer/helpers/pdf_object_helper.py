@@ -16,6 +16,16 @@ def pdf_object_id(pdf_object) -> Optional[int]:
     return pdf_object.idnum if isinstance(pdf_object, IndirectObject) else None
 
 
+def stream_filters(pdf_object: PdfObject) -> List[str]:
+    """The /Filter (or /Filter array) applied to a stream as a list of strings, e.g. ['/FlateDecode']"""
+    filters = pdf_object.get(FILTER)
+
+    if isinstance(filters, list):
+        return [str(f) for f in filters]
+
+    return [str(filters)] if filters else []
+
+
 def does_list_have_any_references(_list) -> bool:
     """Return true if any element of _list is an IndirectObject."""
     return any(isinstance(item, IndirectObject) for item in _list)
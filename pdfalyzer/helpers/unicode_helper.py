@@ -0,0 +1,112 @@
+"""
+Unicode block lookups and checks for characters that have no business being the text a font's glyphs map to.
+"""
+import unicodedata
+from bisect import bisect_right
+from typing import Optional
+
+OTHER_BLOCK = 'Other'
+REPLACEMENT_CHARACTER = '�'
+HARMLESS_CONTROL_CHARS = '\t\n\r'
+
+# Unicode category => why a character in that category is suspicious as the output of a glyph
+SUSPICIOUS_CATEGORIES = {
+    'Cc': 'control character',
+    'Cf': 'invisible formatting character',
+    'Co': 'private use character',
+    'Cs': 'surrogate',
+    'Cn': 'unassigned code point',
+}
+
+# (first code point, last code point, name) of the blocks fonts are most likely to map to. Sorted by first code point.
+UNICODE_BLOCKS = [
+    (0x0000, 0x007F, 'Basic Latin'),
+    (0x0080, 0x00FF, 'Latin-1 Supplement'),
+    (0x0100, 0x017F, 'Latin Extended-A'),
+    (0x0180, 0x024F, 'Latin Extended-B'),
+    (0x0250, 0x02AF, 'IPA Extensions'),
+    (0x02B0, 0x02FF, 'Spacing Modifier Letters'),
+    (0x0300, 0x036F, 'Combining Diacritical Marks'),
+    (0x0370, 0x03FF, 'Greek and Coptic'),
+    (0x0400, 0x04FF, 'Cyrillic'),
+    (0x0500, 0x052F, 'Cyrillic Supplement'),
+    (0x0530, 0x058F, 'Armenian'),
+    (0x0590, 0x05FF, 'Hebrew'),
+    (0x0600, 0x06FF, 'Arabic'),
+    (0x0900, 0x097F, 'Devanagari'),
+    (0x0E00, 0x0E7F, 'Thai'),
+    (0x10A0, 0x10FF, 'Georgian'),
+    (0x1100, 0x11FF, 'Hangul Jamo'),
+    (0x1E00, 0x1EFF, 'Latin Extended Additional'),
+    (0x1F00, 0x1FFF, 'Greek Extended'),
+    (0x2000, 0x206F, 'General Punctuation'),
+    (0x2070, 0x209F, 'Superscripts and Subscripts'),
+    (0x20A0, 0x20CF, 'Currency Symbols'),
+    (0x2100, 0x214F, 'Letterlike Symbols'),
+    (0x2150, 0x218F, 'Number Forms'),
+    (0x2190, 0x21FF, 'Arrows'),
+    (0x2200, 0x22FF, 'Mathematical Operators'),
+    (0x2300, 0x23FF, 'Miscellaneous Technical'),
+    (0x2460, 0x24FF, 'Enclosed Alphanumerics'),
+    (0x2500, 0x257F, 'Box Drawing'),
+    (0x2580, 0x259F, 'Block Elements'),
+    (0x25A0, 0x25FF, 'Geometric Shapes'),
+    (0x2600, 0x26FF, 'Miscellaneous Symbols'),
+    (0x2700, 0x27BF, 'Dingbats'),
+    (0x2E80, 0x2EFF, 'CJK Radicals Supplement'),
+    (0x2F00, 0x2FDF, 'Kangxi Radicals'),
+    (0x3000, 0x303F, 'CJK Symbols and Punctuation'),
+    (0x3040, 0x309F, 'Hiragana'),
+    (0x30A0, 0x30FF, 'Katakana'),
+    (0x3100, 0x312F, 'Bopomofo'),
+    (0x3130, 0x318F, 'Hangul Compatibility Jamo'),
+    (0x3200, 0x32FF, 'Enclosed CJK Letters and Months'),
+    (0x3300, 0x33FF, 'CJK Compatibility'),
+    (0x3400, 0x4DBF, 'CJK Unified Ideographs Extension A'),
+    (0x4E00, 0x9FFF, 'CJK Unified Ideographs'),
+    (0xA000, 0xA48F, 'Yi Syllables'),
+    (0xAC00, 0xD7AF, 'Hangul Syllables'),
+    (0xD800, 0xDFFF, 'Surrogates'),
+    (0xE000, 0xF8FF, 'Private Use Area'),
+    (0xF900, 0xFAFF, 'CJK Compatibility Ideographs'),
+    (0xFB00, 0xFB4F, 'Alphabetic Presentation Forms'),
+    (0xFE30, 0xFE4F, 'CJK Compatibility Forms'),
+    (0xFF00, 0xFFEF, 'Halfwidth and Fullwidth Forms'),
+    (0xFFF0, 0xFFFF, 'Specials'),
+    (0x1F300, 0x1F5FF, 'Miscellaneous Symbols and Pictographs'),
+    (0x1F600, 0x1F64F, 'Emoticons'),
+    (0x20000, 0x2A6DF, 'CJK Unified Ideographs Extension B'),
+    (0xF0000, 0x10FFFF, 'Supplementary Private Use Area'),
+]
+
+_BLOCK_STARTS = [block[0] for block in UNICODE_BLOCKS]
+
+
+def unicode_block(char: str) -> str:
+    """Name of the Unicode block char is in (OTHER_BLOCK if it's not one of UNICODE_BLOCKS)."""
+    code_point = ord(char)
+    idx = bisect_right(_BLOCK_STARTS, code_point) - 1
+
+    if idx >= 0 and code_point <= UNICODE_BLOCKS[idx][1]:
+        return UNICODE_BLOCKS[idx][2]
+
+    return OTHER_BLOCK
+
+
+def suspicious_text_reason(text: str) -> Optional[str]:
+    """Why text is a suspicious thing for a glyph to map to (or None if it isn't)."""
+    if len(text) == 0:
+        return 'empty string'
+    elif REPLACEMENT_CHARACTER in text:
+        return 'replacement character'
+
+    for char in text:
+        if char in HARMLESS_CONTROL_CHARS:
+            continue
+
+        reason = SUSPICIOUS_CATEGORIES.get(unicodedata.category(char))
+
+        if reason is not None:
+            return reason
+
+    return None
@@ -1,8 +1,15 @@
 """
-Output formatting for font character mappings.
+Output formatting for font character mappings. CID fonts (CJK fonts in particular) can map tens of thousands of
+codes so instead of every entry what's shown is a summary (ranges of sequential codes, Unicode block coverage,
+suspicious and unmapped codes) along with a limited sample of entries. The complete mapping can be written to a file.
 """
+from collections import Counter
+from os import path
+from typing import List, NamedTuple, Optional, Tuple
+
 from rich.columns import Columns
 from rich.padding import Padding
+from rich.table import Table
 from rich.text import Text
 from yaralyzer.helpers.bytes_helper import print_bytes
 from yaralyzer.output.rich_console import console
@@ -10,45 +17,254 @@ from yaralyzer.util.logging import log
 
 from pdfalyzer.helpers.rich_text_helper import quoted_text
 from pdfalyzer.helpers.string_helper import pp
+from pdfalyzer.helpers.unicode_helper import suspicious_text_reason, unicode_block
 from pdfalyzer.output.layout import print_headline_panel, subheading_width
+from pdfalyzer.output.render_limits import DEFAULT_CHARMAP_LIMITS, CharMapLimits
 
 CHARMAP_TITLE = 'Character Mapping (As Extracted By PyPDF2)'
 CHARMAP_TITLE_PADDING = (1, 0, 0, 2)
 CHARMAP_PADDING = (0, 2, 0, 10)
+BYTES_PER_CODE_KEY = -1  # PyPDF2 stores the number of bytes per character code in the mapping under this key
+CHARMAP_FILE_SUFFIX = 'charmap.txt'
+MORE_ROWS_STYLE = 'grey50 italic'
+
+
+class CodeRange(NamedTuple):
+    first_code: int
+    last_code: int
+    first_text: Optional[str] = None  # Text the first code maps to (sequential ranges only)
+
+    @property
+    def size(self) -> int:
+        return self.last_code - self.first_code + 1
+
+
+class CharacterMappingSummary:
+    """Statistics about a character mapping. Building one is O(n log n) in the number of entries."""
+
+    def __init__(self, character_mapping: dict, first_and_last_char: Optional[List[Optional[int]]] = None):
+        self.bytes_per_code = character_mapping.get(BYTES_PER_CODE_KEY, 1)
+
+        # (code, key, text) sorted by code
+        self.entries: List[Tuple[int, str, str]] = sorted(
+            (_code_for_key(key), key, str(text))
+            for key, text in character_mapping.items()
+            if key != BYTES_PER_CODE_KEY
+        )
+
+        self.block_counts = Counter(unicode_block(text[0]) for _code, _key, text in self.entries if len(text) > 0)
+        self.suspicious_entries: List[Tuple[int, str, str]] = []  # (code, text, reason)
+        self.ranges: List[CodeRange] = []  # Runs of consecutive codes mapped to consecutive characters
+        text_counts = Counter(text for _code, _key, text in self.entries)
+        self.shared_text_count = sum(1 for count in text_counts.values() if count > 1)
+
+        for code, _key, text in self.entries:
+            reason = suspicious_text_reason(text)
+
+            if reason is not None:
+                self.suspicious_entries.append((code, text, reason))
+
+            if self.ranges and _continues_range(self.ranges[-1], code, text):
+                self.ranges[-1] = self.ranges[-1]._replace(last_code=code)
+            else:
+                self.ranges.append(CodeRange(code, code, text))
+
+        self._find_unmapped_codes(first_and_last_char)
+
+    def code_str(self, code: int) -> str:
+        """Hex string like the ones in CMaps, e.g. <0041> for code 65 if there are 2 bytes per code."""
+        return f"<{code:0{2 * self.bytes_per_code}X}>"
+
+    def _find_unmapped_codes(self, first_and_last_char: Optional[List[Optional[int]]]) -> None:
+        """Codes between /FirstChar and /LastChar (or the lowest and highest mapped codes) that aren't mapped."""
+        self.unmapped_ranges: List[CodeRange] = []
+        self.unmapped_count = 0
+
+        if len(self.entries) == 0:
+            self.code_span = None
+            return
 
+        if first_and_last_char and all(isinstance(c, int) for c in first_and_last_char):
+            self.code_span = CodeRange(*first_and_last_char)
+        else:
+            self.code_span = CodeRange(self.entries[0][0], self.entries[-1][0])
 
-def print_character_mapping(font: 'FontInfo') -> None:
-    """Prints the character mapping extracted by PyPDF2._charmap in tidy columns"""
+        next_code = self.code_span.first_code
+        end_of_span = self.code_span.last_code + 1
+
+        for code in [min(entry[0], end_of_span) for entry in self.entries] + [end_of_span]:
+            if code > next_code:
+                self.unmapped_ranges.append(CodeRange(next_code, code - 1))
+                self.unmapped_count += code - next_code
+
+            next_code = max(next_code, code + 1)
+
+
+def print_character_mapping(font: 'FontInfo', limits: CharMapLimits = DEFAULT_CHARMAP_LIMITS) -> None:
+    """Print a summary of the character mapping extracted by PyPDF2._charmap and a sample of its entries."""
     if font.character_mapping is None or len(font.character_mapping) == 0:
         log.info(f"No character map found in {font}")
         return
 
     print_headline_panel(f"{font} {CHARMAP_TITLE}", style='charmap.title')
-    charmap_entries = [_format_charmap_entry(k, v) for k, v in font.character_mapping.items()]
+    summary = CharacterMappingSummary(font.character_mapping, font.first_and_last_char)
+    console.print(Padding(character_mapping_summary_table(summary), CHARMAP_TITLE_PADDING))
+
+    for table in _character_mapping_detail_tables(summary, limits.max_rows):
+        console.print(Padding(table, CHARMAP_TITLE_PADDING))
+
+    sample = summary.entries[:limits.max_entries]
+
+    if len(sample) > 0:
+        charmap_entries = [_format_charmap_entry(key, text) for _code, key, text in sample]
+
+        charmap_columns = Columns(
+            charmap_entries,
+            column_first=True,
+            padding=CHARMAP_PADDING,
+            equal=True,
+            align='right')
 
-    charmap_columns = Columns(
-        charmap_entries,
-        column_first=True,
-        padding=CHARMAP_PADDING,
-        equal=True,
-        align='right')
+        console.print(Padding(charmap_columns, CHARMAP_TITLE_PADDING), width=subheading_width())
+
+    if len(summary.entries) > len(sample):
+        msg = f"Showing {len(sample)} of {len(summary.entries)} entries"
+        console.print(Padding(Text(msg, style=MORE_ROWS_STYLE), CHARMAP_TITLE_PADDING))
+
+    if limits.full_output_dir is not None:
+        charmap_path = write_character_mapping(font, summary, limits.full_output_dir)
+        msg = f"Complete mapping written to '{charmap_path}'"
+        console.print(Padding(Text(msg, style='dim'), CHARMAP_TITLE_PADDING))
 
-    console.print(Padding(charmap_columns, CHARMAP_TITLE_PADDING), width=subheading_width())
     console.line()
 
 
-def print_prepared_charmap(font: 'FontInfo'):
-    """Prints the prepared_charmap returned by PyPDF2"""
+def print_prepared_charmap(font: 'FontInfo', limits: CharMapLimits = DEFAULT_CHARMAP_LIMITS):
+    """Prints (the beginning of) the prepared_charmap returned by PyPDF2"""
     if font.prepared_char_map is None:
         log.info(f"No prepared_charmap found in {font}")
         return
 
     headline = f"{font} Adobe PostScript charmap prepared by PyPDF2"
     print_headline_panel(headline, style='charmap.prepared_title')
-    print_bytes(font.prepared_char_map, style='charmap.prepared')
+    print_bytes(font.prepared_char_map[:limits.max_prepared_bytes], style='charmap.prepared')
+    hidden_bytes = len(font.prepared_char_map) - limits.max_prepared_bytes
+
+    if hidden_bytes > 0:
+        console.print(f"{hidden_bytes} more bytes not shown", style=MORE_ROWS_STYLE)
+
     console.line()
 
 
+def character_mapping_summary_table(summary: CharacterMappingSummary) -> Table:
+    table = Table('', '', show_header=False)
+    table.columns[0].style = 'font.property'
+    table.columns[0].justify = 'right'
+    sequential_ranges = [r for r in summary.ranges if r.size > 1]
+
+    def add_table_row(name, value):
+        table.add_row(name, Text(str(value), style='charmap.char'))
+
+    add_table_row('entries', len(summary.entries))
+    add_table_row('bytes per code', summary.bytes_per_code)
+
+    if summary.code_span is not None:
+        add_table_row('code span', f"{summary.code_str(summary.code_span.first_code)} to " + \
+                                   summary.code_str(summary.code_span.last_code))
+
+    add_table_row('sequential ranges', f"{len(sequential_ranges)} covering " + \
+                                       f"{sum(r.size for r in sequential_ranges)} codes")
+    add_table_row('unicode blocks', len(summary.block_counts))
+    add_table_row('unmapped codes in span', summary.unmapped_count)
+    add_table_row('suspicious entries', len(summary.suspicious_entries))
+    add_table_row('texts mapped from >1 code', summary.shared_text_count)
+    return table
+
+
+def write_character_mapping(font: 'FontInfo', summary: CharacterMappingSummary, output_dir: str) -> str:
+    """Write every entry of font's character mapping and its prepared CMap to a file. Returns the file's path."""
+    charmap_path = path.join(output_dir, f"font_{font.idnum}_{CHARMAP_FILE_SUFFIX}")
+
+    with open(charmap_path, 'w', encoding='utf-8', errors='surrogateescape') as charmap_file:
+        charmap_file.write(f"{font} {CHARMAP_TITLE}\n\n")
+
+        for code, _key, text in summary.entries:
+            charmap_file.write(f"{summary.code_str(code)} => {text!r}\n")
+
+        if font.prepared_char_map is not None:
+            charmap_file.write(f"\n\nAdobe PostScript charmap prepared by PyPDF2\n\n")
+            charmap_file.write(font.prepared_char_map.decode('latin-1'))
+
+    return charmap_path
+
+
+def _character_mapping_detail_tables(summary: CharacterMappingSummary, max_rows: int) -> List[Table]:
+    """Tables of the biggest ranges, the Unicode blocks, and the suspicious and unmapped codes (if there are any)."""
+    tables = []
+    sequential_ranges = sorted([r for r in summary.ranges if r.size > 1], key=lambda r: (-r.size, r.first_code))
+
+    if len(sequential_ranges) > 0:
+        rows = [
+            [f"{summary.code_str(r.first_code)}-{summary.code_str(r.last_code)}", _unicode_range_str(r), str(r.size)]
+            for r in sequential_ranges
+        ]
+
+        tables.append(_detail_table('Largest Sequential Ranges', ['Codes', 'Unicode', 'Size'], rows, max_rows))
+
+    if len(summary.block_counts) > 0:
+        rows = [[block, str(count)] for block, count in summary.block_counts.most_common()]
+        tables.append(_detail_table('Unicode Blocks', ['Block', 'Entries'], rows, max_rows))
+
+    if len(summary.suspicious_entries) > 0:
+        rows = [[summary.code_str(code), repr(text), reason] for code, text, reason in summary.suspicious_entries]
+        tables.append(_detail_table('Suspicious Entries', ['Code', 'Text', 'Reason'], rows, max_rows))
+
+    if len(summary.unmapped_ranges) > 0:
+        rows = [
+            [f"{summary.code_str(r.first_code)}-{summary.code_str(r.last_code)}", str(r.size)]
+            for r in summary.unmapped_ranges
+        ]
+
+        tables.append(_detail_table('Unmapped Codes', ['Codes', 'Count'], rows, max_rows))
+
+    return tables
+
+
+def _detail_table(title: str, column_names: List[str], rows: List[List[str]], max_rows: int) -> Table:
+    table = Table(*column_names, title=title, title_style='charmap.title', header_style='font.property')
+
+    for row in rows[:max_rows]:
+        table.add_row(*row)
+
+    if len(rows) > max_rows:
+        table.add_row(Text(f"{len(rows) - max_rows} more…", style=MORE_ROWS_STYLE))
+
+    return table
+
+
+def _unicode_range_str(code_range: CodeRange) -> str:
+    first_char = ord(code_range.first_text)
+    return f"U+{first_char:04X}-U+{first_char + code_range.size - 1:04X}"
+
+
+def _continues_range(code_range: CodeRange, code: int, text: str) -> bool:
+    """True if code maps to the character after the one the last code in code_range maps to."""
+    if code != code_range.last_code + 1 or code_range.first_text is None:
+        return False
+    elif len(text) != 1 or len(code_range.first_text) != 1:
+        return False
+
+    return ord(text) == ord(code_range.first_text) + code_range.size
+
+
+def _code_for_key(key: str) -> int:
+    """PyPDF2 decodes multibyte character codes as UTF-16BE so they're usually (but not always) one character."""
+    if len(key) == 1:
+        return ord(key)
+
+    return int.from_bytes(key.encode('utf-16-be', 'surrogatepass'), 'big')
+
+
 def _format_charmap_entry(k: str, v: str) -> Text:
     key = pp.pformat(k)
 
@@ -0,0 +1,305 @@
+"""
+Self contained HTML report of the PDF tree that the browser renders lazily. Instead of the markup for every table
+in the rich tree view (which is what --export-html produces) the report ships the tree and each node's property
+table as compact JSON chunks embedded in <script type="application/json"> tags. A little bit of javascript builds
+the DOM for a node only when it's expanded and only parses a chunk of property tables when one of its nodes is
+opened, so file size and generation time scale with the data and not with rendered markup.
+
+Node records: [idnum, label, parent_idnum, address, pdf_class_name, stream_length, style_idx]
+Property chunks: {idnum: {"rows": [[key, value, class_name, is_dangerous], ...], "links": [[to_idnum, address], ...]}}
+"""
+import json
+from html import escape
+from typing import Dict, List
+
+from anytree import SymlinkNode
+from rich.text import Text
+from yaralyzer.output.file_export import YARALYZER_TERMINAL_THEME
+from yaralyzer.output.rich_console import console
+from yaralyzer.util.logging import log
+
+from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
+from pdfalyzer.helpers.pdf_object_helper import pypdf_class_name
+from pdfalyzer.output.styles.node_colors import get_label_style
+from pdfalyzer.output.tables.pdf_node_rich_table import DANGEROUS_ROW_STYLE, pdf_node_table_rows
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.adobe_strings import DANGEROUS_PDF_KEYS
+
+NODES_PER_CHUNK = 500
+NODES_CHUNK_ID = 'pdfalyzer-nodes'
+PROPERTIES_CHUNK_ID = 'pdfalyzer-properties'
+META_ID = 'pdfalyzer-meta'
+JSON_SCRIPT_ESCAPES = str.maketrans({'<': '\\u003c', '>': '\\u003e', '&': '\\u0026'})
+
+
+class HtmlReport:
+    def __init__(self, pdfalyzer: Pdfalyzer, nodes_per_chunk: int = NODES_PER_CHUNK):
+        self.pdfalyzer = pdfalyzer
+        self.nodes_per_chunk = nodes_per_chunk
+        self.chunk_count = 0
+        self.node_count = 0
+        # Label styles are converted to CSS once each and referred to by index
+        self._label_styles: Dict[str, int] = {}
+
+    def write(self, file_path: str) -> None:
+        """Write the report to file_path. Node records and property tables are written a chunk at a time."""
+        with open(file_path, 'wt', encoding='utf-8') as report:
+            report.write(_HTML_HEAD.format(title=escape(self.pdfalyzer.pdf_basename)))
+            chunk: List[PdfTreeNode] = []
+
+            for node in self.pdfalyzer.node_iterator():
+                if isinstance(node, SymlinkNode):
+                    continue
+
+                chunk.append(node)
+
+                if len(chunk) == self.nodes_per_chunk:
+                    self._write_chunk(report, chunk)
+                    chunk = []
+
+            if chunk:
+                self._write_chunk(report, chunk)
+
+            meta = {
+                'pdf': self.pdfalyzer.pdf_basename,
+                'hashes': self.pdfalyzer.pdf_bytes_info._asdict(),
+                'chunkCount': self.chunk_count,
+                'nodeCount': self.node_count,
+                'labelStyles': [self._css(style) for style in self._label_styles.keys()],
+            }
+
+            _write_json_script(report, META_ID, meta)
+            report.write(_HTML_TAIL)
+
+        log.info(f"Wrote {self.node_count} nodes in {self.chunk_count} chunks to HTML report '{file_path}'")
+
+    def _write_chunk(self, report, nodes: List[PdfTreeNode]) -> None:
+        node_records = [self._node_record(node) for node in nodes]
+        properties = {node.idnum: self._node_properties(node) for node in nodes}
+        _write_json_script(report, f"{NODES_CHUNK_ID}-{self.chunk_count}", node_records)
+        _write_json_script(report, f"{PROPERTIES_CHUNK_ID}-{self.chunk_count}", properties)
+        self.chunk_count += 1
+        self.node_count += len(nodes)
+
+    def _node_record(self, node: PdfTreeNode) -> list:
+        label_style = get_label_style(node.label)
+        style_idx = self._label_styles.setdefault(label_style, len(self._label_styles))
+
+        return [
+            node.idnum,
+            node.label,
+            node.parent.idnum if node.parent else None,
+            node.tree_address(max_length=None),
+            pypdf_class_name(node.obj),
+            node.stream_length if node.contains_stream() else None,
+            style_idx,
+        ]
+
+    def _node_properties(self, node: PdfTreeNode) -> dict:
+        rows = [
+            [_plain(row[0]), _plain(row[1]), _plain(row[2]) if len(row) > 2 else '', int(style == DANGEROUS_ROW_STYLE)]
+            for row, style in pdf_node_table_rows(node)
+        ]
+
+        links = [
+            [child.target.idnum, str(child.target.address_of_this_node_in_other(node))]
+            for child in node.children
+            if isinstance(child, SymlinkNode)
+        ]
+
+        return {'rows': rows, 'links': links}
+
+    @staticmethod
+    def _css(style: str) -> str:
+        return console.get_style(style).get_html_style(YARALYZER_TERMINAL_THEME)
+
+
+def _plain(cell) -> str:
+    return cell.plain if isinstance(cell, Text) else str(cell)
+
+
+def _write_json_script(report, element_id: str, data) -> None:
+    # Strings from the PDF could close the <script> tag or open a comment ('<!--<script') that swallows it, so
+    # '<', '>' and '&' are written as JSON escapes which the browser's JSON.parse() turns back into characters
+    json_data = json.dumps(data, separators=(',', ':'), default=str).translate(JSON_SCRIPT_ESCAPES)
+    report.write(f'<script type="application/json" id="{element_id}">{json_data}</script>\n')
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Pdfalyzer report: {title}</title>
+<style>
+body {{ background: #000; color: #fff; font-family: Menlo, 'DejaVu Sans Mono', consolas, monospace; font-size: 13px; }}
+#search {{ width: 40em; margin-bottom: 1em; background: #222; color: #fff; border: 1px solid #555; padding: 4px; }}
+.node {{ margin-left: 1.5em; }}
+.toggle {{ display: inline-block; width: 1.2em; cursor: pointer; color: #888; }}
+.label {{ cursor: pointer; }}
+.address {{ color: #888; margin-left: 0.5em; }}
+.klass {{ color: #6a6; font-style: italic; margin-left: 0.5em; }}
+.selected > .label {{ outline: 1px solid #ff0; }}
+table {{ border-collapse: collapse; margin: 4px 0 6px 2.7em; }}
+td {{ border: 1px solid #333; padding: 1px 6px; vertical-align: top; white-space: pre-wrap; word-break: break-all; }}
+td:first-child {{ color: #ccc; white-space: nowrap; }}
+td:last-child {{ color: #777; font-style: italic; }}
+tr.dangerous td {{ color: #f33; font-weight: bold; }}
+.link {{ margin-left: 2.7em; color: #888; cursor: pointer; }}
+.link.dangerous {{ color: #f33; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+<div id="hashes"></div>
+<input id="search" placeholder="Search by object ID, label, or address and hit enter (again for the next match)">
+<span id="search-status"></span>
+<div id="tree"></div>
+"""
+
+_DANGEROUS_KEYS_JS = json.dumps(DANGEROUS_PDF_KEYS)
+
+_HTML_TAIL = """<script>
+(function() {
+  const DANGEROUS_KEYS = new Set(""" + _DANGEROUS_KEYS_JS + """);
+  const meta = JSON.parse(document.getElementById('""" + META_ID + """').textContent);
+  const nodes = new Map();     // idnum => {record, chunk, children}
+  const propertyChunks = {};   // chunk number => parsed properties (parsed on first use)
+  const elements = new Map();  // idnum => rendered DOM element
+  let root = null;
+
+  for (let chunk = 0; chunk < meta.chunkCount; chunk++) {
+    const records = JSON.parse(document.getElementById('""" + NODES_CHUNK_ID + """-' + chunk).textContent);
+    records.forEach(record => nodes.set(record[0], {record: record, chunk: chunk, children: []}));
+  }
+
+  nodes.forEach(node => {
+    const parent = nodes.get(node.record[2]);
+    if (parent) { parent.children.push(node); } else if (root === null) { root = node; }
+  });
+
+  function properties(node) {
+    if (!(node.chunk in propertyChunks)) {
+      const element = document.getElementById('""" + PROPERTIES_CHUNK_ID + """-' + node.chunk);
+      propertyChunks[node.chunk] = JSON.parse(element.textContent);
+    }
+    return propertyChunks[node.chunk][node.record[0]];
+  }
+
+  function span(className, text, style) {
+    const element = document.createElement('span');
+    element.className = className;
+    element.textContent = text;
+    if (style) { element.setAttribute('style', style); }
+    return element;
+  }
+
+  function renderNode(node) {
+    const [idnum, label, , address, klass, streamLength, styleIdx] = node.record;
+    const element = document.createElement('div');
+    element.className = 'node';
+    const toggle = span('toggle', node.children.length > 0 ? '\\u25b8' : '\\u00b7');
+    const labelElement = span('label', idnum + '.' + label, meta.labelStyles[styleIdx]);
+    element.append(toggle, labelElement, span('address', '@' + address), span('klass', klass));
+    if (streamLength !== null) { element.append(span('address', streamLength + ' bytes')); }
+    toggle.onclick = () => toggleChildren(node);
+    labelElement.onclick = () => toggleTable(node);
+    elements.set(idnum, element);
+    return element;
+  }
+
+  function toggleChildren(node, forceOpen) {
+    const element = elements.get(node.record[0]);
+    let container = element.querySelector(':scope > .children');
+    if (node.children.length === 0) { return; }
+
+    if (container === null) {
+      container = document.createElement('div');
+      container.className = 'children';
+      node.children.forEach(child => container.append(renderNode(child)));
+      element.append(container);
+    } else if (!forceOpen) {
+      container.hidden = !container.hidden;
+    } else {
+      container.hidden = false;
+    }
+
+    element.querySelector(':scope > .toggle').textContent = container.hidden ? '\\u25b8' : '\\u25be';
+  }
+
+  function toggleTable(node) {
+    const element = elements.get(node.record[0]);
+    const existing = element.querySelector(':scope > .properties');
+    if (existing !== null) { existing.remove(); return; }
+
+    const props = properties(node);
+    const container = document.createElement('div');
+    container.className = 'properties';
+    const table = document.createElement('table');
+
+    props.rows.forEach(([key, value, klass, dangerous]) => {
+      const row = table.insertRow();
+      if (dangerous) { row.className = 'dangerous'; }
+      [key, value, klass].forEach(text => { row.insertCell().textContent = text; });
+    });
+
+    container.append(table);
+
+    props.links.forEach(([toIdnum, address]) => {
+      const target = nodes.get(toIdnum);
+      const dangerous = DANGEROUS_KEYS.has(address.replace(/\\[.*$/, '')) ? ' dangerous' : '';
+      const text = address + ' => ' + toIdnum + '.' + (target ? target.record[1] : '?') + ' (Non Child Reference)';
+      const link = span('link' + dangerous, text);
+      link.onclick = () => { if (target) { reveal(target); } };
+      container.append(document.createElement('br'), link);
+    });
+
+    element.insertBefore(container, element.querySelector(':scope > .children'));
+  }
+
+  function reveal(node) {
+    const ancestors = [];
+    for (let n = nodes.get(node.record[2]); n; n = nodes.get(n.record[2])) { ancestors.unshift(n); }
+    ancestors.forEach(ancestor => toggleChildren(ancestor, true));
+    document.querySelectorAll('.selected').forEach(e => e.classList.remove('selected'));
+    const element = elements.get(node.record[0]);
+    element.classList.add('selected');
+    element.scrollIntoView({block: 'center'});
+  }
+
+  let lastQuery = null;
+  let lastMatchIdx = -1;
+  const allNodes = Array.from(nodes.values());
+
+  document.getElementById('search').addEventListener('keydown', event => {
+    if (event.key !== 'Enter') { return; }
+    const query = event.target.value.trim().toLowerCase();
+    if (query !== lastQuery) { lastQuery = query; lastMatchIdx = -1; }
+
+    const matches = node => /^\\d+$/.test(query)
+      ? node.record[0] === parseInt(query)
+      : node.record[1].toLowerCase().includes(query) || node.record[3].toLowerCase().includes(query);
+
+    for (let i = 1; i <= allNodes.length; i++) {
+      const idx = (lastMatchIdx + i) % allNodes.length;
+
+      if (matches(allNodes[idx])) {
+        lastMatchIdx = idx;
+        reveal(allNodes[idx]);
+        document.getElementById('search-status').textContent = '';
+        return;
+      }
+    }
+
+    document.getElementById('search-status').textContent = 'No matches';
+  });
+
+  const hashes = meta.hashes;
+  document.getElementById('hashes').textContent =
+    `${meta.nodeCount} nodes, ${hashes.size} bytes, MD5: ${hashes.md5} SHA1: ${hashes.sha1} SHA256: ${hashes.sha256}`;
+  document.getElementById('tree').append(renderNode(root));
+  toggleChildren(root);
+})();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,272 @@
+"""
+Machine readable counterpart to PdfalyzerPresenter. Each section is written as a series of newline delimited
+JSON (NDJSON) events, one line per node / relationship / font / match / etc., as soon as each one is ready.
+Nothing is accumulated in memory so output of trees with a huge number of nodes starts immediately and memory
+use stays flat.
+
+Every event is a JSON object with an 'event' key (one of EVENT_TYPES) and a 'pdf' key (the file's basename).
+"""
+import json
+import sys
+from decimal import Decimal
+from typing import Any, Callable, Iterator, List, Optional, TextIO
+
+from anytree import SymlinkNode
+from yaralyzer.encoding_detection.character_encodings import BOMS
+from yaralyzer.output.file_hashes_table import compute_file_hashes
+
+from pdfalyzer.binary.type1_font_decryption import decrypt_type1_font, font_file_lengths
+from pdfalyzer.decorators.pdf_tree_node import DECODE_FAILURE_LEN, PdfTreeNode
+from pdfalyzer.detection.constants.binary_regexes import DANGEROUS_STRINGS
+from pdfalyzer.detection.javascript_hunter import JavascriptScore
+from pdfalyzer.detection.yaralyzer_helper import compiled_yara_rules
+from pdfalyzer.events import YaraMatchFound
+from pdfalyzer.font_info import FontInfo
+from pdfalyzer.helpers.pdf_object_helper import stream_filters
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.argument_parser import COUNTS, DOCINFO, FONTS, RICH, STREAMS, TREE, YARA
+
+# Event types
+DOCUMENT_INFO = 'document_info'
+HASHES = 'hashes'
+NODE = 'node'
+RELATIONSHIP = 'relationship'
+FONT = 'font'
+SUMMARY = 'summary'
+YARA_MATCH = 'yara_match'
+YARA_SCAN = 'yara_scan'
+STREAM = 'stream'
+EVENT_TYPES = [DOCUMENT_INFO, HASHES, NODE, RELATIONSHIP, FONT, SUMMARY, YARA_MATCH, YARA_SCAN, STREAM]
+
+
+class JsonPresenter:
+    def __init__(
+            self,
+            pdfalyzer: Pdfalyzer,
+            output: Optional[TextIO] = None,
+            on_event: Optional[Callable[[dict], None]] = None
+        ):
+        """
+        output is any writable text stream. Defaults to sys.stdout.
+        If on_event is given it's called with each event (the dict that the JSON line would have been parsed to)
+        instead of anything being written to output.
+        """
+        self.pdfalyzer = pdfalyzer
+        self.output = output or sys.stdout
+        self.on_event = on_event
+        self.events_written = 0
+
+    def write_sections(self, sections: List[str], stream_idnum: Optional[int] = None, suppress_boms: bool = False) -> None:
+        """
+        Write the events for the sections named in sections (tree and rich are the same data so only written once).
+        stream_idnum and suppress_boms are passed to write_streams_analysis().
+        """
+        if DOCINFO in sections:
+            self.write_document_info()
+        if TREE in sections or RICH in sections:
+            self.write_tree()
+            self.write_non_tree_relationships()
+        if FONTS in sections:
+            self.write_font_info()
+        if COUNTS in sections:
+            self.write_summary()
+        if YARA in sections:
+            self.write_yara_results()
+        if STREAMS in sections:
+            self.write_streams_analysis(stream_idnum, suppress_boms)
+
+    def write_document_info(self) -> None:
+        """Document info dict and the hashes of the whole file."""
+        document_info = self.pdfalyzer.pdf_reader.metadata or {}
+
+        self._write_event(
+            DOCUMENT_INFO,
+            info={str(k): v for k, v in document_info.items()},
+            pdf_size=self.pdfalyzer.pdf_size,
+            max_generation=self.pdfalyzer.max_generation,
+            stream_count=len(self.pdfalyzer.stream_nodes())
+        )
+
+        self._write_event(HASHES, **self.pdfalyzer.pdf_bytes_info._asdict())
+
+    def write_tree(self) -> None:
+        """One event per (non symlink) node in level order, i.e. parents are always written before children."""
+        for node in self._real_nodes():
+            self._write_event(NODE, **_node_properties(node))
+
+    def write_non_tree_relationships(self) -> None:
+        """One event per non parent/child relationship (the links shown as symlinks in the tree views)."""
+        for node in self._real_nodes():
+            tree_relationships = node.tree_relationships()
+
+            for relationship in node.non_tree_relationships:
+                if relationship.from_node in tree_relationships:
+                    continue
+
+                self._write_event(
+                    RELATIONSHIP,
+                    from_idnum=relationship.from_node.idnum,
+                    to_idnum=node.idnum,
+                    reference_key=relationship.reference_key,
+                    address=relationship.address,
+                    is_link=relationship.is_link,
+                    is_indeterminate=relationship.is_indeterminate
+                )
+
+    def write_font_info(self, font_idnum: Optional[int] = None) -> None:
+        for font_info in self.pdfalyzer.font_infos:
+            if font_idnum is None or font_idnum == font_info.idnum:
+                self._write_event(FONT, **_font_properties(font_info))
+
+    def write_summary(self) -> None:
+        self._write_event(SUMMARY, **self.pdfalyzer.tree_summary())
+
+    def write_yara_results(self) -> None:
+        """Scan the whole PDF and then each stream with the bundled rules. One event per scan, one per match."""
+        self._write_yara_scan(self.pdfalyzer.pdf_bytes)
+
+        for node in self.pdfalyzer.stream_nodes():
+            if node.stream_length > 0 and node.stream_data is not None:
+                stream_bytes = _stream_bytes(node)
+                self._write_yara_scan(stream_bytes, node)
+                eexec_plaintext = _eexec_plaintext(node, stream_bytes)
+
+                if eexec_plaintext is not None:
+                    self._write_yara_scan(eexec_plaintext, node, eexec_decrypted=True)
+
+    def write_streams_analysis(self, idnum: Optional[int] = None, suppress_boms: bool = False) -> None:
+        """Length, hashes, /Filter, and counts of dangerous strings and BOMs for each stream."""
+        for node in [n for n in self.pdfalyzer.stream_nodes() if idnum is None or idnum == n.idnum]:
+            stream_event = {'idnum': node.idnum, 'label': node.label, 'stream_length': node.stream_length}
+            stream_event['filters'] = stream_filters(node.obj)
+            stream_event['decode_failed'] = node.stream_length == DECODE_FAILURE_LEN
+            stream_event['javascript'] = _javascript_properties(self.pdfalyzer.javascript_hunter.score(node))
+
+            if node.stream_length > 0 and node.stream_data is not None:
+                stream_bytes = _stream_bytes(node)
+                stream_event['hashes'] = compute_file_hashes(stream_bytes)._asdict()
+                stream_event['dangerous_strings'] = _count_occurrences(stream_bytes, DANGEROUS_STRINGS)
+                eexec_plaintext = _eexec_plaintext(node, stream_bytes)
+
+                if eexec_plaintext is not None:
+                    stream_event['eexec_dangerous_strings'] = _count_occurrences(eexec_plaintext, DANGEROUS_STRINGS)
+
+                if not suppress_boms:
+                    stream_event['boms'] = {name: stream_bytes.count(bom) for bom, name in BOMS.items()}
+
+            self._write_event(STREAM, **stream_event)
+
+    def _write_yara_scan(
+            self,
+            scannable: bytes,
+            node: Optional[PdfTreeNode] = None,
+            eexec_decrypted: bool = False
+        ) -> None:
+        """eexec_decrypted means scannable is the plaintext of a Type 1 font's encrypted section."""
+        rules, rules_label = compiled_yara_rules()
+        matches = rules.match(data=scannable)
+        scanned = {'idnum': node.idnum if node else None, 'label': node.label if node else self.pdfalyzer.pdf_basename}
+
+        if eexec_decrypted:
+            scanned['eexec_decrypted'] = True
+
+        for match in matches:
+            event = YaraMatchFound(node, scanned['label'], match.rule, match.namespace, match.tags, eexec_decrypted)
+            self.pdfalyzer.context.emit(event)
+
+            self._write_event(
+                YARA_MATCH,
+                **scanned,
+                rule=match.rule,
+                namespace=match.namespace,
+                tags=match.tags,
+                meta=match.meta,
+                strings=[
+                    {'identifier': s.identifier, 'offset': i.offset, 'length': i.matched_length}
+                    for s in match.strings for i in s.instances
+                ]
+            )
+
+        self._write_event(YARA_SCAN, **scanned, rules=rules_label, size=len(scannable), match_count=len(matches))
+
+    def _write_event(self, event_type: str, **properties) -> None:
+        event = {'event': event_type, 'pdf': self.pdfalyzer.pdf_basename, **properties}
+        line = json.dumps(event, default=_json_default)
+
+        if self.on_event:
+            self.on_event(json.loads(line))
+        else:
+            self.output.write(line + "\n")
+
+        self.events_written += 1
+
+    def _real_nodes(self) -> Iterator[PdfTreeNode]:
+        return (node for node in self.pdfalyzer.node_iterator() if not isinstance(node, SymlinkNode))
+
+
+def _node_properties(node: PdfTreeNode) -> dict:
+    return {
+        'idnum': node.idnum,
+        'label': node.label,
+        'type': node.type,
+        'sub_type': node.sub_type,
+        'address': node.tree_address(max_length=None),
+        'parent_idnum': node.parent.idnum if node.parent else None,
+        'depth': node.depth,
+        'child_count': len([c for c in node.children if not isinstance(c, SymlinkNode)]),
+        'pdf_object_type': type(node.obj).__name__,
+        'stream_length': node.stream_length if node.contains_stream() else None,
+    }
+
+
+def _font_properties(font_info: FontInfo) -> dict:
+    return {
+        'idnum': font_info.idnum,
+        'label': font_info.label,
+        'sub_type': font_info.sub_type,
+        'base_font': font_info.base_font,
+        'first_and_last_char': font_info.first_and_last_char,
+        'bounding_box': font_info.bounding_box,
+        'flags': font_info.flags,
+        'width_stats': font_info.width_stats(),
+        'lengths': font_info.lengths,
+        'advertised_length': font_info.advertised_length,
+        'stream_length': font_info.stream_length,
+        'character_mapping_count': len(font_info.character_mapping or []),
+        'has_to_unicode': font_info.prepared_char_map is not None,
+    }
+
+
+def _javascript_properties(score: JavascriptScore) -> dict:
+    return {
+        'likely_javascript': score.is_likely_javascript,
+        'keyword_density': score.density,
+        'keyword_count': score.keyword_count,
+        'keywords': sorted(score.keywords),
+        'js_key': score.js_key,
+    }
+
+
+def _stream_bytes(node: PdfTreeNode) -> bytes:
+    return node.stream_data if isinstance(node.stream_data, bytes) else node.stream_data.encode()
+
+
+def _eexec_plaintext(node: PdfTreeNode, stream_bytes: bytes) -> Optional[bytes]:
+    """Decrypted eexec section of a Type 1 font or None if stream_bytes doesn't have one."""
+    return decrypt_type1_font(stream_bytes, *font_file_lengths(node.obj))
+
+
+def _count_occurrences(_bytes: bytes, strings: List[str]) -> dict:
+    """Only strings that actually appear are included."""
+    counts = {s: _bytes.count(s.encode()) for s in strings}
+    return {s: count for s, count in counts.items() if count > 0}
+
+
+def _json_default(obj: Any) -> Any:
+    """PyPDF2 objects that json can't handle on its own (FloatObject, ByteStringObject, etc)."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, bytes):
+        return obj.hex()
+    else:
+        return str(obj)
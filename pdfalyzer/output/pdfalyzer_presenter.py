@@ -1,38 +1,49 @@
 """
 Handles formatting output of for Pdfalyzezr() class. Split out this way makes Pdfalyzer more of a pure tree
 """
-from collections import defaultdict
-from typing import Optional
+from itertools import islice
+from typing import Dict, Iterator, Optional
 
-from anytree import LevelOrderIter, RenderTree, SymlinkNode
-from anytree.render import DoubleStyle
+from anytree import LevelOrderIter, SymlinkNode
 from rich.markup import escape
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
-from yaralyzer.config import YaralyzerConfig
 from yaralyzer.output.rich_console import BYTES_HIGHLIGHT, console
 from yaralyzer.output.file_hashes_table import bytes_hashes_table
 from yaralyzer.util.logging import log
+from yaralyzer.yaralyzer import Yaralyzer
 
+from pdfalyzer.analysis_context import AnalysisContext, in_analysis_context
 from pdfalyzer.binary.binary_scanner import BinaryScanner
-from pdfalyzer.config import PdfalyzerConfig
-from pdfalyzer.decorators.pdf_tree_node import DECODE_FAILURE_LEN
+from pdfalyzer.decorators.pdf_tree_node import DECODE_FAILURE_LEN, PdfTreeNode
 from pdfalyzer.detection.yaralyzer_helper import get_bytes_yaralyzer, get_file_yaralyzer
+from pdfalyzer.events import YaraMatchFound
 from pdfalyzer.helpers.string_helper import pp
 from pdfalyzer.output.layout import print_section_header, print_section_subheader, print_section_sub_subheader
+from pdfalyzer.output.render_limits import (DEFAULT_CHARMAP_LIMITS, NO_LIMITS, CharMapLimits, RenderLimits,
+     walk_tree)
 from pdfalyzer.output.tables.pdf_node_rich_table import generate_rich_tree, get_symlink_representation
+from pdfalyzer.output.tables.javascript_table import javascript_table
 from pdfalyzer.output.tables.stream_objects_table import stream_objects_table
 from pdfalyzer.output.tables.decoding_stats_table import build_decoding_stats_table
 from pdfalyzer.pdfalyzer import Pdfalyzer
 from pdfalyzer.util.adobe_strings import *
 
+TREE_LINES_PER_PRINT = 1000
+
 
 class PdfalyzerPresenter:
-    def __init__(self, pdfalyzer: Pdfalyzer):
+    def __init__(self, pdfalyzer: Pdfalyzer, context: Optional[AnalysisContext] = None):
+        """context is the options and output of the analysis (defaults to the pdfalyzer's context)."""
         self.pdfalyzer = pdfalyzer
+        self.context = context or pdfalyzer.context
+
+        if self.context.decode_memo is None:
+            self.context = self.context.with_decode_memo(pdfalyzer.context.decode_memo)
         self.yaralyzer = get_file_yaralyzer(self.pdfalyzer.pdf_path)
 
+    @in_analysis_context
     def print_everything(self) -> None:
         """Print every kind of analysis on offer to Rich console."""
         self.print_document_info()
@@ -42,6 +53,7 @@ class PdfalyzerPresenter:
         self.print_font_info()
         self.print_non_tree_relationships()
 
+    @in_analysis_context
     def print_document_info(self) -> None:
         """Print the embedded document info (author, timestamps, version, etc)."""
         print_section_header(f'Document Info for {self.pdfalyzer.pdf_basename}')
@@ -52,36 +64,42 @@ class PdfalyzerPresenter:
         console.print(self._stream_objects_table())
         console.line()
 
-    def print_tree(self) -> None:
-        """Print the simple view of the PDF tree."""
-        print_section_header(f'Simple tree view of {self.pdfalyzer.pdf_basename}')
+    @in_analysis_context
+    def print_tree(self, limits: RenderLimits = NO_LIMITS) -> None:
+        """Print the simple view of the PDF tree (or as much of it as limits allows)."""
+        root = self._render_root(limits)
+        print_section_header(f'Simple tree view of {self._render_description(root)}')
+        tree_lines = self._tree_lines(root, limits)
 
-        for pre, _fill, node in RenderTree(self.pdfalyzer.pdf_tree, style=DoubleStyle):
-            if isinstance(node, SymlinkNode):
-                symlink_rep = get_symlink_representation(node.parent, node)
-                console.print(pre + f"[{symlink_rep.style}]{symlink_rep.text}[/{symlink_rep.style}]")
-            else:
-                console.print(Text(pre) + node.__rich__())
+        # One console.print() per batch of lines instead of per line. Lines are generated as they are printed
+        # so output piped to something like 'head' starts right away.
+        while (batch := list(islice(tree_lines, TREE_LINES_PER_PRINT))):
+            console.print(Text("\n").join(batch))
 
         console.print("\n\n")
 
-    def print_rich_table_tree(self) -> None:
-        """Print the rich view of the PDF tree."""
-        print_section_header(f'Rich tree view of {self.pdfalyzer.pdf_basename}')
-        console.print(generate_rich_tree(self.pdfalyzer.pdf_tree))
+    @in_analysis_context
+    def print_rich_table_tree(self, limits: RenderLimits = NO_LIMITS) -> None:
+        """Print the rich view of the PDF tree (or as much of it as limits allows)."""
+        root = self._render_root(limits)
+        print_section_header(f'Rich tree view of {self._render_description(root)}')
+        console.print(generate_rich_tree(root, limits))
 
+    @in_analysis_context
     def print_summary(self) -> None:
         """Print node type counts and so on."""
         print_section_header(f'PDF Node Summary for {self.pdfalyzer.pdf_basename}')
-        console.print_json(data=self._analyze_tree(), sort_keys=True)
+        console.print_json(data=self.pdfalyzer.tree_summary(), sort_keys=True)
 
-    def print_font_info(self, font_idnum=None) -> None:
+    @in_analysis_context
+    def print_font_info(self, font_idnum=None, charmap_limits: CharMapLimits = DEFAULT_CHARMAP_LIMITS) -> None:
         """Print informatin about all fonts that appear in this PDF."""
         print_section_header(f'{len(self.pdfalyzer.font_infos)} fonts found in {self.pdfalyzer.pdf_basename}')
 
         for font_info in [fi for fi in self.pdfalyzer.font_infos if font_idnum is None or font_idnum == fi.idnum]:
-            font_info.print_summary()
+            font_info.print_summary(charmap_limits)
 
+    @in_analysis_context
     def print_streams_analysis(self, idnum: Optional[int] = None) -> None:
         """
         For each binary stream,
@@ -90,15 +108,24 @@ class PdfalyzerPresenter:
           3. Check for (and force decode) any BOMs (byte order marks)
           4. Check for (and force decode) any sequences of bytes between quotes
 
+        Streams that are likely JavaScript are first.
         """
         print_section_header(f'Binary Stream Analysis / Extraction')
         console.print(self._stream_objects_table())
+        console.line()
+        self.print_javascript_report()
+        stream_nodes = [n for n in self.pdfalyzer.stream_nodes() if idnum is None or idnum == n.idnum]
 
-        for node in [n for n in self.pdfalyzer.stream_nodes() if idnum is None or idnum == n.idnum]:
+        # Streams that look like JavaScript are analyzed first
+        for node in self.pdfalyzer.javascript_hunter.prioritize(stream_nodes):
             node_stream_bytes = node.stream_data
 
             if node_stream_bytes is None or node.stream_length == 0:
-                print_section_sub_subheader(f"{node} stream has length 0", style='dim')
+                if node.stream_length > 0:
+                    print_section_sub_subheader(f"{node} stream data was dropped to save memory", style='dim')
+                else:
+                    print_section_sub_subheader(f"{node} stream has length 0", style='dim')
+
                 continue
 
             if not isinstance(node_stream_bytes, bytes):
@@ -108,25 +135,24 @@ class PdfalyzerPresenter:
                 node_stream_bytes = node_stream_bytes.encode()
 
             print_section_subheader(f"{escape(str(node))} Summary and Analysis", style=f"{BYTES_HIGHLIGHT} reverse")
-            binary_scanner = BinaryScanner(node_stream_bytes, node)
-            console.print(bytes_hashes_table(binary_scanner.bytes))
-            binary_scanner.print_stream_preview()
-            binary_scanner.check_for_dangerous_instructions()
+            binary_scanner = BinaryScanner(node_stream_bytes, node, context=self.context)
+            self._print_binary_analysis(binary_scanner)
+            decrypted_scanner = binary_scanner.eexec_decrypted_scanner()
 
-            if not PdfalyzerConfig._args.suppress_boms:
-                binary_scanner.check_for_boms()
-
-            if not YaralyzerConfig.args.suppress_decodes_table:
-                binary_scanner.force_decode_quoted_bytes()
-                console.line(2)
-                console.print(build_decoding_stats_table(binary_scanner), justify='center')
+            # Type 1 fonts hide most of themselves in an encrypted section; scan the plaintext too
+            if decrypted_scanner is not None:
+                print_section_subheader(f"{escape(str(node))} Decrypted eexec Section Analysis", style='bright_red')
+                self._print_binary_analysis(decrypted_scanner)
 
+    @in_analysis_context
     def print_yara_results(self) -> None:
         """Scan the overall PDF and each individual binary stream in it with yara_rules/ files"""
         print_section_header(f"YARA Scan of PDF rules for '{self.pdfalyzer.pdf_basename}'")
-        YaralyzerConfig.args.standalone_mode = True  # TODO: this sucks
-        self.yaralyzer.yaralyze()
-        YaralyzerConfig.args.standalone_mode = False
+
+        with self.context.with_options(standalone_mode=True).activate():
+            self.yaralyzer.yaralyze()
+
+        self._emit_yara_matches(self.yaralyzer)
         console.line(2)
 
         for node in self.pdfalyzer.stream_nodes():
@@ -135,9 +161,33 @@ class PdfalyzerPresenter:
             elif node.stream_length == 0 or node.stream_data is None:
                 log.debug(f"No binary to scan for {node}")
             else:
-                get_bytes_yaralyzer(node.stream_data, str(node)).yaralyze()
+                stream_bytes = node.stream_data
+                yaralyzer = get_bytes_yaralyzer(stream_bytes, str(node))
+                yaralyzer.yaralyze()
+                self._emit_yara_matches(yaralyzer, node)
                 console.line(2)
 
+                if isinstance(stream_bytes, bytes) and CURRENTFILE_EEXEC in stream_bytes:
+                    binary_scanner = BinaryScanner(stream_bytes, node, context=self.context)
+                    decrypted_scanner = binary_scanner.eexec_decrypted_scanner()
+                    yaralyzer = get_bytes_yaralyzer(decrypted_scanner.bytes, f"{node} (eexec decrypted)")
+                    yaralyzer.yaralyze()
+                    self._emit_yara_matches(yaralyzer, node, eexec_decrypted=True)
+                    console.line(2)
+
+    @in_analysis_context
+    def print_javascript_report(self) -> None:
+        """Print the nodes whose strings or stream data are likely JavaScript (by keyword density)."""
+        likely_javascript = self.pdfalyzer.javascript_hunter.likely_javascript()
+
+        if len(likely_javascript) == 0:
+            console.print("No likely JavaScript found.", style='dim')
+        else:
+            console.print(javascript_table(likely_javascript))
+
+        console.line()
+
+    @in_analysis_context
     def print_non_tree_relationships(self) -> None:
         """Print the inter-node, non-tree relationships for all nodes in the tree"""
         console.line(2)
@@ -151,28 +201,80 @@ class PdfalyzerPresenter:
             console.print(Panel(f"Non tree relationships for {node}", expand=False))
             node.print_non_tree_relationships()
 
-    def _analyze_tree(self) -> dict:
-        """Generate a dict with some basic data points about the PDF tree"""
-        pdf_object_types = defaultdict(int)
-        node_labels = defaultdict(int)
-        keys_encountered = defaultdict(int)
-        node_count = 0
-
-        for node in self.pdfalyzer.node_iterator():
-            pdf_object_types[type(node.obj).__name__] += 1
-            node_labels[node.label] += 1
-            node_count += 1
-
-            if isinstance(node.obj, dict):
-                for k in node.obj.keys():
-                    keys_encountered[k] += 1
-
-        return {
-            'keys_encountered': keys_encountered,
-            'node_count': node_count,
-            'node_labels': node_labels,
-            'pdf_object_types': pdf_object_types,
-        }
+    def _tree_lines(self, root: PdfTreeNode, limits: RenderLimits = NO_LIMITS) -> Iterator[Text]:
+        """Generate the lines of the simple tree view one at a time."""
+        symlink_lines: Dict[int, Text] = {}
+
+        for row in walk_tree(root, limits):
+            pre, node = row.prefix(), row.node
+
+            if not isinstance(node, SymlinkNode):
+                yield Text(pre) + node.__rich__()
+                continue
+
+            # Scan the parent's references once for all of its symlinks instead of once per symlink
+            if id(node) not in symlink_lines:
+                symlink_lines.update(_symlink_lines(node.parent))
+
+            yield Text(pre) + symlink_lines.pop(id(node))
+
+    def _render_root(self, limits: RenderLimits) -> PdfTreeNode:
+        """Node the tree views start from. Raises ValueError if limits.root_idnum isn't in the tree."""
+        if limits.root_idnum is None:
+            return self.pdfalyzer.pdf_tree
+
+        node = self.pdfalyzer.find_node_by_idnum(limits.root_idnum)
+
+        if node is None:
+            raise ValueError(f"Object {limits.root_idnum} is not in the tree of {self.pdfalyzer.pdf_basename}")
+
+        return node
+
+    def _render_description(self, root: PdfTreeNode) -> str:
+        if root == self.pdfalyzer.pdf_tree:
+            return self.pdfalyzer.pdf_basename
+        else:
+            return f"{escape(str(root))} in {self.pdfalyzer.pdf_basename}"
+
+    def _emit_yara_matches(
+            self,
+            yaralyzer: Yaralyzer,
+            node: Optional[PdfTreeNode] = None,
+            eexec_decrypted: bool = False
+        ) -> None:
+        """Emit a YaraMatchFound event for each match found by yaralyzer (which must have already run)."""
+        label = node.label if node else self.pdfalyzer.pdf_basename
+
+        for yara_match in yaralyzer.matches:
+            match = yara_match.match
+            event = YaraMatchFound(node, label, match['rule'], match['namespace'], match['tags'], eexec_decrypted)
+            self.context.emit(event)
+
+    def _print_binary_analysis(self, binary_scanner: BinaryScanner) -> None:
+        """Hashes, preview, dangerous instructions, BOMs, and force decodes of quoted bytes for a binary."""
+        console.print(bytes_hashes_table(binary_scanner.bytes))
+        binary_scanner.print_stream_preview()
+        binary_scanner.check_for_dangerous_instructions()
+
+        if not self.context.args.suppress_boms:
+            binary_scanner.check_for_boms()
+
+        if not self.context.args.suppress_decodes_table:
+            binary_scanner.force_decode_quoted_bytes()
+            console.line(2)
+            console.print(build_decoding_stats_table(binary_scanner), justify='center')
 
     def _stream_objects_table(self) -> Table:
         return stream_objects_table(self.pdfalyzer.stream_nodes())
+
+
+def _symlink_lines(node: PdfTreeNode) -> Dict[int, Text]:
+    """Rendered text of each of node's symlink children keyed by id() of the child."""
+    references = node.references_to_other_nodes()
+    symlink_lines = {}
+
+    for child in [c for c in node.children if isinstance(c, SymlinkNode)]:
+        symlink_rep = get_symlink_representation(node, child, references)
+        symlink_lines[id(child)] = Text.from_markup(f"[{symlink_rep.style}]{symlink_rep.text}[/{symlink_rep.style}]")
+
+    return symlink_lines
@@ -0,0 +1,81 @@
+"""
+Limits on how much of the PDF tree the tree views (-t and -r) render. Both views walk the tree with walk_tree()
+so the cost of rendering is proportional to what's shown and not to the size of the document. Font character
+mappings (-f) have limits of their own.
+"""
+from typing import Iterator, NamedTuple, Tuple, Union
+
+from anytree import SymlinkNode
+from anytree.render import DoubleStyle
+from rich.text import Text
+
+from pdfalyzer.util.limits import DEFAULT_CHARMAP_LIMITS, NO_LIMITS, CharMapLimits, RenderLimits
+
+HIDDEN_NODES_STYLE = 'grey50 italic'
+TREE_STYLE = DoubleStyle()
+
+
+class HiddenNodes(NamedTuple):
+    """Placeholder row for the nodes a RenderLimits limit kept out of the render."""
+    count: int                      # Hidden children (or branches that were never visited if node_limit_hit)
+    node_limit_hit: bool = False
+
+    def __rich__(self) -> Text:
+        if self.node_limit_hit:
+            return Text(f"Node limit reached, {self.count} more branches not shown", style=HIDDEN_NODES_STYLE)
+        else:
+            return Text(f"{self.count} more…", style=HIDDEN_NODES_STYLE)
+
+
+class TreeWalkRow(NamedTuple):
+    continues: Tuple[bool, ...]  # For each level down to this row, True if more siblings follow at that level
+    node: Union['PdfTreeNode', SymlinkNode, HiddenNodes]
+
+    @property
+    def depth(self) -> int:
+        return len(self.continues)
+
+    def prefix(self) -> str:
+        """Lines connecting this row to the rest of the tree, same as anytree's RenderTree with DoubleStyle."""
+        if len(self.continues) == 0:
+            return ''
+
+        indent = ''.join(TREE_STYLE.vertical if cont else TREE_STYLE.empty for cont in self.continues[:-1])
+        return indent + (TREE_STYLE.cont if self.continues[-1] else TREE_STYLE.end)
+
+
+def walk_tree(root: 'PdfTreeNode', limits: RenderLimits = NO_LIMITS) -> Iterator[TreeWalkRow]:
+    """
+    Depth first walk of the tree from root that stops at the limits. Symlinks are leaves. Children hidden by
+    max_depth or max_children are replaced by one HiddenNodes row; if max_nodes is hit a HiddenNodes row at
+    depth 0 is the last row. Nodes beyond the limits are never visited.
+    """
+    stack = [TreeWalkRow((), root)]
+    nodes_walked = 0
+
+    while stack:
+        row = stack.pop()
+
+        if isinstance(row.node, HiddenNodes):
+            yield row
+            continue
+        elif limits.max_nodes is not None and nodes_walked >= limits.max_nodes:
+            yield TreeWalkRow((), HiddenNodes(len(stack) + 1, node_limit_hit=True))
+            return
+
+        yield row
+        nodes_walked += 1
+
+        if isinstance(row.node, SymlinkNode) or len(row.node.children) == 0:
+            continue
+
+        children = list(row.node.children)
+
+        if limits.max_depth is not None and row.depth >= limits.max_depth:
+            children = [HiddenNodes(len(children))]
+        elif limits.max_children is not None and len(children) > limits.max_children:
+            children = children[:limits.max_children] + [HiddenNodes(len(children) - limits.max_children)]
+
+        # Pushed in reverse so the first child is popped first
+        for i, child in reversed(list(enumerate(children))):
+            stack.append(TreeWalkRow((*row.continues, i < len(children) - 1), child))
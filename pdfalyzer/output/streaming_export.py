@@ -0,0 +1,139 @@
+"""
+Exports that are written to their files while a section is being printed instead of having the console record
+the whole section and then exporting it once at the end.
+
+Only Rich's public API is used: the console records as usual and a RenderHook exports (and clears) what's been
+recorded so far with Console.export_text() / export_html() every FLUSH_INTERVAL prints, so the recording never
+holds more than that many prints. Output is the same as Rich's Console.save_text() / save_html() / save_svg()
+with the options in yaralyzer's _EXPORT_KWARGS.
+
+SVGs can't be streamed because their dimensions depend on the whole recording. If an SVG is requested the section
+is recorded in full and all the formats are exported when it's done.
+"""
+import time
+from contextlib import contextmanager
+from io import StringIO
+from os import path
+from typing import Dict, Iterator, List, TextIO
+
+from rich.console import Console, RenderableType, RenderHook
+from yaralyzer.output.file_export import YARALYZER_TERMINAL_THEME
+from yaralyzer.output.rich_console import console
+from yaralyzer.util.logging import log, log_and_print
+
+# Same as the extnames yaralyzer's invoke_rich_export() uses
+TXT = 'txt'
+HTML = 'html'
+SVG = 'svg'
+EXPORT_FORMATS = [TXT, HTML, SVG]
+STREAMABLE_FORMATS = [TXT, HTML]
+FLUSH_INTERVAL = 100  # Number of console.print() calls between writes to the export files
+
+# Printed to a scratch console to find where the recorded code goes in Rich's HTML page
+HTML_CODE_PLACEHOLDER = 'PDFALYZER_HTML_CODE_PLACEHOLDER'
+
+
+class StreamingExporter(RenderHook):
+    """Pushed onto the console's render hooks; writes what the console has recorded to the export files."""
+    def __init__(self, output_basepath: str, export_formats: List[str]):
+        for export_format in export_formats:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f"Unknown export format '{export_format}', choose from {EXPORT_FORMATS}")
+
+        self.output_basepath = output_basepath
+        self.export_formats = export_formats
+        self.export_paths = [f"{output_basepath}.{export_format}" for export_format in export_formats]
+        self.is_streaming = SVG not in export_formats
+        self.print_count = 0
+        self.output_files: Dict[str, TextIO] = {}
+
+        for export_format in STREAMABLE_FORMATS:
+            if export_format in export_formats:
+                self.output_files[export_format] = open(f"{output_basepath}.{export_format}", 'wt', encoding='utf-8')
+
+        if HTML in self.output_files:
+            self._html_prefix, self._html_suffix = _html_page_template()
+            self.output_files[HTML].write(self._html_prefix)
+
+    def process_renderables(self, renderables: List[RenderableType]) -> List[RenderableType]:
+        """Called before every print. Whatever was printed before this one has already been recorded."""
+        self.print_count += 1
+
+        if self.is_streaming and self.print_count % FLUSH_INTERVAL == 0:
+            self.write_recording(clear=True)
+
+        return renderables
+
+    def write_recording(self, clear: bool) -> None:
+        """Append what the console has recorded to the txt and html files. clear=True empties the recording."""
+        for i, (export_format, output_file) in enumerate(self.output_files.items()):
+            clear_recording = clear and i == len(self.output_files) - 1
+
+            if export_format == TXT:
+                output_file.write(console.export_text(styles=True, clear=clear_recording))
+            else:
+                output_file.write(
+                    console.export_html(
+                        theme=YARALYZER_TERMINAL_THEME,
+                        code_format='{code}',
+                        inline_styles=True,
+                        clear=clear_recording
+                    )
+                )
+
+    def close(self) -> None:
+        """Write whatever's left in the recording, finish the files, and export the SVG if there is one."""
+        self.write_recording(clear=self.is_streaming)
+
+        if HTML in self.output_files:
+            self.output_files[HTML].write(self._html_suffix)
+
+        self.close_files()
+
+        if not self.is_streaming:
+            svg_path = f"{self.output_basepath}.{SVG}"
+            console.save_svg(svg_path, theme=YARALYZER_TERMINAL_THEME, title=path.basename(svg_path), clear=False)
+
+    def close_files(self) -> None:
+        for output_file in self.output_files.values():
+            output_file.close()
+            log.debug(f"Closed '{output_file.name}'")
+
+
+@contextmanager
+def streaming_export(output_basepath: str, export_formats: List[str]) -> Iterator[List[str]]:
+    """
+    Everything printed to the console inside this context is written to '{output_basepath}.{extname}' for
+    each of export_formats. Yields the paths being written.
+    """
+    exporter = StreamingExporter(output_basepath, export_formats)
+    original_record = console.record
+    start_time = time.perf_counter()
+    console.push_render_hook(exporter)
+    console.record = True
+
+    try:
+        yield exporter.export_paths
+    except BaseException:
+        console.pop_render_hook()
+        exporter.close_files()
+        raise
+    else:
+        console.pop_render_hook()
+        exporter.close()
+    finally:
+        console.export_text()  # Clears the recording
+        console.record = original_record
+
+    elapsed_time = time.perf_counter() - start_time
+
+    for export_path in exporter.export_paths:
+        log_and_print(f"'{export_path}' written in {elapsed_time:02f} seconds")
+
+
+def _html_page_template() -> List[str]:
+    """The parts of the page Console.export_html() puts before and after the recorded code."""
+    scratch_console = Console(record=True, file=StringIO(), width=console.width)
+    scratch_console.print(HTML_CODE_PLACEHOLDER, end='')
+    html = scratch_console.export_html(theme=YARALYZER_TERMINAL_THEME, inline_styles=True)
+    return html.split(HTML_CODE_PLACEHOLDER)
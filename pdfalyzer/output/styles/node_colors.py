@@ -3,6 +3,7 @@ Configurations and methods to help with consistent styling of PDF trees, nodes,
 """
 import re
 from collections import namedtuple
+from functools import lru_cache
 from numbers import Number
 from typing import Any
 
@@ -19,6 +20,7 @@ ClassStyle = namedtuple('ClassStyle', ['klass', 'style'])
 DEFAULT_LABEL_STYLE = 'yellow'
 FONT_OBJ_BLUE = 'deep_sky_blue4 bold'
 PDF_NON_TREE_REF = 'color(243)'
+LABEL_STYLE_CACHE_SIZE = 4096
 
 # Subclasses of the key type will be styled with the value string
 NODE_TYPE_STYLES = [
@@ -71,23 +73,46 @@ LABEL_STYLES += [
 
 def get_class_style(obj: Any) -> str:
     """Style for various types of data (e.g. DictionaryObject)"""
-    return next((cs.style for cs in NODE_TYPE_STYLES if isinstance(obj, cs.klass)), '')
+    return _class_style(type(obj))
 
 
 def get_class_style_dim(obj: Any) -> str:
     """Dim version of get_class_style() for non primitives, white for primitives"""
-    if isinstance(obj, str):
-        return 'color(244)'
-    elif isinstance(obj, Number):
-        return 'cyan dim'
-    else:
-        return f"{get_class_style(obj)} dim"
+    return _class_style_dim(type(obj))
 
 
 def get_class_style_italic(obj: Any) -> str:
-    return f"{get_class_style(obj)} italic"
+    return _class_style_italic(type(obj))
 
 
+# Labels include array indexes (e.g. '/Kids[123]') so there are about as many of them as there are nodes
+@lru_cache(maxsize=LABEL_STYLE_CACHE_SIZE)
 def get_label_style(label: str) -> str:
     """Lookup a style based on the node's label string (either its type or first address)."""
     return next((ls[1] for ls in LABEL_STYLES if ls[0].search(label)), DEFAULT_LABEL_STYLE)
+
+
+def clear_style_caches() -> None:
+    """Styles are cached per label and per class. Call this after changing LABEL_STYLES or NODE_TYPE_STYLES."""
+    for cached_function in [get_label_style, _class_style, _class_style_dim, _class_style_italic]:
+        cached_function.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _class_style(klass: type) -> str:
+    return next((cs.style for cs in NODE_TYPE_STYLES if issubclass(klass, cs.klass)), '')
+
+
+@lru_cache(maxsize=None)
+def _class_style_dim(klass: type) -> str:
+    if issubclass(klass, str):
+        return 'color(244)'
+    elif issubclass(klass, Number):
+        return 'cyan dim'
+    else:
+        return f"{_class_style(klass)} dim"
+
+
+@lru_cache(maxsize=None)
+def _class_style_italic(klass: type) -> str:
+    return f"{_class_style(klass)} italic"
@@ -33,9 +33,19 @@ def build_decoding_stats_table(scanner: 'BinaryScanner') -> Table:
             if isinstance(measure, Number):
                 regex_subtable.add_row(metric, str(measure))
 
+        pruned_encodings = scanner.pruned_encodings.get(pattern, frozenset())
+
+        if len(pruned_encodings) > 0:
+            regex_subtable.add_row('pruned_encodings', ', '.join(sorted(pruned_encodings)))
+
         for i, (encoding, encoding_stats) in enumerate(stats.per_encoding_stats.items()):
+            encoding_txt = Text(encoding, style=f"color({CHAR_ENCODING_1ST_COLOR_NUMBER + 2 * i})")
+
+            if encoding in pruned_encodings:
+                encoding_txt.append(' (pruned)', style='dim italic')
+
             decodes_subtable.add_row(
-                Text(encoding, style=f"color({CHAR_ENCODING_1ST_COLOR_NUMBER + 2 * i})"),
+                encoding_txt,
                 str(encoding_stats.match_count),
                 pct_txt(encoding_stats.match_count, stats.match_count),
                 str(encoding_stats.forced_decode_count),
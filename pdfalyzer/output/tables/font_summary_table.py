@@ -1,6 +1,8 @@
 """
 Table of info about a /Font object hierarchy.
 """
+from typing import Optional
+
 from rich.table import Table
 from rich.text import Text
 
@@ -15,8 +17,8 @@ ATTRIBUTES_TO_SHOW_IN_SUMMARY_TABLE = [
 ]
 
 
-def font_summary_table(font):
-    """Build a Rich Table with important info about the font"""
+def font_summary_table(font, max_widths: Optional[int] = None):
+    """Build a Rich Table with important info about the font. Only the first max_widths widths are listed."""
     table = Table('', '', show_header=False)
     table.columns[0].style = 'font.property'
     table.columns[0].justify = 'right'
@@ -31,8 +33,8 @@ def font_summary_table(font):
     add_table_row('/Length properties', font.lengths)
     add_table_row('total advertised length', font.advertised_length)
 
-    if font.binary_scanner is not None:
-        add_table_row('actual length', font.binary_scanner.stream_length)
+    if font.stream_length is not None:
+        add_table_row('actual length', font.stream_length)
     if font.prepared_char_map is not None:
         add_table_row('prepared charmap length', len(font.prepared_char_map))
     if font._char_map is not None:
@@ -51,9 +53,16 @@ def font_summary_table(font):
                 )
             )
         else:
-            add_table_row('char widths', font.widths)
-            add_table_row('char widths(sorted)', sorted(font.widths))
+            add_table_row('char widths', _truncated(list(font.widths), max_widths))
+            add_table_row('char widths(sorted)', _truncated(sorted(font.widths), max_widths))
 
     col_0_width = max([len(entry) for entry in table.columns[0]._cells]) + 4
     table.columns[1].max_width = subheading_width() - col_0_width - 3
     return table
+
+
+def _truncated(widths: list, max_widths: Optional[int]):
+    if max_widths is None or len(widths) <= max_widths:
+        return widths
+
+    return f"{widths[:max_widths]} ({len(widths) - max_widths} more)"
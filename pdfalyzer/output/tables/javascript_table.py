@@ -0,0 +1,40 @@
+"""
+Build a rich table of the nodes whose strings and stream data look like JavaScript.
+"""
+from typing import List, Tuple
+
+from rich.table import Table
+from rich.text import Text
+from yaralyzer.output.file_hashes_table import LEFT
+
+from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
+from pdfalyzer.detection.javascript_hunter import JavascriptScore
+
+MAX_KEYWORDS_SHOWN = 8
+
+
+def javascript_table(likely_javascript: List[Tuple[PdfTreeNode, JavascriptScore]]) -> Table:
+    """Build a table of the nodes that are likely JavaScript, their keyword densities, and the keywords found."""
+    table = Table('Node', 'Density', 'Keywords', 'Words', '/JS', 'Distinct Keywords',
+                  title=' Likely JavaScript', title_style='grey', title_justify=LEFT)
+
+    for column in table.columns[1:4]:
+        column.justify = 'right'
+
+    for node, score in likely_javascript:
+        keywords = sorted(score.keywords)
+        keywords_txt = ', '.join(keywords[:MAX_KEYWORDS_SHOWN])
+
+        if len(keywords) > MAX_KEYWORDS_SHOWN:
+            keywords_txt += f" (+{len(keywords) - MAX_KEYWORDS_SHOWN})"
+
+        table.add_row(
+            node.__rich__(),
+            f"{score.density:.1%}",
+            str(score.keyword_count),
+            str(score.word_count),
+            Text('yes', style='bright_red') if score.js_key else Text('no', style='dim'),
+            keywords_txt
+        )
+
+    return table
@@ -0,0 +1,39 @@
+"""
+Compact table summarizing a KeywordTriage scan.
+"""
+from rich.table import Table
+from rich.text import Text
+from yaralyzer.helpers.rich_text_helper import size_in_bytes_text
+from yaralyzer.output.file_hashes_table import LEFT
+
+from pdfalyzer.detection.keyword_triage import STRUCTURAL_TOKENS, TRIAGE_PDF_KEYS, KeywordTriage
+from pdfalyzer.output.styles.node_colors import get_label_style
+
+
+def keyword_triage_table(triage: KeywordTriage) -> Table:
+    """Counts of dangerous keys (with hex escaped counts in parentheses pdfid style) and structural tokens."""
+    table = Table('Keyword', 'Count', title=f" {triage.pdf_basename}", title_style='grey', title_justify=LEFT)
+    table.columns[1].justify = 'right'
+
+    for key in TRIAGE_PDF_KEYS:
+        count = triage.keyword_counts[key]
+
+        if count == 0:
+            table.add_row(Text(key, style='grey.dark'), Text('0', style='grey.dark'))
+            continue
+
+        count_txt = Text(str(count), style='bright_white')
+
+        if triage.hex_escaped_counts[key] > 0:
+            count_txt.append(f"({triage.hex_escaped_counts[key]})", style='red_alert')
+
+        table.add_row(Text(key, style=get_label_style(key)), count_txt)
+
+    table.add_section()
+
+    for token in STRUCTURAL_TOKENS:
+        table.add_row(Text(token, style='grey'), Text(str(triage.token_counts[token]), style='number'))
+
+    table.add_section()
+    table.add_row(Text('file size', style='grey'), size_in_bytes_text(triage.file_size))
+    return table
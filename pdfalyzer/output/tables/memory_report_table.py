@@ -0,0 +1,94 @@
+"""
+Tables showing where the memory went according to a MemoryAccountant.report().
+"""
+from rich.console import Group
+from rich.table import Table
+from rich.text import Text
+from yaralyzer.helpers.rich_text_helper import size_in_bytes_text
+from yaralyzer.output.file_hashes_table import LEFT
+
+from pdfalyzer.output.styles.node_colors import get_label_style
+
+MAX_NODE_TYPE_ROWS = 15
+
+
+def memory_report_tables(report: dict) -> Group:
+    """Summary, phases, node types, the usual suspects, and the source lines with the most memory allocated."""
+    return Group(
+        _summary_table(report),
+        _phases_table(report),
+        _node_types_table(report),
+        _suspects_table(report),
+        _top_allocations_table(report),
+    )
+
+
+def _summary_table(report: dict) -> Table:
+    table = _table(' Memory', 'Bytes')
+    table.add_row('ceiling', _bytes_text(report['max_bytes']))
+    table.add_row('traced', _bytes_text(report['traced_bytes']))
+    table.add_row('peak', _bytes_text(report['peak_bytes']))
+    degradations_style = 'bright_red' if report['degradations'] else 'grey'
+    table.add_row('degradations', Text(', '.join(report['degradations']) or 'none', style=degradations_style))
+    return table
+
+
+def _phases_table(report: dict) -> Table:
+    table = _table(' Phase', 'Allocated', 'Peak')
+
+    for phase, phase_memory in report['phases'].items():
+        table.add_row(phase, _bytes_text(phase_memory['allocated']), _bytes_text(phase_memory['peak']))
+
+    return table
+
+
+def _node_types_table(report: dict) -> Table:
+    table = _table(' Node Type', 'Count', 'Allocated', 'Stream Bytes')
+
+    for node_type, usage in list(report['node_types'].items())[:MAX_NODE_TYPE_ROWS]:
+        table.add_row(
+            Text(node_type, style=get_label_style(node_type)),
+            Text(f"{usage['count']:,}", style='number'),
+            _bytes_text(usage['allocated']),
+            _bytes_text(usage['stream_bytes'])
+        )
+
+    if len(report['node_types']) > MAX_NODE_TYPE_ROWS:
+        table.add_row(Text(f"({len(report['node_types']) - MAX_NODE_TYPE_ROWS} more)", style='grey'))
+
+    return table
+
+
+def _suspects_table(report: dict) -> Table:
+    table = _table(' Usual Suspects', 'Bytes')
+
+    for suspect, num_bytes in report['suspects'].items():
+        label = f"{suspect} ({report['symlink_count']:,})" if suspect == 'symlinks' else suspect
+        table.add_row(label, _bytes_text(num_bytes))
+
+    return table
+
+
+def _top_allocations_table(report: dict) -> Table:
+    table = _table(' Top Allocations', 'Bytes')
+
+    for allocation in report['top_allocations']:
+        table.add_row(Text(allocation['location'], style='grey'), _bytes_text(allocation['bytes']))
+
+    return table
+
+
+def _table(title_column: str, *columns: str) -> Table:
+    table = Table(title_column, *columns, title_justify=LEFT)
+
+    for column in table.columns[1:]:
+        column.justify = 'right'
+
+    return table
+
+
+def _bytes_text(num_bytes) -> Text:
+    if num_bytes is None:
+        return Text('none', style='grey')
+
+    return size_in_bytes_text(num_bytes)
@@ -2,7 +2,7 @@
 Methods to create the rich table view for a PdfTreeNode.
 """
 from collections import namedtuple
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple, Union
 
 from anytree import SymlinkNode
 from PyPDF2.generic import StreamObject
@@ -19,6 +19,7 @@ from yaralyzer.util.logging import log
 
 from pdfalyzer.helpers.pdf_object_helper import pypdf_class_name
 from pdfalyzer.helpers.string_helper import root_address
+from pdfalyzer.output.render_limits import NO_LIMITS, HiddenNodes, RenderLimits, walk_tree
 from pdfalyzer.output.styles.node_colors import get_label_style, get_class_style_italic
 from pdfalyzer.util.adobe_strings import *
 
@@ -28,12 +29,16 @@ SymlinkRepresentation = namedtuple('SymlinkRepresentation', ['text', 'style'])
 HEX = 'Hex'
 STREAM = 'Stream'
 STREAM_PREVIEW_LENGTH_IN_TABLE = 500
+DANGEROUS_ROW_STYLE = 'fail'
 PREVIEW_STYLES = {HEX: BYTES_NO_DIM, STREAM: 'bytes'}
 
 
-def get_symlink_representation(from_node, to_node) -> SymlinkRepresentation:
-    """Returns a tuple (symlink_text, style) that can be used for pretty printing, tree creation, etc"""
-    reference_key = str(to_node.address_of_this_node_in_other(from_node))
+def get_symlink_representation(from_node, to_node, from_node_references=None) -> SymlinkRepresentation:
+    """
+    Returns a tuple (symlink_text, style) that can be used for pretty printing, tree creation, etc.
+    from_node_references is passed through to address_of_this_node_in_other().
+    """
+    reference_key = str(to_node.address_of_this_node_in_other(from_node, from_node_references))
     pdf_instruction = root_address(reference_key)  # In case we ended up with a [0] or similar
 
     if pdf_instruction in DANGEROUS_PDF_KEYS:
@@ -46,20 +51,29 @@ def get_symlink_representation(from_node, to_node) -> SymlinkRepresentation:
     return SymlinkRepresentation(symlink_str, symlink_style)
 
 
-def generate_rich_tree(node: 'PdfTreeNode', tree: Optional[Tree] = None, depth: int = 0) -> Tree:
-    """Recursively generates a rich.tree.Tree object from this node"""
-    tree = tree or Tree(build_pdf_node_table(node))
+def generate_rich_tree(node: 'PdfTreeNode', limits: RenderLimits = NO_LIMITS) -> Tree:
+    """Generates a rich.tree.Tree object from this node, stopping at limits."""
+    branches: List[Tree] = []  # branches[n] is the most recently added branch at depth n
 
-    for child in node.children:
-        if isinstance(child, SymlinkNode):
-            symlink_rep = get_symlink_representation(node, child)
-            tree.add(Panel(symlink_rep.text, style=symlink_rep.style, expand=False))
+    for row in walk_tree(node, limits):
+        if isinstance(row.node, HiddenNodes):
+            renderable = row.node.__rich__()
+        elif isinstance(row.node, SymlinkNode):
+            symlink_rep = get_symlink_representation(row.node.parent, row.node)
+            renderable = Panel(symlink_rep.text, style=symlink_rep.style, expand=False)
+        else:
+            renderable = build_pdf_node_table(row.node)
+
+        if len(branches) == 0:
+            branches.append(Tree(renderable))
             continue
 
-        child_branch = tree.add(build_pdf_node_table(child))
-        generate_rich_tree(child, child_branch)
+        # The only depth 0 row after the root is the "node limit reached" row which goes under the root
+        depth = max(row.depth, 1)
+        del branches[depth:]
+        branches.append(branches[depth - 1].add(renderable))
 
-    return tree
+    return branches[0]
 
 
 def build_pdf_node_table(node: 'PdfTreeNode') -> Table:
@@ -75,8 +89,16 @@ def build_pdf_node_table(node: 'PdfTreeNode') -> Table:
     table.columns[1].overflow = 'fold'
     table.columns[2].header_style = get_class_style_italic(node.obj)
 
+    for row, style in pdf_node_table_rows(node):
+        table.add_row(*row, style=style)
+
+    return table
+
+
+def pdf_node_table_rows(node: 'PdfTreeNode') -> Iterator[Tuple[List[Union[Text, str]], Optional[str]]]:
+    """Yields the (row, row_style) pairs that make up build_pdf_node_table()'s table."""
     if node.label != node.known_to_parent_as:
-        table.add_row(Text('AddressInParent', style='grey'), Text(str(node.known_to_parent_as), style='grey'), '')
+        yield [Text('AddressInParent', style='grey'), Text(str(node.known_to_parent_as), style='grey'), ''], None
 
     if isinstance(node.obj, dict):
         for k, v in node.obj.items():
@@ -84,21 +106,19 @@ def build_pdf_node_table(node: 'PdfTreeNode') -> Table:
 
             # Make dangerous stuff look dangerous
             if (k in DANGEROUS_PDF_KEYS) or (node.label == FONT and k == SUBTYPE and v == TYPE1_FONT):
-                table.add_row(*[col.plain for col in row], style='fail')
+                yield [col.plain for col in row], DANGEROUS_ROW_STYLE
             else:
-                table.add_row(*row)
+                yield row, None
     elif isinstance(node.obj, list):
         for i, item in enumerate(node.obj):
-            table.add_row(*type(node).to_table_row(i, item))
+            yield type(node).to_table_row(i, item), None
     elif not isinstance(node.obj, StreamObject):
         # Then it's a single element node like a URI, TextString, etc.
-        table.add_row(*type(node).to_table_row('', node.obj, is_single_row_table=True))
+        yield type(node).to_table_row('', node.obj, is_single_row_table=True), None
 
     for row in _get_stream_preview_rows(node):
         row.append(Text(''))
-        table.add_row(*row)
-
-    return table
+        yield row, None
 
 
 def _get_stream_preview_rows(node: 'PdfTreeNode') -> List[List[Text]]:
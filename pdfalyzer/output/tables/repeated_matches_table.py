@@ -0,0 +1,43 @@
+"""
+Build a rich table of the matched bytes that weren't decoded again because they'd already been decoded.
+"""
+from typing import List, NamedTuple
+
+from rich.table import Table
+from rich.text import Text
+from yaralyzer.helpers.bytes_helper import clean_byte_string
+from yaralyzer.output.file_hashes_table import LEFT
+
+MAX_REPEATED_MATCH_ROWS = 20
+MAX_BYTES_PREVIEW_LENGTH = 40
+
+
+class RepeatedMatches(NamedTuple):
+    matched_bytes: bytes
+    first_match: str  # Where the bytes were first matched and decoded
+    count: int
+
+
+def repeated_matches_table(repeats: List[RepeatedMatches]) -> Table:
+    """Table of the most repeated matches, how often they repeated, and where their decodes were printed."""
+    table = Table('Bytes', 'Repeats', 'First Decoded At',
+                  title=' Repeated Matches (counted in the stats but not decoded again)',
+                  title_style='grey', title_justify=LEFT)
+
+    table.columns[1].justify = 'right'
+    repeats = sorted(repeats, key=lambda repeat: -repeat.count)
+
+    for repeat in repeats[:MAX_REPEATED_MATCH_ROWS]:
+        bytes_preview = clean_byte_string(repeat.matched_bytes[:MAX_BYTES_PREVIEW_LENGTH])
+
+        if len(repeat.matched_bytes) > MAX_BYTES_PREVIEW_LENGTH:
+            bytes_preview += '...'
+
+        table.add_row(Text(bytes_preview, style='bytes'), str(repeat.count), Text(repeat.first_match, style='dim'))
+
+    if len(repeats) > MAX_REPEATED_MATCH_ROWS:
+        hidden_repeats = repeats[MAX_REPEATED_MATCH_ROWS:]
+        hidden_count = sum(repeat.count for repeat in hidden_repeats)
+        table.add_row(Text(f"({len(hidden_repeats)} more)", style='dim'), str(hidden_count), '')
+
+    return table
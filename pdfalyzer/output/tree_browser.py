@@ -0,0 +1,370 @@
+"""
+Interactive terminal browser for the PDF tree. Only the rows that are actually on screen are rendered and the
+(expensive) build_pdf_node_table() view of a node is only built when that node's table is opened so the cost of
+drawing the screen doesn't depend on how big the PDF is.
+
+TreeBrowser is the model (which rows are visible, cursor, search) and knows nothing about curses;
+browse() wraps it in a curses UI.
+"""
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set
+
+from anytree import PreOrderIter, SymlinkNode
+from rich.cells import cell_len, set_cell_size
+from rich.color import ColorSystem
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from yaralyzer.output.rich_console import console
+
+from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
+from pdfalyzer.output.tables.pdf_node_rich_table import build_pdf_node_table, get_symlink_representation
+from pdfalyzer.pdfalyzer import Pdfalyzer
+
+NODE_ROW = 'node'
+SYMLINK_ROW = 'symlink'
+TABLE_ROW = 'table'
+
+INDENT = '  '
+COLLAPSED = '▸ '
+EXPANDED = '▾ '
+LEAF = '  '
+
+DEFAULT_WIDTH = 120
+HELP_TEXT = "↑↓/jk move  →/l expand  ←/h collapse  enter table/follow link  / search  n next  g/G top/bottom  q quit"
+
+
+class BrowserRow(NamedTuple):
+    node: PdfTreeNode
+    depth: int
+    kind: str = NODE_ROW
+    table_line: int = 0  # Which line of the node's table for TABLE_ROWs
+    symlink: Optional[SymlinkNode] = None
+
+
+class TreeBrowser:
+    def __init__(self, pdfalyzer: Pdfalyzer, width: int = DEFAULT_WIDTH):
+        self.pdfalyzer = pdfalyzer
+        self.width = width
+        self.expanded_idnums: Set[int] = set()
+        self.table_idnums: Set[int] = set()
+        self.rows: List[BrowserRow] = [BrowserRow(pdfalyzer.pdf_tree, 0)]
+        self.cursor = 0
+        self.search_query: Optional[str] = None
+        self._table_lines: Dict[int, List[List[Segment]]] = {}
+
+    @property
+    def current_row(self) -> BrowserRow:
+        return self.rows[self.cursor]
+
+    def move_cursor(self, offset: int) -> None:
+        self.cursor = max(0, min(len(self.rows) - 1, self.cursor + offset))
+
+    def expand(self) -> None:
+        """Show the children of the node at the cursor."""
+        row = self.current_row
+
+        if row.kind == NODE_ROW and row.node.idnum not in self.expanded_idnums and len(row.node.children) > 0:
+            self.expanded_idnums.add(row.node.idnum)
+            self._refresh_rows_below(self.cursor)
+
+    def collapse(self) -> None:
+        """Hide the children of the node at the cursor or, if there's nothing to hide, move to its parent."""
+        row = self.current_row
+
+        if row.kind == NODE_ROW and (row.node.idnum in self.expanded_idnums or row.node.idnum in self.table_idnums):
+            self.expanded_idnums.discard(row.node.idnum)
+            self.table_idnums.discard(row.node.idnum)
+            self._refresh_rows_below(self.cursor)
+        elif row.kind == NODE_ROW and row.depth > 0:
+            self.cursor = self._parent_row_index(self.cursor)
+        else:
+            self.cursor = self._owner_row_index(self.cursor)
+
+    def activate(self) -> bool:
+        """Toggle the rich table for a node, or jump to a symlink's target (False if it's not in the tree)."""
+        row = self.current_row
+
+        if row.kind == SYMLINK_ROW:
+            return self.reveal(row.symlink.target)
+
+        self.cursor = self._owner_row_index(self.cursor)
+        idnum = self.current_row.node.idnum
+
+        if idnum in self.table_idnums:
+            self.table_idnums.remove(idnum)
+        else:
+            self.table_idnums.add(idnum)
+
+        self._refresh_rows_below(self.cursor)
+        return True
+
+    def search(self, query: str) -> Optional[PdfTreeNode]:
+        """Jump to the next node after the cursor whose idnum is query or whose label or address contains it."""
+        self.search_query = query.strip()
+        return self.next_match()
+
+    def next_match(self) -> Optional[PdfTreeNode]:
+        if not self.search_query:
+            return None
+
+        nodes = list(self._searchable_nodes())
+        current_node = self.rows[self._owner_row_index(self.cursor)].node
+        start_idx = next((i + 1 for i, node in enumerate(nodes) if node is current_node), 0)
+
+        for node in nodes[start_idx:] + nodes[:start_idx]:
+            if self._matches(node, self.search_query) and self.reveal(node):
+                return node
+
+        return None
+
+    def reveal(self, node: PdfTreeNode) -> bool:
+        """
+        Expand all of node's ancestors and put the cursor on it. If node isn't in the tree (e.g. a symlink to
+        something outside it) the cursor stays on the node it was on and False is returned.
+        """
+        current_node = self.rows[self._owner_row_index(self.cursor)].node
+        self.expanded_idnums.update(ancestor.idnum for ancestor in node.ancestors)
+        self.rows = [BrowserRow(self.pdfalyzer.pdf_tree, 0)] + list(self._rows_below(self.pdfalyzer.pdf_tree, 0))
+        node_row_idx = self._node_row_index(node)
+
+        if node_row_idx is None:
+            self.cursor = self._node_row_index(current_node) or 0
+            return False
+
+        self.cursor = node_row_idx
+        return True
+
+    def set_width(self, width: int) -> None:
+        """Tables are rendered to fit the width so they have to be rebuilt if it changes."""
+        if width == self.width:
+            return
+
+        self.width = width
+        self._table_lines = {}
+        self.reveal(self.rows[self._owner_row_index(self.cursor)].node)
+
+    def row_segments(self, row: BrowserRow) -> List[Segment]:
+        """Render a single row (indentation included). Only called for rows that are on screen."""
+        indent = Segment(INDENT * row.depth)
+
+        if row.kind == TABLE_ROW:
+            return [indent] + self._table_lines_for(row.node)[row.table_line]
+        elif row.kind == SYMLINK_ROW:
+            symlink_rep = get_symlink_representation(row.node, row.symlink)
+            return [indent, Segment(LEAF)] + list(Text.from_markup(symlink_rep.text, style=symlink_rep.style).render(console))
+
+        if len(row.node.children) == 0:
+            marker = LEAF
+        else:
+            marker = EXPANDED if row.node.idnum in self.expanded_idnums else COLLAPSED
+
+        return [indent, Segment(marker)] + list(row.node.__rich__().render(console))
+
+    def _refresh_rows_below(self, row_idx: int) -> None:
+        """Rebuild the rows beneath the node at row_idx (its table and its visible descendants)."""
+        row = self.rows[row_idx]
+        end_idx = row_idx + 1
+
+        while end_idx < len(self.rows) and self.rows[end_idx].depth > row.depth:
+            end_idx += 1
+
+        self.rows[row_idx + 1:end_idx] = list(self._rows_below(row.node, row.depth))
+
+    def _rows_below(self, node: PdfTreeNode, depth: int) -> Iterator[BrowserRow]:
+        if node.idnum in self.table_idnums:
+            for i in range(len(self._table_lines_for(node))):
+                yield BrowserRow(node, depth + 1, TABLE_ROW, i)
+
+        if node.idnum not in self.expanded_idnums:
+            return
+
+        for child in node.children:
+            if isinstance(child, SymlinkNode):
+                yield BrowserRow(node, depth + 1, SYMLINK_ROW, symlink=child)
+            else:
+                yield BrowserRow(child, depth + 1)
+                yield from self._rows_below(child, depth + 1)
+
+    def _table_lines_for(self, node: PdfTreeNode) -> List[List[Segment]]:
+        """Lazily build and render a node's table. Cached until the width changes."""
+        if node.idnum not in self._table_lines:
+            table_width = max(self.width - len(INDENT) * (node.depth + 1), 20)
+            options = console.options.update(width=table_width)
+            self._table_lines[node.idnum] = console.render_lines(build_pdf_node_table(node), options, pad=False)
+
+        return self._table_lines[node.idnum]
+
+    def _owner_row_index(self, row_idx: int) -> int:
+        """Index of the NODE_ROW for the node a table or symlink row belongs to (itself for NODE_ROWs)."""
+        row = self.rows[row_idx]
+
+        if row.kind == NODE_ROW:
+            return row_idx
+
+        return next(i for i in range(row_idx, -1, -1) if self.rows[i].kind == NODE_ROW and self.rows[i].node is row.node)
+
+    def _node_row_index(self, node: PdfTreeNode) -> Optional[int]:
+        return next((i for i, row in enumerate(self.rows) if row.kind == NODE_ROW and row.node is node), None)
+
+    def _parent_row_index(self, row_idx: int) -> int:
+        depth = self.rows[row_idx].depth
+        return next(i for i in range(row_idx - 1, -1, -1) if self.rows[i].kind == NODE_ROW and self.rows[i].depth < depth)
+
+    def _searchable_nodes(self) -> Iterator[PdfTreeNode]:
+        return (n for n in PreOrderIter(self.pdfalyzer.pdf_tree) if not isinstance(n, SymlinkNode))
+
+    @staticmethod
+    def _matches(node: PdfTreeNode, query: str) -> bool:
+        if query.isdigit():
+            return node.idnum == int(query)
+
+        query = query.lower()
+        return query in node.label.lower() or query in node.tree_address(max_length=None).lower()
+
+
+def fit_to_cells(text: str, max_cells: int) -> str:
+    """
+    Truncate text to max_cells terminal cells. Wide characters (e.g. CJK) take two cells so truncating by len()
+    could run off the edge of the screen, which curses raises an error for.
+    """
+    return set_cell_size(text, max_cells) if cell_len(text) > max_cells else text
+
+
+def browse(pdfalyzer: Pdfalyzer) -> None:
+    """Run the curses UI until the user quits."""
+    # Imported here because curses isn't available everywhere (e.g. Windows without windows-curses)
+    import curses
+    curses.wrapper(_TreeBrowserView(pdfalyzer).run)
+
+
+class _TreeBrowserView:
+    """Curses front end for TreeBrowser."""
+    def __init__(self, pdfalyzer: Pdfalyzer):
+        self.browser = TreeBrowser(pdfalyzer)
+        self.top = 0
+        self.message = HELP_TEXT
+
+    def run(self, screen) -> None:
+        import curses
+        self.curses = curses
+        self.screen = screen
+        curses.curs_set(0)
+        self._init_colors()
+
+        while True:
+            height, width = screen.getmaxyx()
+            self.browser.set_width(width - 1)
+            self._draw(height, width)
+            key = screen.getch()
+            self.message = HELP_TEXT
+
+            if key in (ord('q'), 27):
+                return
+            elif key in (curses.KEY_DOWN, ord('j')):
+                self.browser.move_cursor(1)
+            elif key in (curses.KEY_UP, ord('k')):
+                self.browser.move_cursor(-1)
+            elif key == curses.KEY_NPAGE:
+                self.browser.move_cursor(height - 2)
+            elif key == curses.KEY_PPAGE:
+                self.browser.move_cursor(-(height - 2))
+            elif key == ord('g'):
+                self.browser.cursor = 0
+            elif key == ord('G'):
+                self.browser.cursor = len(self.browser.rows) - 1
+            elif key in (curses.KEY_RIGHT, ord('l')):
+                self.browser.expand()
+            elif key in (curses.KEY_LEFT, ord('h')):
+                self.browser.collapse()
+            elif key in (curses.KEY_ENTER, 10, 13, ord(' ')):
+                if not self.browser.activate():
+                    self.message = "Link target is not in the tree"
+            elif key == ord('/'):
+                self._search(self._prompt(height, '/'))
+            elif key == ord('n'):
+                self._search(None)
+
+    def _draw(self, height: int, width: int) -> None:
+        page_height = height - 1
+
+        # Scroll just enough to keep the cursor on screen
+        if self.browser.cursor < self.top:
+            self.top = self.browser.cursor
+        elif self.browser.cursor >= self.top + page_height:
+            self.top = self.browser.cursor - page_height + 1
+
+        self.screen.erase()
+
+        for y, row in enumerate(self.browser.rows[self.top:self.top + page_height]):
+            is_cursor_row = (self.top + y) == self.browser.cursor
+            x = 0
+
+            for segment in self.browser.row_segments(row):
+                if x >= width - 1 or segment.control:
+                    continue
+
+                text = fit_to_cells(segment.text.replace('\n', ''), width - 1 - x)
+                attr = self._curses_attr(segment.style)
+                self.screen.addstr(y, x, text, attr | (self.curses.A_REVERSE if is_cursor_row else 0))
+                x += cell_len(text)
+
+        position = f" {self.browser.cursor + 1}/{len(self.browser.rows)} "
+        status = fit_to_cells(position + self.message, width - 1)
+        self.screen.addstr(height - 1, 0, status, self.curses.A_REVERSE)
+        self.screen.refresh()
+
+    def _search(self, query: Optional[str]) -> None:
+        node = self.browser.search(query) if query else self.browser.next_match()
+
+        if node is None:
+            self.message = f"No match for '{self.browser.search_query}'"
+
+    def _prompt(self, height: int, prompt: str) -> str:
+        self.screen.move(height - 1, 0)
+        self.screen.clrtoeol()
+        self.screen.addstr(height - 1, 0, prompt)
+        self.curses.echo()
+        self.curses.curs_set(1)
+        query = self.screen.getstr(height - 1, len(prompt)).decode(errors='ignore')
+        self.curses.noecho()
+        self.curses.curs_set(0)
+        return query
+
+    def _init_colors(self) -> None:
+        self.has_colors = self.curses.has_colors()
+
+        if not self.has_colors:
+            return
+
+        self.curses.start_color()
+        self.curses.use_default_colors()
+
+        for color_number in range(8):
+            self.curses.init_pair(color_number + 1, color_number, -1)
+
+    def _curses_attr(self, style: Optional[Style]) -> int:
+        """Closest curses attributes to a rich Style (standard 8 colors, bright colors become bold)."""
+        if style is None:
+            return 0
+
+        attr = 0
+
+        if style.bold:
+            attr |= self.curses.A_BOLD
+        if style.dim:
+            attr |= self.curses.A_DIM
+        if style.reverse:
+            attr |= self.curses.A_REVERSE
+        if style.underline:
+            attr |= self.curses.A_UNDERLINE
+
+        if self.has_colors and style.color is not None:
+            color_number = style.color.downgrade(ColorSystem.STANDARD).number
+
+            if color_number is not None:
+                if color_number >= 8:
+                    attr |= self.curses.A_BOLD
+
+                attr |= self.curses.color_pair(color_number % 8 + 1)
+
+        return attr
@@ -6,8 +6,12 @@ in this class.
 Once the PDF is parsed this class manages access to
 information about or from the underlying PDF tree.
 """
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import cached_property
 from os.path import basename
-from typing import Dict, Iterator, List, Optional
+from time import perf_counter
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
 
 from anytree import LevelOrderIter, SymlinkNode
 from anytree.search import findall, findall_by_attr
@@ -18,56 +22,128 @@ from yaralyzer.helpers.file_helper import load_binary_data
 from yaralyzer.output.rich_console import console
 from yaralyzer.util.logging import log
 
+from pdfalyzer.analysis_context import AnalysisContext, current_context
+from pdfalyzer.binary.decode_memo import DecodeMemo
+from pdfalyzer.binary.stream_data_store import StreamDataStore
 from pdfalyzer.decorators.document_model_printer import print_with_header
 from pdfalyzer.decorators.indeterminate_node import IndeterminateNode
-from pdfalyzer.decorators.pdf_tree_node import PdfTreeNode
+from pdfalyzer.decorators.pdf_tree_node import DECODE_FAILURE_LEN, PdfTreeNode
 from pdfalyzer.decorators.pdf_tree_verifier import PdfTreeVerifier
+from pdfalyzer.detection.javascript_hunter import JavascriptHunter
+from pdfalyzer.events import DangerousKeyFound, NodeDiscovered, NodePlaced, StreamDecoded, dangerous_keys
+from pdfalyzer.font_cache import FontCache
 from pdfalyzer.font_info import FontInfo
 from pdfalyzer.pdf_object_relationship import PdfObjectRelationship
 from pdfalyzer.util.adobe_strings import *
 from pdfalyzer.util.exceptions import PdfWalkError
+from pdfalyzer.util.memory_accounting import CHECK_INTERVAL, DROP_STREAM_DATA, SKIP_SYMLINKS, MemoryAccountant
 
 TRAILER_FALLBACK_ID = 10000000
 
 
+# Phases of building the tree, in the order they happen. Each one is timed in Pdfalyzer.phase_timings.
+PARSE = 'parse'
+WALK = 'walk'
+RESOLVE_INDETERMINATE = 'resolve_indeterminate'
+EXTRACT_FONTS = 'extract_fonts'
+VERIFY = 'verify'
+SYMLINK_NON_TREE_RELATIONSHIPS = 'symlink_non_tree_relationships'
+PHASES = [PARSE, WALK, RESOLVE_INDETERMINATE, EXTRACT_FONTS, VERIFY, SYMLINK_NON_TREE_RELATIONSHIPS]
+
+# Called with the name of each phase; the returned context manager is entered for the duration of the phase
+PhaseHook = Callable[[str], ContextManager]
+
+
 class Pdfalyzer:
-    def __init__(self, pdf_path: str):
-        self.pdf_path = pdf_path
-        self.pdf_basename = basename(pdf_path)
-        self.pdf_bytes = load_binary_data(pdf_path)
-        self.pdf_bytes_info = compute_file_hashes(self.pdf_bytes)
-        pdf_file = open(pdf_path, 'rb')  # Filehandle must be left open for PyPDF2 to perform seeks
-        self.pdf_reader = PdfReader(pdf_file)
+    def __init__(
+            self,
+            pdf_path: str,
+            phase_hook: Optional[PhaseHook] = None,
+            memory_accountant: Optional[MemoryAccountant] = None,
+            stream_data_store: Optional[StreamDataStore] = None,
+            context: Optional[AnalysisContext] = None
+        ):
+        """
+        phase_hook is an optional way to instrument the PHASES (e.g. for benchmarking).
+        memory_accountant is optional tracemalloc accounting of (and a ceiling on) the memory used building the tree.
+        stream_data_store is an optional place to keep decoded stream data that spills to disk past a budget.
+        context is the options and output of the analysis (defaults to the active context). Its listeners are
+        called with the events (see pdfalyzer/events.py) for each node as it's discovered and placed in the tree.
+        If the context has no DecodeMemo this Pdfalyzer uses a new one of its own.
+        """
+        self.phase_timings: Dict[str, float] = {}  # Seconds spent in each of the PHASES
+        self._phase_hook = phase_hook
+        self.memory_accountant = memory_accountant
+        self.stream_data_store = stream_data_store
+        self.context = context or current_context()
+
+        if self.context.decode_memo is None:
+            self.context = self.context.with_decode_memo(DecodeMemo())
+
+        # The context is active while the tree is built so whatever is read or printed along the way is its own
+        with self.context.activate():
+            self._build_tree(pdf_path)
+
+    def _build_tree(self, pdf_path: str) -> None:
+        """Parse the PDF and build the tree (the PHASES)."""
+        if self.memory_accountant is not None:
+            self.memory_accountant.start()
+
+        with self._phase(PARSE):
+            self.pdf_path = pdf_path
+            self.pdf_basename = basename(pdf_path)
+            self.pdf_bytes = load_binary_data(pdf_path)
+            self.pdf_bytes_info = compute_file_hashes(self.pdf_bytes)
+            pdf_file = open(pdf_path, 'rb')  # Filehandle must be left open for PyPDF2 to perform seeks
+            self.pdf_reader = PdfReader(pdf_file)
 
         # Initialize tracking variables
         self.indeterminate_ids = set()  # See INDETERMINATE_REF_KEYS comment
         self.nodes_encountered: Dict[int, PdfTreeNode] = {}  # Nodes we've seen already
         self.font_infos: List[FontInfo] = []  # Font summary objects
+        self.font_cache = FontCache()  # Decoded font files and parsed /ToUnicode maps shared by the font_infos
         self.max_generation = 0  # PDF revisions are "generations"; this is the max generation encountered
 
         # Bootstrap the root of the tree with the trailer. PDFs are always read trailer first.
         # Technically the trailer has no PDF Object ID but we set it to the /Size of the PDF.
-        trailer = self.pdf_reader.trailer
-        self.pdf_size = trailer.get(SIZE)
-        trailer_id = self.pdf_size if self.pdf_size is not None else TRAILER_FALLBACK_ID
-        self.pdf_tree = PdfTreeNode(trailer, TRAILER, trailer_id)
-        self.nodes_encountered[self.pdf_tree.idnum] = self.pdf_tree
+        with self._phase(WALK):
+            trailer = self.pdf_reader.trailer
+            self.pdf_size = trailer.get(SIZE)
+            trailer_id = self.pdf_size if self.pdf_size is not None else TRAILER_FALLBACK_ID
+            self.pdf_tree = PdfTreeNode(trailer, TRAILER, trailer_id)
+            self.nodes_encountered[self.pdf_tree.idnum] = self.pdf_tree
+            self._emit_node_discovered(self.pdf_tree)
 
-        # Build tree by recursively following relationships between nodes
-        self.walk_node(self.pdf_tree)
+            # Build tree by recursively following relationships between nodes
+            self.walk_node(self.pdf_tree)
 
         # After scanning all objects we place nodes whose position was uncertain, extract fonts, and verify
-        self._resolve_indeterminate_nodes()
-        self._extract_font_infos()
-        self.verifier = PdfTreeVerifier(self)
-        self.verifier.verify_all_nodes_encountered_are_in_tree()
-        self.verifier.verify_unencountered_are_untraversable()
+        with self._phase(RESOLVE_INDETERMINATE):
+            self._resolve_indeterminate_nodes()
+
+        with self._phase(EXTRACT_FONTS):
+            self._extract_font_infos()
+
+        with self._phase(VERIFY):
+            self.verifier = PdfTreeVerifier(self)
+            self.verifier.verify_all_nodes_encountered_are_in_tree()
+            self.verifier.verify_unencountered_are_untraversable()
 
         # Create SymlinkNodes for relationships between PDF objects that are not parent/child relationships.
         # (Do this last because it has the side effect of making a lot more nodes)
-        for node in self.node_iterator():
-            if not isinstance(node, SymlinkNode):
-                node.symlink_non_tree_relationships()
+        with self._phase(SYMLINK_NON_TREE_RELATIONSHIPS):
+            for i, node in enumerate(self.node_iterator()):
+                if self.is_degraded(SKIP_SYMLINKS):
+                    log.warning("Not creating SymlinkNodes for non-tree relationships to save memory")
+                    break
+                elif not isinstance(node, SymlinkNode):
+                    node.symlink_non_tree_relationships()
+
+                if self.memory_accountant and i % CHECK_INTERVAL == 0:
+                    self.memory_accountant.check(self)
+
+        if self.memory_accountant:
+            self.memory_accountant.check(self, final=True)
 
         log.info(f"Walk complete.")
 
@@ -108,11 +184,57 @@ class Pdfalyzer:
         stream_filter = lambda node: node.contains_stream() and not isinstance(node, SymlinkNode)
         return sorted(findall(self.pdf_tree, stream_filter), key=lambda r: r.idnum)
 
+    @cached_property
+    def javascript_hunter(self) -> JavascriptHunter:
+        """JavaScript keyword scores for every node's strings and stream data (scored the first time they're needed)."""
+        return JavascriptHunter(self)
+
+    @property
+    def degradations(self) -> List[str]:
+        """The memory_accounting DEGRADATIONS that had to be applied to stay under the memory ceiling."""
+        return self.memory_accountant.degradations if self.memory_accountant else []
+
+    def is_degraded(self, degradation: str) -> bool:
+        return degradation in self.degradations
+
+    def drop_stream_data(self) -> None:
+        """Forget the decoded stream data of all the nodes (stream_length is kept)."""
+        for node in self.nodes_encountered.values():
+            node.drop_stream_data()
+
+    def tree_summary(self) -> dict:
+        """Generate a dict with some basic data points about the PDF tree"""
+        pdf_object_types = defaultdict(int)
+        node_labels = defaultdict(int)
+        keys_encountered = defaultdict(int)
+        node_count = 0
+
+        for node in self.node_iterator():
+            pdf_object_types[type(node.obj).__name__] += 1
+            node_labels[node.label] += 1
+            node_count += 1
+
+            if isinstance(node.obj, dict):
+                for k in node.obj.keys():
+                    keys_encountered[k] += 1
+
+        return {
+            'keys_encountered': keys_encountered,
+            'node_count': node_count,
+            'node_labels': node_labels,
+            'pdf_object_types': pdf_object_types,
+        }
+
     def _add_relationship_to_pdf_tree(self, relationship: PdfObjectRelationship) -> Optional[PdfTreeNode]:
         """
         Place the relationship 'node' in the tree. Returns an optional node that should be
         placed in the PDF node processing queue.
         """
+        with self._node_placement_events(relationship.from_node.idnum, relationship.to_obj.idnum):
+            return self._place_relationship(relationship)
+
+    def _place_relationship(self, relationship: PdfObjectRelationship) -> Optional[PdfTreeNode]:
+        """Does the work of _add_relationship_to_pdf_tree()."""
         log.info(f'Assessing relationship {relationship}...')
         was_seen_before = (relationship.to_obj.idnum in self.nodes_encountered) # Must come before _build_or_find()
         from_node = relationship.from_node
@@ -183,19 +305,27 @@ class Pdfalyzer:
                 log.info(f"{node} marked indeterminate but has parent: {node.parent}")
                 continue
 
-            IndeterminateNode(node).place_node()
+            with self._node_placement_events(node.idnum):
+                IndeterminateNode(node).place_node()
 
     def _extract_font_infos(self) -> None:
-        """Extract information about fonts in the tree and place it in self.font_infos"""
+        """
+        Extract information about fonts in the tree and place it in self.font_infos. Each font is only built the
+        first time it's found and font files and /ToUnicode maps shared by several fonts are only decoded once.
+        """
+        known_font_ids = set()
+
         for node in self.node_iterator():
             if isinstance(node.obj, dict) and RESOURCES in node.obj:
                 log.debug(f"Extracting fonts from node with '{RESOURCES}' key: {node}...")
-                known_font_ids = [fi.idnum for fi in self.font_infos]
 
-                self.font_infos += [
-                    fi for fi in FontInfo.extract_font_infos(node.obj)
-                    if fi.idnum not in known_font_ids
-                ]
+                self.font_infos += FontInfo.extract_font_infos(
+                    node.obj,
+                    self.stream_data_store,
+                    self.font_cache,
+                    known_font_ids,
+                    self.context
+                )
 
     def _build_or_find_node(self, relationship: IndirectObject, relationship_key: str) -> PdfTreeNode:
         """If node in self.nodes_encountered already then return it, otherwise build a node and store it."""
@@ -203,10 +333,79 @@ class Pdfalyzer:
             return self.nodes_encountered[relationship.idnum]
 
         log.debug(f"Building node for {relationship}")
+        start_bytes = self.memory_accountant.traced_bytes() if self.memory_accountant else 0
         new_node = PdfTreeNode.from_reference(relationship, relationship_key)
         self.nodes_encountered[relationship.idnum] = new_node
+
+        self._emit_node_discovered(new_node)
+
+        if self.stream_data_store is not None:
+            new_node.store_stream_data(self.stream_data_store)
+
+        if self.memory_accountant:
+            if self.is_degraded(DROP_STREAM_DATA):
+                new_node.drop_stream_data()
+
+            self.memory_accountant.node_built(new_node.type, start_bytes)
+
+            if len(self.nodes_encountered) % CHECK_INTERVAL == 0:
+                self.memory_accountant.check(self)
+
         return new_node
 
+    def _emit_node_discovered(self, node: PdfTreeNode) -> None:
+        """Emit the events for a newly built node: discovered, stream decoded, and any dangerous keys."""
+        if not self.context.listeners:
+            return
+
+        self.context.emit(NodeDiscovered(node))
+
+        if node.contains_stream():
+            self.context.emit(StreamDecoded(node, node.stream_length, node.stream_length == DECODE_FAILURE_LEN))
+
+        for key in dangerous_keys(node.obj):
+            self.context.emit(DangerousKeyFound(node, key))
+
+    @contextmanager
+    def _node_placement_events(self, *idnums: int) -> Iterator[None]:
+        """Emit NodePlaced for each of the nodes with idnums that gets its parent during the block."""
+        if not self.context.listeners:
+            yield
+            return
+
+        unplaced_idnums = [
+            idnum for idnum in idnums
+            if idnum not in self.nodes_encountered or self.nodes_encountered[idnum].parent is None
+        ]
+
+        yield
+
+        for idnum in unplaced_idnums:
+            node = self.nodes_encountered.get(idnum)
+
+            if node is not None and node.parent is not None:
+                self.context.emit(NodePlaced(node, node.parent))
+
+    @contextmanager
+    def _phase(self, phase: str) -> Iterator[None]:
+        """
+        Time a phase of the tree building (and run the phase_hook around it if there is one). If there's a
+        memory_accountant it records the phase's memory and checks the ceiling when the phase is done.
+        """
+        with (self._phase_hook(phase) if self._phase_hook else nullcontext()), \
+                (self.memory_accountant.phase(phase) if self.memory_accountant else nullcontext()):
+            start_time = perf_counter()
+
+            try:
+                yield
+            finally:
+                self.phase_timings[phase] = perf_counter() - start_time
+                log.debug(f"{phase} phase took {self.phase_timings[phase]:.3f} seconds")
+
+        # There's no tree to degrade until the walk starts
+        if self.memory_accountant and phase != PARSE:
+            self.memory_accountant.check(self)
+
     def _print_nodes_encountered(self) -> None:
         """Debug method that displays which nodes have already been walked"""
         for i in sorted(self.nodes_encountered.keys()):
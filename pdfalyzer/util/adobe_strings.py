@@ -25,6 +25,7 @@ DEST            = '/Dest'  # Similar to /D?
 ENCODING        = '/Encoding'
 EXT_G_STATE     = Resources.EXT_G_STATE
 FIELDS          = '/Fields'
+FILTER          = '/Filter'
 FIRST           = '/First'
 FONT            = Resources.FONT
 FONT_FILE       = '/FontFile'
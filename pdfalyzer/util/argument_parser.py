@@ -1,19 +1,19 @@
-import sys
 from argparse import ArgumentError, ArgumentParser
 from collections import namedtuple
 from functools import partial, update_wrapper
-from importlib.metadata import version
 from os import environ, getcwd, path
-from typing import List
+from typing import List, Optional
 
 from rich_argparse_plus import RichHelpFormatterPlus
 from yaralyzer.config import YaralyzerConfig
-from yaralyzer.helpers.rich_text_helper import console
 from yaralyzer.util.argument_parser import export, parser, parse_arguments as parse_yaralyzer_args
 from yaralyzer.util.logging import log, log_and_print, log_argparse_result, log_current_config, log_invocation
 
-from pdfalyzer.config import ALL_STREAMS, PdfalyzerConfig
-from pdfalyzer.detection.constants.binary_regexes import QUOTE_PATTERNS
+from pdfalyzer.analysis_context import set_process_args
+from pdfalyzer.config import ALL_STREAMS, DEFAULT_PRUNING_SAMPLE_SIZE, PdfalyzerConfig
+from pdfalyzer.detection.constants.quote_patterns import QUOTE_PATTERNS
+from pdfalyzer.util.limits import (DEFAULT_CHARMAP_LIMITS, DEFAULT_MAX_MEMORY_BYTES, STREAM_OUTPUT, CharMapLimits,
+     RenderLimits, parse_size)
 
 # NamedTuple to keep our argument selection orderly
 OutputSection = namedtuple('OutputSection', ['argument', 'method'])
@@ -41,11 +41,25 @@ STREAMS = 'streams'
 DEFAULT_SECTIONS = [DOCINFO, TREE, RICH, FONTS, COUNTS, YARA]
 ALL_SECTIONS = DEFAULT_SECTIONS + [STREAMS]
 
-# Add one more option to yaralyzer's export options
+# Add a few more options to yaralyzer's export options
 export.add_argument('-bin', '--extract-binary-streams',
                     action='store_const',
                     const='bin',
-                    help='extract all binary streams in the PDF to separate files (requires pdf-parser.py)')
+                    help='extract all binary streams in the PDF to separate files along with a JSON manifest ' + \
+                         '(object IDs, filters, lengths, hashes)')
+
+export.add_argument('--raw-streams', action='store_true',
+                    help='with --extract-binary-streams also write the raw (still /Filter encoded) stream bytes')
+
+export.add_argument('--html-report', action='store_true',
+                    help='write a self contained HTML report of the tree that renders nodes and their property ' + \
+                         'tables in the browser when they are expanded (much smaller and faster than -html for ' + \
+                         'big PDFs). other analysis selections are ignored.')
+
+export.add_argument('-ndjson', '--ndjson', action='store_true',
+                    help='write the selected sections to stdout as newline delimited JSON events (one per node, ' + \
+                         'relationship, font, YARA match, stream, etc.) instead of rich text. other export ' + \
+                         'options are ignored.')
 
 
 #  Note that we extend the yaralyzer's parser and export
@@ -90,6 +104,17 @@ select.add_argument('-s', '--streams',
                     metavar='ID',
                     type=int)
 
+select.add_argument('--triage', action='store_true',
+                    help="count dangerous PDF keys (including hex escaped variants) and obj/stream/xref tokens " + \
+                         "in the raw bytes pdfid style and exit. the PDF is never parsed so this is very fast " + \
+                         "and works on malformed files but objects inside compressed object streams can't be seen. " + \
+                         "other analysis selections are ignored.")
+
+select.add_argument('--browse', action='store_true',
+                    help="browse the PDF tree interactively in the terminal. only what's on screen is rendered so " + \
+                         "this works on huge documents. nodes can be searched for by ID, label, or address. " + \
+                         "other analysis selections are ignored.")
+
 select.add_argument('--extract-quoted',
                     help="extract and force decode all bytes found between this kind of quotation marks " + \
                          "(requires --streams. can be specified more than once)",
@@ -97,6 +122,15 @@ select.add_argument('--extract-quoted',
                     dest='extract_quoteds',
                     action='append')
 
+select.add_argument('--prune-encodings',
+                    help="rank the encodings by how often they decode the first N matches of each --extract-quoted " + \
+                         "pattern in each stream and stop attempting the ones that almost never decode " + \
+                         f"(N defaults to {DEFAULT_PRUNING_SAMPLE_SIZE})",
+                    const=DEFAULT_PRUNING_SAMPLE_SIZE,
+                    metavar='N',
+                    nargs='?',
+                    type=int)
+
 select.add_argument('--suppress-boms', action='store_true',
                     help="don't scan streams for byte order marks (suppresses some of the --streams output)")
 
@@ -105,29 +139,128 @@ select.add_argument('--preview-stream-length',
                     metavar='BYTES',
                     type=int)
 
+select.add_argument('--max-depth',
+                    help='only render the tree (-t and -r) down to this many levels below the root',
+                    metavar='DEPTH',
+                    type=int)
+
+select.add_argument('--max-children',
+                    help="only render the first N children of each node in the tree (-t and -r). the rest are " + \
+                         "summarized in a single row",
+                    metavar='N',
+                    type=int)
+
+select.add_argument('--max-nodes',
+                    help='stop rendering the tree (-t and -r) after this many nodes',
+                    metavar='N',
+                    type=int)
+
+select.add_argument('--tree-root',
+                    help='render the subtree starting at this object ID instead of the whole tree (-t and -r)',
+                    metavar='ID',
+                    type=int)
+
+select.add_argument('--max-charmap-entries',
+                    help='show at most this many entries of each font\'s character mapping (-f). a summary of ' + \
+                         'ranges, unicode blocks, and suspicious or unmapped codes is always shown',
+                    default=DEFAULT_CHARMAP_LIMITS.max_entries,
+                    metavar='N',
+                    type=int)
+
+select.add_argument('--max-charmap-rows',
+                    help='show at most this many rows in each of the character mapping summary tables (-f)',
+                    default=DEFAULT_CHARMAP_LIMITS.max_rows,
+                    metavar='N',
+                    type=int)
+
+select.add_argument('--charmap-dir',
+                    help="write each font's complete character mapping and prepared CMap to a file in DIR (-f)",
+                    metavar='DIR')
+
+select.add_argument('--max-memory',
+                    help="ceiling on the memory traced while building the tree (e.g. 512MB or 2GB). when it's hit " + \
+                         "decoded stream data is dropped, then symlinks for non-tree relationships are skipped, " + \
+                         "then -r is printed like -t. if that's not enough the analysis fails with a --memory-report",
+                    metavar='SIZE',
+                    type=parse_size)
+
+select.add_argument('--memory-report', action='store_true',
+                    help='trace memory while building the tree and show how much was allocated in each phase, ' + \
+                         'for each type of node, etc. (slows things down)')
+
+select.add_argument('--stream-memory',
+                    help='keep at most this much decoded stream data in memory (e.g. 256MB); the least recently ' + \
+                         'used streams are spilled to a temporary directory and read back when they are needed',
+                    metavar='SIZE',
+                    type=parse_size)
+
+select.add_argument('--spill-dir',
+                    help='make the temporary directory for --stream-memory spills in DIR (implies --stream-memory ' + \
+                         f'{DEFAULT_MAX_MEMORY_BYTES // 1024 ** 2}MB if it is not given)',
+                    metavar='DIR')
+
 # Make sure the selection section is at the top
 parser._action_groups = parser._action_groups[:2] + [parser._action_groups[-1]] + parser._action_groups[2:-1]
 
 
-# The Parsening Begins
-def parse_arguments():
-    """Parse command line args. Most settings are communicated to the app by setting env vars"""
-    if '--version' in sys.argv:
-        print(f"pdfalyzer {version('pdfalyzer')}")
-        sys.exit()
+# pdfalyzer_daemon has its own much smaller set of args; per job options are sent along with the jobs
+daemon_parser = ArgumentParser(
+    formatter_class=RichHelpFormatterPlus,
+    description="Keep the pdfalyzer (imports, compiled YARA rules, caches) warm in a long running process that " + \
+                "accepts analysis jobs as JSON over a unix domain socket or a localhost HTTP endpoint.")
+
+listen = daemon_parser.add_mutually_exclusive_group(required=True)
+
+listen.add_argument('--socket',
+                    help='listen for newline delimited JSON jobs on a unix domain socket at PATH',
+                    metavar='PATH')
+
+listen.add_argument('--port',
+                    help='listen for JSON jobs POSTed to http://127.0.0.1:PORT/analyze',
+                    metavar='PORT',
+                    type=int)
 
-    args = parser.parse_args()
+daemon_parser.add_argument('--cache-size',
+                           help='number of job results to keep in memory (keyed on file path, mtime, size, and job)',
+                           default=32,
+                           metavar='N',
+                           type=int)
+
+daemon_parser.add_argument('--keep-decodes',
+                           action='store_true',
+                           help='remember force decode results across jobs instead of starting over for each job ' + \
+                                '(bytes already decoded by an earlier job are counted but not decoded or shown again)')
+
+
+# The Parsening Begins
+def parse_arguments(argv: Optional[List[str]] = None):
+    """
+    Parse command line args. Most settings are communicated to the app by setting env vars.
+    argv defaults to sys.argv; pass a list to build args for an analysis that's not from the command line.
+    """
+    args = parser.parse_args(argv)
     args = parse_yaralyzer_args(args)
-    log_invocation()
+
+    if argv is None:
+        log_invocation()
 
     if not args.streams:
         if args.extract_quoteds:
             raise ArgumentError(None, "--extract-quoted does nothing if --streams is not selected")
         if args.suppress_boms:
             log.warning("--suppress-boms has nothing to suppress if --streams is not selected")
+        if args.prune_encodings:
+            log.warning("--prune-encodings does nothing if --streams is not selected")
+
+    if args.prune_encodings is not None and args.prune_encodings < 1:
+        raise ArgumentError(None, "--prune-encodings must be at least 1")
+
+    for limit in ['max_depth', 'max_children', 'max_nodes', 'max_charmap_entries', 'max_charmap_rows']:
+        if vars(args)[limit] is not None and vars(args)[limit] < 0:
+            raise ArgumentError(None, f"--{limit.replace('_', '-')} can't be negative")
 
     # File export options
-    if args.export_svg or args.export_txt or args.export_html or args.extract_binary_streams:
+    if args.export_svg or args.export_txt or args.export_html or args.extract_binary_streams or args.html_report:
         args.output_dir = args.output_dir or getcwd()
         file_prefix = (args.file_prefix + '__') if args.file_prefix else ''
         args.file_suffix = ('_' + args.file_suffix) if args.file_suffix else ''
@@ -135,13 +268,27 @@ def parse_arguments():
     elif args.output_dir:
         log.warning('--output-dir provided but no export option was chosen')
 
+    if args.ndjson and (args.export_svg or args.export_txt or args.export_html):
+        log.warning("--ndjson output goes to stdout; the other export options will be ignored")
+
+    if args.charmap_dir and not path.isdir(args.charmap_dir):
+        raise ArgumentError(None, f"--charmap-dir '{args.charmap_dir}' is not a directory")
+
+    if args.raw_streams and not args.extract_binary_streams:
+        log.warning("--raw-streams does nothing if --extract-binary-streams is not selected")
+
     args.extract_quoteds = args.extract_quoteds or []
-    PdfalyzerConfig._args = args
+    set_process_args(args)
     log_argparse_result(args, 'parsed')
     log_current_config()
     return args
 
 
+def parse_daemon_arguments():
+    """Parse the args for the pdfalyzer_daemon command."""
+    return daemon_parser.parse_args()
+
+
 def output_sections(args, pdfalyzer) -> List[OutputSection]:
     """
     Determine which of the tree visualizations, font scans, etc were requested.
@@ -152,14 +299,24 @@ def output_sections(args, pdfalyzer) -> List[OutputSection]:
     stream_id = None if args.streams == ALL_STREAMS else args.streams
     stream_scan = partial(pdfalyzer.print_streams_analysis, idnum=stream_id)
     update_wrapper(stream_scan, pdfalyzer.print_streams_analysis)
+    # Same for the tree views and the render limits
+    render_limits = RenderLimits(args.max_depth, args.max_children, args.max_nodes, args.tree_root)
+    print_tree = partial(pdfalyzer.print_tree, limits=render_limits)
+    update_wrapper(print_tree, pdfalyzer.print_tree)
+    print_rich_tree = partial(pdfalyzer.print_rich_table_tree, limits=render_limits)
+    update_wrapper(print_rich_tree, pdfalyzer.print_rich_table_tree)
+    # Same for the fonts and the character mapping limits
+    charmap_limits = CharMapLimits(args.max_charmap_entries, args.max_charmap_rows, full_output_dir=args.charmap_dir)
+    print_font_info = partial(pdfalyzer.print_font_info, charmap_limits=charmap_limits)
+    update_wrapper(print_font_info, pdfalyzer.print_font_info)
 
     # The first element string matches the argument in 'select' group.
     # Top to bottom is the default order of output.
     possible_output_sections = [
         OutputSection(DOCINFO, pdfalyzer.print_document_info),
-        OutputSection(TREE, pdfalyzer.print_tree),
-        OutputSection(RICH, pdfalyzer.print_rich_table_tree),
-        OutputSection(FONTS, pdfalyzer.print_font_info),
+        OutputSection(TREE, print_tree),
+        OutputSection(RICH, print_rich_tree),
+        OutputSection(FONTS, print_font_info),
         OutputSection(COUNTS, pdfalyzer.print_summary),
         OutputSection(YARA, pdfalyzer.print_yara_results),
         OutputSection(STREAMS, stream_scan),
@@ -169,9 +326,21 @@ def output_sections(args, pdfalyzer) -> List[OutputSection]:
 
     if len(output_sections) == 0:
         log_and_print("No output section specified so outputting all sections except --streams...")
-        return [section for section in possible_output_sections if section.argument != STREAMS]
-    else:
-        return output_sections
+        output_sections = [section for section in possible_output_sections if section.argument != STREAMS]
+
+    # The rich tree view is built in memory all at once; the simple tree view's lines are printed as they're made
+    if pdfalyzer.pdfalyzer.is_degraded(STREAM_OUTPUT) and any(s.argument == RICH for s in output_sections):
+        log.warning("Memory ceiling was hit so the simple tree view will be shown instead of the rich tree view")
+        has_tree = any(s.argument == TREE for s in output_sections)
+        output_sections = [s for s in output_sections if not (s.argument == RICH and has_tree)]
+        output_sections = [OutputSection(TREE, print_tree) if s.argument == RICH else s for s in output_sections]
+
+    return output_sections
+
+
+def selected_sections(args) -> List[str]:
+    """Names of the sections chosen in args, or DEFAULT_SECTIONS if none were chosen. Prints nothing."""
+    return [section for section in ALL_SECTIONS if vars(args)[section]] or DEFAULT_SECTIONS
 
 
 def all_sections_chosen(args):
@@ -1,2 +1,13 @@
 class PdfWalkError(RuntimeError):
     """For errors that arise while walking the document tree"""
+
+
+class MemoryLimitExceeded(RuntimeError):
+    """Traced memory is over the --max-memory ceiling even after all the degradations have been applied"""
+    def __init__(self, message: str, report: dict):
+        super().__init__(message)
+        self.report = report
+
+
+class AnalysisCancelled(RuntimeError):
+    """Raised inside an analysis (at the next phase or event) after whoever was waiting on it gave up"""
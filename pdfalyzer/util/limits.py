@@ -0,0 +1,46 @@
+"""
+Limits and sizes the command line options set. Nothing here imports anything outside the standard library so the
+argument parser can use it without loading anytree, rich, or the analysis modules.
+"""
+import re
+from typing import NamedTuple, Optional
+
+DEFAULT_MAX_MEMORY_BYTES = 1024 ** 3  # Default --stream-memory budget when only --spill-dir is given
+SIZE_REGEX = re.compile(r'^(\d+(?:\.\d+)?)\s*([KMGT]?)B?$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+# Ways to use less memory when over the --max-memory ceiling, in the order they're applied
+DROP_STREAM_DATA = 'drop_stream_data'  # Forget nodes' decoded stream data (--streams can't scan them)
+SKIP_SYMLINKS = 'skip_symlinks'        # Stop creating SymlinkNodes for non-tree relationships
+STREAM_OUTPUT = 'stream_output'        # Print the rich tree view (-r) as the batched lines of the simple tree (-t)
+DEGRADATIONS = [DROP_STREAM_DATA, SKIP_SYMLINKS, STREAM_OUTPUT]
+
+
+class RenderLimits(NamedTuple):
+    max_depth: Optional[int] = None     # Depth of the deepest nodes shown (the root of the render is depth 0)
+    max_children: Optional[int] = None  # Max children shown per node, the rest are summarized in one row
+    max_nodes: Optional[int] = None     # Total number of nodes shown
+    root_idnum: Optional[int] = None    # Render the subtree starting at this node instead of the whole tree
+
+
+NO_LIMITS = RenderLimits()
+
+
+class CharMapLimits(NamedTuple):
+    max_entries: int = 256                  # Entries of each font's character mapping shown as a sample
+    max_rows: int = 20                      # Rows in each of the ranges, blocks, suspicious, and unmapped tables
+    max_prepared_bytes: int = 4096          # Bytes of the prepared CMap shown
+    full_output_dir: Optional[str] = None   # Write each font's complete mapping and prepared CMap to a file here
+
+
+DEFAULT_CHARMAP_LIMITS = CharMapLimits()
+
+
+def parse_size(size: str) -> int:
+    """Parse sizes like '512MB', '2G', '1.5GB', or '1048576' into a number of bytes."""
+    match = SIZE_REGEX.match(size.strip())
+
+    if match is None:
+        raise ValueError(f"Can't parse '{size}' as a size (try something like 512MB or 2GB)")
+
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
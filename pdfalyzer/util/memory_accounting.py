@@ -0,0 +1,195 @@
+"""
+tracemalloc based accounting of the memory allocated while building the tree. Allocations are attributed to the
+Pdfalyzer's PHASES and to the types of the nodes that were being built when they happened.
+
+There can also be a ceiling on traced memory. If it's over the ceiling at a check the next of the DEGRADATIONS
+is applied. The one after that is only applied if memory keeps growing past where it was when the last one was
+applied. If it's still over the ceiling once they have all been applied MemoryLimitExceeded is raised with a
+report of where the memory went.
+"""
+import sys
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional
+
+from anytree import LevelOrderIter, SymlinkNode
+from yaralyzer.output.rich_console import console
+from yaralyzer.util.logging import log
+
+from pdfalyzer.util.exceptions import MemoryLimitExceeded
+from pdfalyzer.util.limits import DEGRADATIONS, DROP_STREAM_DATA, SKIP_SYMLINKS, STREAM_OUTPUT, parse_size
+
+if TYPE_CHECKING:
+    from pdfalyzer.pdfalyzer import Pdfalyzer
+
+CHECK_INTERVAL = 100  # Nodes built (or symlinked) between checks of the ceiling
+TOP_ALLOCATIONS = 10  # Source lines with the most memory allocated in the report
+
+
+class PhaseMemory(NamedTuple):
+    allocated: int  # Net bytes allocated (and not freed) during the phase
+    peak: int       # Max traced bytes at any point during the phase
+
+
+class MemoryAccountant:
+    def __init__(self, max_bytes: Optional[int] = None):
+        """max_bytes is the optional ceiling on traced memory."""
+        self.max_bytes = max_bytes
+        self.phases: Dict[str, PhaseMemory] = {}
+        self.node_type_counts: Dict[str, int] = defaultdict(int)
+        self.node_type_bytes: Dict[str, int] = defaultdict(int)  # Bytes allocated while building nodes of each type
+        self.degradations: List[str] = []
+        self.peak_bytes = 0
+        self._degraded_at_bytes = 0  # Traced bytes when the last degradation was applied
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start tracing allocations if something else hasn't already."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        """Stop tracing allocations if this accountant started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """Record the memory allocated during a phase. Can be used as a Pdfalyzer phase_hook."""
+        start_bytes = self.traced_bytes()
+        tracemalloc.reset_peak()
+        yield
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        self.phases[phase] = PhaseMemory(current_bytes - start_bytes, peak_bytes)
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+    def node_built(self, node_type: str, start_bytes: int) -> None:
+        """Attribute the bytes allocated since traced_bytes() was start_bytes to building a node_type node."""
+        self.node_type_counts[node_type] += 1
+        self.node_type_bytes[node_type] += self.traced_bytes() - start_bytes
+
+    def check(self, pdfalyzer: 'Pdfalyzer', final: bool = False) -> None:
+        """
+        If traced memory is over the ceiling apply the next degradation or raise if there's none left. The final
+        check (once the tree is built) applies whatever degradations are left right away and raises if that's
+        not enough.
+        """
+        traced_bytes = self.traced_bytes()
+
+        if self.max_bytes is None or traced_bytes <= self.max_bytes:
+            return
+
+        degradation = next((d for d in DEGRADATIONS if d not in self.degradations), None)
+
+        if degradation is None:
+            raise MemoryLimitExceeded(
+                f"Traced memory ({traced_bytes:,} bytes) is still over the {self.max_bytes:,} byte ceiling " + \
+                f"after applying {', '.join(self.degradations)}",
+                self.report(pdfalyzer)
+            )
+
+        # Give the last degradation a chance to work before applying another one
+        if traced_bytes <= self._degraded_at_bytes and not final:
+            return
+
+        log.warning(f"Traced memory ({traced_bytes:,} bytes) is over the {self.max_bytes:,} byte ceiling, " + \
+                    f"applying {degradation}...")
+
+        self.degradations.append(degradation)
+
+        if degradation == DROP_STREAM_DATA:
+            pdfalyzer.drop_stream_data()
+
+        self._degraded_at_bytes = self.traced_bytes()
+
+        if final:
+            self.check(pdfalyzer, final)
+
+    def is_degraded(self, degradation: str) -> bool:
+        return degradation in self.degradations
+
+    def report(self, pdfalyzer: 'Pdfalyzer') -> dict:
+        """Where the memory went: by phase, by node type, for the usual suspects, and by source line."""
+        nodes = list(pdfalyzer.nodes_encountered.values())
+        symlinks = [n for n in LevelOrderIter(pdfalyzer.pdf_tree) if isinstance(n, SymlinkNode)]
+        stream_bytes = defaultdict(int)
+
+        # Sizes come from stream_length so data spilled by a StreamDataStore isn't read back just to measure it
+        for node in nodes:
+            stream_bytes[node.type] += max(node.stream_length, 0) if node.has_stream_data() else 0
+
+        node_types = {
+            node_type: {
+                'count': self.node_type_counts[node_type],
+                'allocated': allocated,
+                'stream_bytes': stream_bytes[node_type],
+            }
+            for node_type, allocated in sorted(self.node_type_bytes.items(), key=lambda kv: kv[1], reverse=True)
+        }
+
+        record_buffer = console._record_buffer
+        stream_data_store = getattr(pdfalyzer, 'stream_data_store', None)
+
+        suspects = {
+            'pdf_bytes': len(getattr(pdfalyzer, 'pdf_bytes', b'')),
+            'stream_data': stream_data_store.memory_bytes if stream_data_store else sum(stream_bytes.values()),
+            'stream_data_spilled_to_disk': stream_data_store.spilled_bytes if stream_data_store else 0,
+            'symlinks': sum(sys.getsizeof(symlink) + sys.getsizeof(symlink.__dict__) for symlink in symlinks),
+            # One list so maps shared by several fonts through the FontCache are only counted once. Looking in
+            # __dict__ means the char maps that haven't been lazily built yet aren't built just to measure them.
+            'font_char_maps': _deep_sizeof([
+                font_info.__dict__.get(attr)
+                for font_info in pdfalyzer.font_infos
+                for attr in ['_char_map', 'prepared_char_map', 'character_mapping']
+            ]),
+            'console_record_buffer': _deep_sizeof(record_buffer) if isinstance(record_buffer, list) else 0,
+        }
+
+        return {
+            'max_bytes': self.max_bytes,
+            'traced_bytes': self.traced_bytes(),
+            'peak_bytes': max(self.peak_bytes, tracemalloc.get_traced_memory()[1]),
+            'degradations': list(self.degradations),
+            'phases': {phase: phase_memory._asdict() for phase, phase_memory in self.phases.items()},
+            'node_types': node_types,
+            'symlink_count': len(symlinks),
+            'suspects': suspects,
+            'top_allocations': _top_allocations(),
+        }
+
+    @staticmethod
+    def traced_bytes() -> int:
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _top_allocations() -> List[dict]:
+    if not tracemalloc.is_tracing():
+        return []
+
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    return [
+        {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", 'bytes': stat.size}
+        for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+    ]
+
+
+def _deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Size of obj plus the size of whatever is in it if it's a builtin container."""
+    seen = set() if seen is None else seen
+
+    if obj is None or id(obj) in seen:
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(element, seen) for element in obj)
+
+    return size
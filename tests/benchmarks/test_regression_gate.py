@@ -0,0 +1,78 @@
+import json
+from os import path
+
+import pytest
+
+from benchmarks.regression_gate import (BASELINE_ERROR_EXIT_CODE, BASELINE_PATH, FASTER, FIXTURE_PDFS, NEW, OK,
+     PEAK_MEMORY, REGRESSION, SYNTHETIC_PDFS, TOTAL, compare, main, measure_pdf)
+from benchmarks.synthetic_pdf import SyntheticPdfSpec, write_synthetic_pdf
+from pdfalyzer.pdfalyzer import PHASES
+
+MB = 1024 * 1024
+
+
+def _results(calibration_seconds=0.1, peak_memory=10 * MB, **phases):
+    return {
+        'calibration_seconds': calibration_seconds,
+        'pdfs': {
+            'a.pdf': {
+                'phases': {phase: {'fastest': seconds, 'noise': 0.0} for phase, seconds in phases.items()},
+                PEAK_MEMORY: peak_memory,
+            }
+        }
+    }
+
+
+def _statuses(comparisons):
+    return {c.metric: c.status for c in comparisons}
+
+
+def test_compare():
+    baseline = _results(walk=1.0, verify=1.0, parse=1.0)
+    current = _results(walk=1.1, verify=2.0, parse=0.2, extract_fonts=0.1, peak_memory=20 * MB)
+    assert _statuses(compare(baseline, current)) == {
+        'walk': OK,
+        'verify': REGRESSION,
+        'parse': FASTER,
+        'extract_fonts': NEW,
+        PEAK_MEMORY: REGRESSION,
+    }
+
+
+def test_compare_scales_by_calibration():
+    baseline = _results(calibration_seconds=0.1, walk=1.0)
+    current = _results(calibration_seconds=0.2, walk=2.0)
+    assert _statuses(compare(baseline, current))['walk'] == OK
+    assert _statuses(compare(baseline, current, scale_timings=False))['walk'] == REGRESSION
+
+
+def test_compare_ignores_noise():
+    baseline = _results(walk=0.001)
+    current = _results(walk=0.01)
+    assert _statuses(compare(baseline, current))['walk'] == OK
+    noisy_baseline = _results(walk=1.0)
+    noisy_baseline['pdfs']['a.pdf']['phases']['walk']['noise'] = 0.5
+    assert _statuses(compare(noisy_baseline, _results(walk=2.0)))['walk'] == OK
+
+
+def test_measure_pdf(tmp_dir):
+    pdf_path = path.join(tmp_dir, 'synthetic.pdf')
+    write_synthetic_pdf(SyntheticPdfSpec(pages=2, fonts=1, streams=2), pdf_path)
+    results = measure_pdf(pdf_path, repeat=2)
+    assert list(results['phases'].keys()) == [*PHASES, TOTAL]
+    assert results[PEAK_MEMORY] > 0
+
+
+def test_baseline_covers_gated_pdfs():
+    with open(BASELINE_PATH) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    gated_pdfs = [path.basename(pdf) for pdf in FIXTURE_PDFS] + list(SYNTHETIC_PDFS.keys())
+    assert sorted(baseline['pdfs'].keys()) == sorted(gated_pdfs)
+
+
+def test_missing_baseline(tmp_dir):
+    with pytest.raises(SystemExit) as exc_info:
+        main(['--baseline', path.join(tmp_dir, 'nonexistent.json')])
+
+    assert exc_info.value.code == BASELINE_ERROR_EXIT_CODE
@@ -0,0 +1,24 @@
+from os import path
+
+from benchmarks.synthetic_pdf import SyntheticPdf, SyntheticPdfSpec, write_synthetic_pdf
+from pdfalyzer.pdfalyzer import PHASES, Pdfalyzer
+
+SPEC = SyntheticPdfSpec(pages=6, page_tree_depth=2, annots_per_page=3, fonts=2, streams=8)
+
+
+def test_same_spec_same_bytes():
+    assert SyntheticPdf(SPEC).build() == SyntheticPdf(SPEC).build()
+    assert SyntheticPdf(SPEC).build() != SyntheticPdf(SPEC._replace(seed=1)).build()
+
+
+def test_synthetic_pdf_shape(tmp_dir):
+    pdf_path = path.join(tmp_dir, 'synthetic.pdf')
+    assert write_synthetic_pdf(SPEC, pdf_path) == path.getsize(pdf_path)
+    pdfalyzer = Pdfalyzer(pdf_path)
+    pages = {node.idnum for node in pdfalyzer.node_iterator() if node.type == '/Page'}
+    annots = {node.idnum for node in pdfalyzer.node_iterator() if node.type == '/Annot'}
+    assert len(pages) == SPEC.pages
+    assert len(annots) == SPEC.pages * SPEC.annots_per_page
+    assert len(pdfalyzer.font_infos) == SPEC.fonts
+    assert len(pdfalyzer.stream_nodes()) == SPEC.streams + 2 * SPEC.fonts
+    assert list(pdfalyzer.phase_timings.keys()) == PHASES
@@ -0,0 +1,102 @@
+import pytest
+from rich.text import Text
+from yaralyzer.bytes_match import BytesMatch
+from yaralyzer.decoding.bytes_decoder import BytesDecoder
+from yaralyzer.output.rich_console import console
+from yaralyzer.yara.yara_rule_builder import REGEX
+
+from pdfalyzer.analysis_context import AnalysisContext
+from pdfalyzer.binary.binary_scanner import BinaryScanner
+from pdfalyzer.binary.decode_memo import DecodeMemo, decode_memo_key
+from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.argument_parser import parse_arguments
+
+# The same text shown over and over like a content stream does; the middle repeats have identical surroundings
+REPEATED_TEXT = b"BT /F1 12 Tf (eval me) Tj ET\n" * 40
+
+
+@pytest.fixture(autouse=True)
+def streams_args(analyzing_malicious_pdf_path):
+    """BytesMatch reads the number of surrounding bytes from the parsed args."""
+    parse_arguments([analyzing_malicious_pdf_path, '--streams'])
+
+
+def test_decode_memo_key():
+    key = _key(b"xx(eval)yy(eval)xx", 3)
+    assert key == _key(b"xx(eval)yy(eval)xx", 3)
+    assert key != _key(b"zz(eval)yy(eval)xx", 3)
+
+
+def test_decode_memo_key_includes_decode_options(analyzing_malicious_pdf_path):
+    key = _key(b"xx(eval)yy(eval)xx", 3)
+
+    with AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--suppress-chardet']).activate():
+        assert _key(b"xx(eval)yy(eval)xx", 3) != key
+
+    with AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--max-decode-length', '9']).activate():
+        assert _key(b"xx(eval)yy(eval)xx", 3) != key
+
+    assert _key(b"xx(eval)yy(eval)xx", 3) == key
+
+
+def test_decode_memo_forgets_least_recently_used():
+    memo = DecodeMemo(max_entries=2)
+    decoders = {i: BytesDecoder(_bytes_match(b"ab(cd)ef" + bytes([i]), 3), 'test') for i in range(3)}
+
+    for i in [0, 1]:
+        memo.put(decode_memo_key(decoders[i].bytes_match), decoders[i], f"match {i}")
+
+    assert memo.get(decode_memo_key(decoders[0].bytes_match)).first_match == 'match 0'
+    memo.put(decode_memo_key(decoders[2].bytes_match), decoders[2], 'match 2')
+    assert memo.get(decode_memo_key(decoders[1].bytes_match)) is None
+    assert len(memo) == 2
+    assert (memo.hits, memo.misses) == (1, 1)
+
+
+def test_repeated_matches_are_counted_but_decoded_once():
+    memo = DecodeMemo()
+    scanner = BinaryScanner(REPEATED_TEXT, None, Text('repeats'), memo)
+
+    yaralyzer = scanner._pattern_yaralyzer('eval', REGEX)
+
+    with console.capture() as capture:
+        scanner.process_yara_matches(yaralyzer, 'eval', force=True)
+
+    stats = scanner.regex_extraction_stats['eval']
+    assert stats.match_count == 40
+    assert len(memo) < 40
+    assert memo.hits == 40 - len(memo)
+    assert sum(encoding_stats.match_count for encoding_stats in stats.per_encoding_stats.values()) > 40
+    assert "Repeated Matches" in capture.get()
+    assert yaralyzer.extraction_stats.match_count == 40
+
+    # Everything is a repeat the second time around
+    memo_size = len(memo)
+    scanner.process_yara_matches(scanner._pattern_yaralyzer('eval', REGEX), 'eval', force=True)
+    assert stats.match_count == 80
+    assert len(memo) == memo_size
+
+
+def test_context_decode_memo():
+    memo = DecodeMemo()
+    assert BinaryScanner(REPEATED_TEXT, None, Text('repeats'), context=AnalysisContext(decode_memo=memo)).decode_memo is memo
+    assert BinaryScanner(REPEATED_TEXT, None, Text('repeats'), context=AnalysisContext()).decode_memo is not memo
+
+
+def test_each_pdfalyzer_has_its_own_memo(analyzing_malicious_pdf_path):
+    first_run = PdfalyzerPresenter(Pdfalyzer(analyzing_malicious_pdf_path))
+    second_run = PdfalyzerPresenter(Pdfalyzer(analyzing_malicious_pdf_path))
+    assert first_run.context.decode_memo is not second_run.context.decode_memo
+
+    shared_memo = DecodeMemo()
+    context = AnalysisContext(decode_memo=shared_memo)
+    assert PdfalyzerPresenter(Pdfalyzer(analyzing_malicious_pdf_path, context=context)).context.decode_memo is shared_memo
+
+
+def _bytes_match(_bytes: bytes, start_idx: int) -> BytesMatch:
+    return BytesMatch(_bytes, start_idx, 4, 'test', ordinal=1)
+
+
+def _key(_bytes: bytes, start_idx: int):
+    return decode_memo_key(_bytes_match(_bytes, start_idx))
@@ -0,0 +1,72 @@
+import pytest
+from rich.text import Text
+from yaralyzer.output.regex_match_metrics import RegexMatchMetrics
+from yaralyzer.output.rich_console import console
+
+from pdfalyzer.binary.binary_scanner import BinaryScanner
+from pdfalyzer.binary.decode_memo import DecodeMemo
+from pdfalyzer.binary.encoding_pruner import PruningBytesDecoder, encodings_to_prune, rank_encodings
+from pdfalyzer.detection.constants.binary_regexes import BACKTICK, QUOTE_PATTERNS
+from pdfalyzer.output.tables.decoding_stats_table import build_decoding_stats_table
+from pdfalyzer.util.argument_parser import parse_arguments
+
+SAMPLE_SIZE = 5
+# Backtick quoted high bit bytes that are never ASCII. The separators between them are quoted too, hence 59 matches.
+HIGH_BIT_QUOTEDS = b'\xff'.join(b'`' + bytes([0x80 + i, 0xE9, 0xF0 + i % 8, 0xA0]) + b'`' for i in range(30))
+
+
+@pytest.fixture(autouse=True)
+def streams_args(analyzing_malicious_pdf_path):
+    parse_arguments([analyzing_malicious_pdf_path, '--streams', '--prune-encodings', str(SAMPLE_SIZE)])
+
+
+def test_rank_encodings():
+    stats = RegexMatchMetrics()
+    stats.match_count = 10
+    stats.per_encoding_stats['ascii'].undecodable_count = 10
+    stats.per_encoding_stats['utf-8'].match_count = 10
+    stats.per_encoding_stats['utf-8'].forced_decode_count = 2
+    ranks = rank_encodings(stats)
+    assert [(r.encoding, r.attempts, r.easy_decode_rate) for r in ranks] == [('utf-8', 10, 0.8), ('ascii', 10, 0.0)]
+    assert encodings_to_prune(stats, 10) == frozenset(['ascii'])
+    assert encodings_to_prune(stats, 11) == frozenset()
+
+
+def test_pruning_decoder_renders_like_bytes_decoder():
+    scanner = BinaryScanner(HIGH_BIT_QUOTEDS, None, Text('high bits'), DecodeMemo())
+
+    with console.capture():
+        _bytes_match, decoder = next(scanner._quote_yaralyzer(QUOTE_PATTERNS[BACKTICK], BACKTICK).match_iterator())
+
+    with console.capture() as expected:
+        console.print(decoder)
+
+    with console.capture() as unpruned:
+        console.print(PruningBytesDecoder(decoder, frozenset()))
+
+    assert unpruned.get() == expected.get()
+    assert _encodings(PruningBytesDecoder(decoder, frozenset())) == _encodings(decoder)
+    assert 'ascii' not in _encodings(PruningBytesDecoder(decoder, frozenset(['ascii'])))
+
+
+def test_failing_encodings_are_pruned():
+    scanner = BinaryScanner(HIGH_BIT_QUOTEDS, None, Text('high bits'), DecodeMemo())
+    yaralyzer = scanner._quote_yaralyzer(QUOTE_PATTERNS[BACKTICK], BACKTICK)
+
+    with console.capture():
+        scanner.process_yara_matches(yaralyzer, 'backtick_quoted', sample_size=SAMPLE_SIZE)
+
+    stats = scanner.regex_extraction_stats['backtick_quoted']
+    assert stats.match_count == 59
+    assert 'ascii' in scanner.pruned_encodings['backtick_quoted']
+    assert 'iso-8859-1' not in scanner.pruned_encodings['backtick_quoted']
+    assert [rank.attempts for rank in rank_encodings(stats) if rank.encoding == 'ascii'] == [SAMPLE_SIZE]
+
+    with console.capture() as capture:
+        console.print(build_decoding_stats_table(scanner))
+
+    assert 'pruned_encodings' in capture.get()
+
+
+def _encodings(decoder):
+    return [decoding.encoding for decoding in decoder.decodings]
@@ -0,0 +1,101 @@
+from os import listdir, path
+
+from pdfalyzer.binary.stream_data_store import SPILL_DIR_PREFIX, StreamDataStore
+from pdfalyzer.pdfalyzer import Pdfalyzer
+
+
+def test_lru_eviction_and_spilling(tmp_dir):
+    store = StreamDataStore(max_memory_bytes=10, spill_dir=tmp_dir)
+    store.put(1, b'12345')
+    store.put(2, b'abcde')
+    assert store.memory_bytes == 10
+    assert store.spilled_bytes == 0
+
+    # Reading 1 makes 2 the least recently used so it's the one that gets spilled
+    assert store.get(1) == b'12345'
+    store.put(3, b'ABCDE')
+    assert store.is_spilled(2)
+    assert not store.is_spilled(1)
+    assert store.memory_bytes == 10
+    assert store.spilled_bytes == 5
+
+    # Reading 2 back from disk spills 1, which is now the least recently used
+    assert store.get(2) == b'abcde'
+    assert store.is_spilled(1)
+    assert store.memory_bytes == 10
+    assert len(store) == 3
+    assert store.get(4) is None
+
+    store.discard(2)
+    assert 2 not in store
+    assert store.spilled_bytes == 5
+    assert len(listdir(path.join(tmp_dir, _spill_dirs(tmp_dir)[0]))) == 1
+    store.close()
+    assert len(store) == 0
+    assert _spill_dirs(tmp_dir) == []
+
+
+def test_oversized_and_empty_data(tmp_dir):
+    store = StreamDataStore(max_memory_bytes=4, spill_dir=tmp_dir)
+    store.put('big', b'0123456789')
+    store.put('empty', b'')
+    assert store.memory_bytes == 0
+    assert store.get('big') == b'0123456789'
+    assert store.memory_bytes == 0
+
+    store = StreamDataStore(max_memory_bytes=0, spill_dir=tmp_dir)
+    store.put('empty', b'')
+    store.put('next', b'x')
+    assert store.get('empty') == b''
+
+
+def test_oversized_data_bypasses_lru(tmp_dir):
+    store = StreamDataStore(max_memory_bytes=10, spill_dir=tmp_dir)
+    store.put(1, b'1234')
+    store.put(2, b'abcd')
+    store.put('big', b'0123456789ABCDEF')
+
+    for _i in range(3):
+        assert store.get('big') == b'0123456789ABCDEF'
+
+    assert not (store.is_spilled(1) or store.is_spilled(2))
+    assert store.memory_bytes == 8
+    assert store.spilled_bytes == 16
+    store.close()
+
+
+def test_str_data(tmp_dir):
+    store = StreamDataStore(max_memory_bytes=6, spill_dir=tmp_dir)
+    store.put(1, 'héllo')
+    store.put(2, 'wörld')
+    assert store.is_spilled(1)
+    assert store.get(1) == 'héllo'
+    assert store.is_spilled(2)
+    assert store.get(2) == 'wörld'
+    store.close()
+
+
+def test_pdfalyzer_with_stream_data_store(analyzing_malicious_pdf_path, analyzing_malicious_pdfalyzer, tmp_dir):
+    store = StreamDataStore(max_memory_bytes=64 * 1024, spill_dir=tmp_dir)
+    pdfalyzer = Pdfalyzer(analyzing_malicious_pdf_path, stream_data_store=store)
+    assert store.spilled_bytes > 0
+    assert store.memory_bytes <= store.max_memory_bytes
+
+    for node in pdfalyzer.stream_nodes():
+        assert node.stream_data == analyzing_malicious_pdfalyzer.find_node_by_idnum(node.idnum).stream_data
+
+    # Font files' data is shared with their nodes instead of being stored twice
+    assert len(store) == len(pdfalyzer.stream_nodes())
+
+    for font_info, expected_font_info in zip(pdfalyzer.font_infos, analyzing_malicious_pdfalyzer.font_infos):
+        assert font_info.stream_data == expected_font_info.stream_data
+        assert font_info.stream_length == expected_font_info.stream_length
+
+        if font_info.font_file is not None:
+            assert font_info.binary_scanner.bytes == expected_font_info.stream_data
+
+    store.close()
+
+
+def _spill_dirs(tmp_dir):
+    return [dir for dir in listdir(tmp_dir) if dir.startswith(SPILL_DIR_PREFIX)]
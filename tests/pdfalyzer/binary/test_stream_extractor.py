@@ -0,0 +1,25 @@
+import json
+from os import path
+
+from yaralyzer.helpers.file_helper import files_in_dir
+
+from pdfalyzer.binary.stream_extractor import StreamExtractor
+
+
+def test_extract_all_streams(analyzing_malicious_pdfalyzer, tmp_path):
+    # pytest's tmp_path so a failed assertion can't leave extracted files behind in the shared tmp_dir
+    output_dir = str(tmp_path)
+    extractor = StreamExtractor(analyzing_malicious_pdfalyzer, output_dir, include_raw=True)
+    manifest = extractor.extract_all_streams()
+    assert [entry['idnum'] for entry in manifest] == [4, 411, 412, 416, 419, 421, 423, 424, 426]
+    assert manifest[0]['filters'] == ['/FlateDecode']
+    assert manifest[0]['decoded']['size'] == 104658
+    assert manifest[0]['raw']['size'] == 13916
+    # 9 decoded + 9 raw + the manifest
+    assert len(files_in_dir(output_dir)) == 19
+
+    with open(extractor.manifest_path) as manifest_file:
+        assert json.load(manifest_file)['streams'] == manifest
+
+    with open(path.join(output_dir, manifest[0]['decoded']['file']), 'rb') as stream_file:
+        assert stream_file.read() == analyzing_malicious_pdfalyzer.find_node_by_idnum(4).stream_data
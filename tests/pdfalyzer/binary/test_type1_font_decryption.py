@@ -0,0 +1,56 @@
+import os
+from binascii import hexlify
+
+import pytest
+
+from pdfalyzer.binary.binary_scanner import BinaryScanner
+from pdfalyzer.binary.type1_font_decryption import (CHARSTRING_KEY, _decrypt_numpy, _decrypt_python, _numpy,
+     decrypt, decrypt_type1_font, encrypt)
+
+CLEARTEXT = b"%!PS-AdobeFont-1.0: Test 001\n/FontName /Test def\ncurrentfile eexec\n"
+CHARSTRING = b'\x8b\x8b\x0d\x0e'
+TRAILER = b"\n" + (b"0" * 64 + b"\n") * 8 + b"cleartomark\n"
+
+
+def _private_dict(charstring: bytes) -> bytes:
+    return b"dup /Private 8 dict dup begin /lenIV 4 def /CharStrings 1 dict dup begin /a " + \
+        b"%d RD " % len(charstring) + charstring + b" ND end /JavaScript (app.alert(1)) def end mark"
+
+
+@pytest.fixture
+def type1_font():
+    encrypted_charstring = encrypt(CHARSTRING, CHARSTRING_KEY, b'\x01\x02\x03\x04')
+    return CLEARTEXT + encrypt(_private_dict(encrypted_charstring), random_bytes=b'\xff' * 4) + TRAILER
+
+
+def test_decrypt():
+    plaintext = b'abc' * 1000
+    assert decrypt(encrypt(plaintext)) == plaintext
+    assert decrypt(encrypt(plaintext, CHARSTRING_KEY), CHARSTRING_KEY) == plaintext
+
+
+@pytest.mark.skipif(_numpy() is None, reason='numpy is not installed')
+def test_numpy_decryption_matches_python():
+    ciphertext = os.urandom(20_011)
+
+    for length in [1, 2, 3, 17, 4096, len(ciphertext)]:
+        assert _decrypt_numpy(_numpy(), ciphertext[:length], 55665) == _decrypt_python(ciphertext[:length], 55665)
+
+
+def test_decrypt_type1_font(type1_font):
+    assert decrypt_type1_font(b'/FontName /Test def') is None
+    assert decrypt_type1_font(type1_font) == CLEARTEXT + _private_dict(CHARSTRING)
+    encrypted_length = len(type1_font) - len(CLEARTEXT) - len(TRAILER)
+    assert decrypt_type1_font(type1_font, len(CLEARTEXT), encrypted_length) == CLEARTEXT + _private_dict(CHARSTRING)
+
+
+def test_decrypt_hex_encoded_type1_font(type1_font):
+    encrypted = type1_font[len(CLEARTEXT):-len(TRAILER)]
+    hex_font = CLEARTEXT + b"\n".join(hexlify(encrypted[i:i + 32]) for i in range(0, len(encrypted), 32)) + TRAILER
+    assert decrypt_type1_font(hex_font) == CLEARTEXT + _private_dict(CHARSTRING)
+
+
+def test_eexec_decrypted_scanner(type1_font):
+    assert b'/JavaScript' not in type1_font
+    assert BinaryScanner(b'/FontName /Test def', None).eexec_decrypted_scanner() is None
+    assert b'/JavaScript' in BinaryScanner(type1_font, None).eexec_decrypted_scanner().bytes
@@ -1,11 +1,49 @@
+from os import path
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import DecodedStreamObject, NameObject
+
 from pdfalyzer.detection.javascript_hunter import JavascriptHunter
+from pdfalyzer.pdfalyzer import Pdfalyzer
 
 TEST_STRING = 'export then gracefully exit before finally rising to the moon'
+JAVASCRIPT = 'var f = this.getField("a"); if (f) { for (var i = 0; i < 3; i++) { app.alert(i); } } ' + \
+             'function g() { return eval(unescape(s)); } try { this.exportDataObject({cName: "x"}); } catch (e) {}'
 
 
 def test_count_js_keywords_in_text():
-    assert JavascriptHunter.count_js_keywords_in_text(TEST_STRING) == 3
+    assert JavascriptHunter.count_js_keywords_in_text(TEST_STRING) == 2
 
 
 def test_js_keyword_matches():
-    assert JavascriptHunter.js_keyword_matches(TEST_STRING) == ['export', 'for', 'final']
+    assert JavascriptHunter.js_keyword_matches(TEST_STRING) == ['export', 'finally']
+    assert JavascriptHunter.js_keyword_matches('$this_var, varnish, var_, var') == ['var']
+    assert JavascriptHunter.js_keyword_matches('finally final finalize') == ['finally', 'final']
+
+
+def test_score_text():
+    score = JavascriptHunter.score_text(JAVASCRIPT)
+    assert score.is_likely_javascript
+    assert score == JavascriptHunter.score_text(JAVASCRIPT.encode())
+    assert {'var', 'function', 'eval', 'catch'} <= score.keywords
+    assert not JavascriptHunter.score_text(TEST_STRING * 10).is_likely_javascript
+
+
+def test_javascript_hunter(tmp_dir):
+    pdf_path = path.join(tmp_dir, 'javascript.pdf')
+    writer = PdfWriter()
+    writer.add_blank_page(72, 72)
+    writer.add_js(JAVASCRIPT)
+    js_stream = DecodedStreamObject()
+    js_stream.set_data(JAVASCRIPT.encode())
+    writer.pages[0][NameObject('/Unrelated')] = writer._add_object(js_stream)
+
+    with open(pdf_path, 'wb') as pdf_file:
+        writer.write(pdf_file)
+
+    pdfalyzer = Pdfalyzer(pdf_path)
+    likely_javascript = pdfalyzer.javascript_hunter.likely_javascript()
+    assert len(likely_javascript) == 2
+    assert sum(1 for _node, score in likely_javascript if score.js_key) == 1
+    prioritized = pdfalyzer.javascript_hunter.prioritize(pdfalyzer.stream_nodes())
+    assert pdfalyzer.javascript_hunter.score(prioritized[0]).is_likely_javascript
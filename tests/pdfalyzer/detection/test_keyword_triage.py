@@ -0,0 +1,49 @@
+from os import remove
+
+from pdfalyzer.detection.constants.binary_regexes import HEX_ENCODED_PDF_KEYS_TO_HUNT
+from pdfalyzer.detection.keyword_triage import TRIAGE_REGEX, KeywordTriage
+
+OBFUSCATED_PDF = b"""%PDF-1.4
+1 0 obj << /Type /Catalog /OpenAction 2 0 R /AA << >> >> endobj
+2 0 obj << /S /J#61vaScript /JS (app.alert(1)) >> endobj
+3 0 obj << /Length 4 >> stream
+/JSX
+endstream endobj
+xref
+trailer << /Root 1 0 R >>
+startxref
+"""
+
+
+def test_triage_regex_catches_hex_encoded_keys():
+    for key in HEX_ENCODED_PDF_KEYS_TO_HUNT:
+        assert TRIAGE_REGEX.fullmatch(key.encode())
+
+    assert TRIAGE_REGEX.search(b'/JSX') is None
+
+
+def test_keyword_triage(tmp_dir):
+    pdf_path = f"{tmp_dir}/obfuscated.pdf"
+
+    with open(pdf_path, 'wb') as pdf_file:
+        pdf_file.write(OBFUSCATED_PDF)
+
+    triage = KeywordTriage(pdf_path)
+    remove(pdf_path)
+    assert triage.is_suspicious()
+    assert triage.dangerous_keys_found() == ['/JavaScript', '/JS', '/OpenAction', '/AA']
+    assert triage.keyword_counts['/JavaScript'] == 1
+    assert triage.hex_escaped_counts['/JavaScript'] == 1
+    assert triage.hex_escaped_counts['/JS'] == 0
+    assert triage.token_counts['obj'] == 3
+    assert triage.token_counts['endobj'] == 3
+    assert triage.token_counts['stream'] == 1
+    assert triage.token_counts['endstream'] == 1
+    assert triage.token_counts['xref'] == 1
+    assert triage.token_counts['startxref'] == 1
+
+
+def test_keyword_triage_of_real_pdf(analyzing_malicious_pdf_path):
+    triage = KeywordTriage(analyzing_malicious_pdf_path)
+    assert triage.dangerous_keys_found() == ['/URI']
+    assert triage.token_counts['obj'] == 81
@@ -1,11 +1,43 @@
-from pdfalyzer.output.styles.node_colors import get_class_style, get_label_style
+import re
+
+from PyPDF2.generic import ArrayObject, NumberObject
+
+from pdfalyzer.output.styles import node_colors
+from pdfalyzer.output.styles.node_colors import (LABEL_STYLES, clear_style_caches, get_class_style,
+     get_class_style_dim, get_class_style_italic, get_label_style)
 
 
 def test_get_class_style():
     assert get_class_style({'a': 1}) == 'color(64)'
     assert get_class_style([1, 2]) == 'color(143)'
     assert get_class_style(5) == 'cyan bold'
+    assert get_class_style(NumberObject(5)) == 'cyan bold'
+    assert get_class_style_dim(NumberObject(5)) == 'cyan dim'
+    assert get_class_style_dim('abc') == 'color(244)'
+    assert get_class_style_dim([1, 2]) == 'color(143) dim'
+    assert get_class_style_italic(ArrayObject()) == f"{node_colors.PDF_ARRAY} italic"
 
 
 def test_get_label_style():
     assert get_label_style('/Contents') == 'medium_purple1'
+
+
+def test_label_style_cache_is_bounded():
+    for i in range(node_colors.LABEL_STYLE_CACHE_SIZE + 10):
+        get_label_style(f"/Kids[{i}]")
+
+    assert get_label_style.cache_info().currsize == node_colors.LABEL_STYLE_CACHE_SIZE
+
+
+def test_clear_style_caches():
+    assert get_label_style('/Custom') == 'yellow'
+    LABEL_STYLES.insert(0, [re.compile('^/Custom'), 'magenta'])
+
+    try:
+        clear_style_caches()
+        assert get_label_style('/Custom') == 'magenta'
+    finally:
+        LABEL_STYLES.pop(0)
+        clear_style_caches()
+
+    assert get_label_style('/Custom') == 'yellow'
@@ -0,0 +1,46 @@
+from os import path
+from types import SimpleNamespace
+
+from yaralyzer.output.rich_console import console
+
+from pdfalyzer.output.character_mapping import CharacterMappingSummary, print_character_mapping
+from pdfalyzer.output.render_limits import CharMapLimits
+
+# 2 byte codes like a CID font: <0100>-<4FFF> => U+4E00..., then a gap, a private use char, and a duplicate of <0100>
+CJK_MAPPING = {-1: 2, **{chr(code): chr(0x4E00 + code - 0x100) for code in range(0x100, 0x5000)}}
+CJK_MAPPING.update({chr(0x6000): '', chr(0x6001): '一'})
+
+
+def test_character_mapping_summary():
+    summary = CharacterMappingSummary(CJK_MAPPING)
+    assert len(summary.entries) == 0x4F00 + 2
+    assert summary.code_str(0x100) == '<0100>'
+    assert [(r.first_code, r.size) for r in summary.ranges if r.size > 1] == [(0x100, 0x4F00)]
+    assert summary.block_counts['CJK Unified Ideographs'] == 0x4F00 + 1
+    assert summary.block_counts['Private Use Area'] == 1
+    assert summary.suspicious_entries == [(0x6000, '', 'private use character')]
+    assert summary.unmapped_ranges[0][:2] == (0x5000, 0x5FFF)
+    assert summary.unmapped_count == 0x1000
+    assert summary.shared_text_count == 1
+
+
+def test_unmapped_codes_use_first_and_last_char():
+    summary = CharacterMappingSummary({'A': 'A', 'C': 'C', '\x7f': '\x7f'}, [32, 90])
+    assert [r[:2] for r in summary.unmapped_ranges] == [(32, 64), (66, 66), (68, 90)]
+    assert summary.suspicious_entries == [(127, '\x7f', 'control character')]
+
+
+def test_print_character_mapping_is_limited(tmp_dir):
+    font = SimpleNamespace(idnum=5, character_mapping=CJK_MAPPING, first_and_last_char=[None, None])
+    font.prepared_char_map = None
+    limits = CharMapLimits(max_entries=10, max_rows=3, full_output_dir=tmp_dir)
+
+    with console.capture() as capture:
+        print_character_mapping(font, limits)
+
+    output = capture.get()
+    assert f"Showing 10 of {len(CJK_MAPPING) - 1} entries" in output
+    assert "CJK Unified Ideographs" in output
+
+    with open(path.join(tmp_dir, 'font_5_charmap.txt'), encoding='utf-8') as charmap_file:
+        assert len(charmap_file.read().splitlines()) == len(CJK_MAPPING) - 1 + 2
@@ -0,0 +1,44 @@
+import json
+import re
+from io import StringIO
+from os import path, remove
+
+from pdfalyzer.output.html_report import META_ID, NODES_CHUNK_ID, PROPERTIES_CHUNK_ID, HtmlReport, _write_json_script
+
+SCRIPT_TAG_REGEX = re.compile(r'<script type="application/json" id="([\w-]+)">(.*?)</script>')
+
+
+def test_html_report(analyzing_malicious_pdfalyzer, tmp_dir):
+    report_path = path.join(tmp_dir, 'report.html')
+    report = HtmlReport(analyzing_malicious_pdfalyzer, nodes_per_chunk=100)
+    report.write(report_path)
+
+    with open(report_path, encoding='utf-8') as f:
+        html = f.read()
+
+    remove(report_path)
+    json_scripts = {element_id: json.loads(data) for element_id, data in SCRIPT_TAG_REGEX.findall(html)}
+    assert report.node_count == 425
+    assert report.chunk_count == 5
+    assert json_scripts[META_ID]['nodeCount'] == 425
+    assert json_scripts[META_ID]['chunkCount'] == 5
+    node_records = [r for i in range(report.chunk_count) for r in json_scripts[f"{NODES_CHUNK_ID}-{i}"]]
+    assert len(node_records) == 425
+    assert node_records[0][3] == '/'
+
+    properties = {}
+
+    for i in range(report.chunk_count):
+        properties.update(json_scripts[f"{PROPERTIES_CHUNK_ID}-{i}"])
+
+    assert len(properties) == 425
+    assert all(len(p['rows']) > 0 for p in properties.values())
+
+
+def test_json_script_escaping():
+    data = {'title': '<!--<script>alert(1)</script>', 'entity': '&lt;'}
+    report = StringIO()
+    _write_json_script(report, 'test', data)
+    script_body = SCRIPT_TAG_REGEX.search(report.getvalue()).group(2)
+    assert not any(char in script_body for char in '<>&')
+    assert json.loads(script_body) == data
@@ -0,0 +1,39 @@
+import json
+from collections import Counter
+from io import StringIO
+
+from pdfalyzer.output.json_presenter import JsonPresenter
+from pdfalyzer.util.argument_parser import ALL_SECTIONS, TREE
+
+
+def test_write_tree(analyzing_malicious_pdfalyzer):
+    events = _write_sections(analyzing_malicious_pdfalyzer, [TREE])
+    nodes = [e for e in events if e['event'] == 'node']
+    assert len(nodes) == 425
+    assert nodes[0]['address'] == '/'
+    assert nodes[0]['parent_idnum'] is None
+    # Parents are always written before their children
+    idnums_seen = set()
+
+    for node in nodes:
+        assert node['parent_idnum'] is None or node['parent_idnum'] in idnums_seen
+        idnums_seen.add(node['idnum'])
+
+    assert len([e for e in events if e['event'] == 'relationship']) == 579
+
+
+def test_write_all_sections(analyzing_malicious_pdfalyzer):
+    event_counts = Counter(e['event'] for e in _write_sections(analyzing_malicious_pdfalyzer, ALL_SECTIONS))
+    assert event_counts['document_info'] == 1
+    assert event_counts['hashes'] == 1
+    assert event_counts['summary'] == 1
+    assert event_counts['font'] == 7
+    assert event_counts['stream'] == 9
+    assert event_counts['yara_scan'] == 10
+    assert event_counts['yara_match'] > 0
+
+
+def _write_sections(pdfalyzer, sections):
+    output = StringIO()
+    JsonPresenter(pdfalyzer, output).write_sections(sections)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
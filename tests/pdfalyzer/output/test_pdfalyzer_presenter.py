@@ -0,0 +1,31 @@
+from io import StringIO
+
+from anytree import RenderTree, SymlinkNode
+from anytree.render import DoubleStyle
+from rich.console import Console
+from rich.text import Text
+
+from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+from pdfalyzer.output.tables.pdf_node_rich_table import get_symlink_representation
+
+
+def test_tree_lines(analyzing_malicious_pdfalyzer):
+    presenter = PdfalyzerPresenter(analyzing_malicious_pdfalyzer)
+    tree_lines = list(presenter._tree_lines(analyzing_malicious_pdfalyzer.pdf_tree))
+    rows = list(RenderTree(analyzing_malicious_pdfalyzer.pdf_tree, style=DoubleStyle))
+    assert len(tree_lines) == len(rows)
+
+    for tree_line, (pre, _fill, node) in zip(tree_lines, rows):
+        if isinstance(node, SymlinkNode):
+            symlink_rep = get_symlink_representation(node.parent, node)
+            expected = Text.from_markup(pre + f"[{symlink_rep.style}]{symlink_rep.text}[/{symlink_rep.style}]")
+        else:
+            expected = Text(pre) + node.__rich__()
+
+        assert _render(tree_line) == _render(expected)
+
+
+def _render(text: Text) -> str:
+    console = Console(file=StringIO(), force_terminal=True, color_system='256', width=200)
+    console.print(text)
+    return console.file.getvalue()
@@ -0,0 +1,43 @@
+from argparse import ArgumentError
+
+import pytest
+from anytree import RenderTree
+from anytree.render import DoubleStyle
+
+from pdfalyzer.output.render_limits import HiddenNodes, RenderLimits, walk_tree
+from pdfalyzer.util.argument_parser import parse_arguments
+
+
+def test_walk_tree_without_limits(analyzing_malicious_pdfalyzer):
+    rows = list(walk_tree(analyzing_malicious_pdfalyzer.pdf_tree))
+    render_tree_rows = list(RenderTree(analyzing_malicious_pdfalyzer.pdf_tree, style=DoubleStyle))
+    assert [row.node for row in rows] == [row.node for row in render_tree_rows]
+    assert [row.prefix() for row in rows] == [row.pre for row in render_tree_rows]
+
+
+def test_max_depth(analyzing_malicious_pdfalyzer):
+    rows = list(walk_tree(analyzing_malicious_pdfalyzer.pdf_tree, RenderLimits(max_depth=1)))
+    assert max(row.depth for row in rows) == 2
+    assert all(isinstance(row.node, HiddenNodes) for row in rows if row.depth == 2)
+    assert [row.node.idnum for row in rows if row.depth < 2] == [427, 1, 54, 426]
+
+
+def test_max_children(analyzing_malicious_pdfalyzer):
+    rows = list(walk_tree(analyzing_malicious_pdfalyzer.pdf_tree, RenderLimits(max_children=2)))
+    root_children = [row.node for row in rows if row.depth == 1]
+    assert [node.idnum for node in root_children[:2]] == [1, 54]
+    assert root_children[2] == HiddenNodes(1)
+    assert rows[-1].prefix() == DoubleStyle().end
+
+
+def test_max_nodes(analyzing_malicious_pdfalyzer):
+    rows = list(walk_tree(analyzing_malicious_pdfalyzer.pdf_tree, RenderLimits(max_nodes=10)))
+    assert len([row for row in rows if not isinstance(row.node, HiddenNodes)]) == 10
+    assert rows[-1].depth == 0
+    assert rows[-1].node.node_limit_hit
+
+
+@pytest.mark.parametrize('option', ['--max-depth', '--max-children', '--max-nodes'])
+def test_negative_limits_are_rejected(analyzing_malicious_pdf_path, option):
+    with pytest.raises(ArgumentError):
+        parse_arguments([analyzing_malicious_pdf_path, '--tree', option, '-1'])
@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+from io import StringIO
+from os import path, remove
+
+import pytest
+from yaralyzer.output.file_export import YARALYZER_TERMINAL_THEME
+from yaralyzer.output.rich_console import console
+
+import pdfalyzer.output.streaming_export as streaming_export_module
+from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+from pdfalyzer.output.streaming_export import EXPORT_FORMATS, HTML, TXT, streaming_export
+
+
+def test_streamed_txt_and_html_match_rich_export(adobe_type1_fonts_pdfalyzer, tmp_dir, monkeypatch):
+    # Write to the files after every print so the streaming is actually exercised
+    monkeypatch.setattr(streaming_export_module, 'FLUSH_INTERVAL', 1)
+    presenter = PdfalyzerPresenter(adobe_type1_fonts_pdfalyzer)
+    text, html, _svg = _rich_exports(presenter)
+
+    with _captured_console():
+        with streaming_export(path.join(tmp_dir, 'streamed'), [TXT, HTML]) as export_paths:
+            presenter.print_document_info()
+            presenter.print_tree()
+
+    assert not console.record
+    # Nothing should be left in the console's recording
+    console.record = True
+    assert console.export_text() == ''
+    console.record = False
+    assert _read(export_paths[0]) == text
+    assert _read(export_paths[1]) == html
+
+    for export_path in export_paths:
+        remove(export_path)
+
+
+def test_all_formats_match_rich_export(adobe_type1_fonts_pdfalyzer, tmp_dir):
+    presenter = PdfalyzerPresenter(adobe_type1_fonts_pdfalyzer)
+    text, html, svg = _rich_exports(presenter)
+
+    with _captured_console():
+        with streaming_export(path.join(tmp_dir, 'streamed'), EXPORT_FORMATS) as export_paths:
+            presenter.print_document_info()
+            presenter.print_tree()
+
+    assert [_read(export_path) for export_path in export_paths] == [text, html, svg]
+
+    for export_path in export_paths:
+        remove(export_path)
+
+
+def test_unknown_export_format(tmp_dir):
+    with pytest.raises(ValueError):
+        with streaming_export(path.join(tmp_dir, 'streamed'), ['pdf']):
+            pass
+
+
+def _rich_exports(presenter):
+    with _captured_console():
+        console.record = True
+        presenter.print_document_info()
+        presenter.print_tree()
+        text = console.export_text(styles=True, clear=False)
+        html = console.export_html(theme=YARALYZER_TERMINAL_THEME, inline_styles=True, clear=False)
+        return text, html, console.export_svg(theme=YARALYZER_TERMINAL_THEME, title='streamed.svg')
+
+
+@contextmanager
+def _captured_console():
+    original_file = console.file
+    console.file = StringIO()
+
+    try:
+        yield
+    finally:
+        console.record = False
+        console.file = original_file
+
+
+def _read(file_path):
+    with open(file_path, 'rt', encoding='utf-8') as file:
+        return file.read()
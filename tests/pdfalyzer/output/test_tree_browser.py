@@ -0,0 +1,100 @@
+from os import path
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import NameObject, TextStringObject
+from rich.cells import cell_len
+
+from pdfalyzer.output.tree_browser import NODE_ROW, SYMLINK_ROW, TABLE_ROW, TreeBrowser, fit_to_cells
+from pdfalyzer.pdfalyzer import Pdfalyzer
+
+
+def test_expand_and_collapse(analyzing_malicious_pdfalyzer):
+    browser = TreeBrowser(analyzing_malicious_pdfalyzer)
+    assert len(browser.rows) == 1
+    browser.expand()
+    assert [row.node.idnum for row in browser.rows] == [427, 1, 54, 426]
+    browser.move_cursor(1)
+    browser.expand()
+    assert len(browser.rows) == 9
+    browser.move_cursor(-1)
+    browser.collapse()
+    assert len(browser.rows) == 1
+
+
+def test_node_table_is_lazy(analyzing_malicious_pdfalyzer):
+    browser = TreeBrowser(analyzing_malicious_pdfalyzer, width=100)
+    browser.search('Catalog')
+    assert len(browser._table_lines) == 0
+    browser.activate()
+    table_rows = [row for row in browser.rows if row.kind == TABLE_ROW]
+    assert len(table_rows) > 5
+    assert list(browser._table_lines.keys()) == [1]
+    assert all(_row_cells(browser, row) <= 100 for row in table_rows)
+    browser.activate()
+    assert len([row for row in browser.rows if row.kind == TABLE_ROW]) == 0
+
+
+def test_wide_character_table_rows_fit(tmp_dir):
+    pdf_path = path.join(tmp_dir, 'wide_characters.pdf')
+    writer = PdfWriter()
+    writer.add_blank_page(72, 72)
+    writer.pages[0][NameObject('/Title')] = TextStringObject('日本語のテキスト' * 20)
+
+    with open(pdf_path, 'wb') as pdf_file:
+        writer.write(pdf_file)
+
+    pdfalyzer = Pdfalyzer(pdf_path)
+    page_node = next(node for node in pdfalyzer.node_iterator() if node.type == '/Page')
+    browser = TreeBrowser(pdfalyzer, width=100)
+    browser.search(str(page_node.idnum))
+    browser.activate()
+    wide_rows = [row for row in browser.rows if row.kind == TABLE_ROW and '日' in _row_text(browser, row)]
+    assert len(wide_rows) > 0
+    # Wide characters take 2 cells each so these rows are fewer characters than cells
+    assert all(len(_row_text(browser, row)) < _row_cells(browser, row) <= 100 for row in wide_rows)
+
+
+def test_search(analyzing_malicious_pdfalyzer):
+    browser = TreeBrowser(analyzing_malicious_pdfalyzer)
+    assert browser.search('419').idnum == 419
+    assert browser.current_row.kind == NODE_ROW
+    assert browser.current_row.node.idnum == 419
+    # All the ancestors are expanded so the node is visible
+    assert browser.rows[0].node.idnum in browser.expanded_idnums
+    assert browser.search('FontFile').label.startswith('/FontFile')
+    first_match = browser.current_row.node
+    assert browser.next_match() is not first_match
+    assert browser.search('/Root/Pages').tree_address(max_length=None).startswith('/Root/Pages')
+    assert browser.search('nonexistent label') is None
+
+
+def test_follow_symlink(analyzing_malicious_pdfalyzer):
+    browser = TreeBrowser(analyzing_malicious_pdfalyzer)
+    browser.search('69')
+    browser.expand()
+    symlink_idx = next(i for i, row in enumerate(browser.rows) if row.kind == SYMLINK_ROW)
+    target = browser.rows[symlink_idx].symlink.target
+    browser.cursor = symlink_idx
+    browser.activate()
+    assert browser.current_row.node is target
+
+
+def test_reveal_node_not_in_tree(analyzing_malicious_pdfalyzer, adobe_type1_fonts_pdfalyzer):
+    browser = TreeBrowser(analyzing_malicious_pdfalyzer)
+    browser.search('419')
+    assert not browser.reveal(adobe_type1_fonts_pdfalyzer.pdf_tree)
+    assert browser.current_row.node.idnum == 419
+
+
+def test_fit_to_cells():
+    assert fit_to_cells('abc', 5) == 'abc'
+    assert fit_to_cells('abcdef', 4) == 'abcd'
+    assert cell_len(fit_to_cells('日本語のテキスト', 5)) == 5
+
+
+def _row_text(browser, row):
+    return ''.join(segment.text for segment in browser.row_segments(row))
+
+
+def _row_cells(browser, row):
+    return cell_len(_row_text(browser, row))
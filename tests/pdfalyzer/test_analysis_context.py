@@ -0,0 +1,104 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from subprocess import check_output
+from threading import Barrier
+
+from rich.text import Text
+from yaralyzer.config import YaralyzerConfig
+
+from pdfalyzer.analysis_context import AnalysisContext, current_context
+from pdfalyzer.binary.binary_scanner import BinaryScanner
+from pdfalyzer.config import PdfalyzerConfig
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.argument_parser import parse_arguments
+
+STREAM_BYTES = bytes(range(256)) * 4
+
+
+def test_importing_installs_nothing():
+    script = '; '.join([
+        'import pdfalyzer.util.argument_parser, pdfalyzer.pdfalyzer, pdfalyzer.output.pdfalyzer_presenter',
+        'from yaralyzer.config import YaralyzerConfig',
+        'from yaralyzer.output.rich_console import console',
+        "print(YaralyzerConfig.set_args.__module__, 'args' in vars(YaralyzerConfig), type(console.file).__name__)",
+    ])
+
+    assert check_output([sys.executable, '-c', script], text=True).split() == ['yaralyzer.config', 'False', 'TextIOWrapper']
+
+
+def test_from_argv_leaves_process_args_alone(analyzing_malicious_pdf_path):
+    parse_arguments([analyzing_malicious_pdf_path, '--tree'])
+    context = AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--streams', '--surrounding-bytes', '7'])
+    assert context.args.surrounding_bytes == 7
+    assert YaralyzerConfig.args.surrounding_bytes != 7
+    assert PdfalyzerConfig._args.streams is None
+
+    with context.activate():
+        assert current_context() is context
+        assert YaralyzerConfig.args.surrounding_bytes == 7
+        assert PdfalyzerConfig._args.streams is not None
+
+    assert YaralyzerConfig.args.surrounding_bytes != 7
+
+
+def test_env_var_overrides(analyzing_malicious_pdf_path, monkeypatch):
+    monkeypatch.setenv('YARALYZER_SURROUNDING_BYTES', '123')
+    monkeypatch.setenv('YARALYZER_SUPPRESS_DECODES_TABLE', 'True')
+    args = parse_arguments([analyzing_malicious_pdf_path, '--streams'])
+    assert (args.surrounding_bytes, args.suppress_decodes_table) == (123, True)
+    assert YaralyzerConfig.args.surrounding_bytes == 123
+
+    context = AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--streams'])
+    assert (context.args.surrounding_bytes, context.args.suppress_decodes_table) == (123, True)
+    # Command line args still win over env vars
+    context = AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--surrounding-bytes', '7'])
+    assert context.args.surrounding_bytes == 7
+
+    # Don't leave the overridden process args behind for other tests
+    monkeypatch.undo()
+    parse_arguments([analyzing_malicious_pdf_path])
+
+
+def test_pdfalyzer_activates_its_context(adobe_type1_fonts_pdf_path):
+    active_contexts = set()
+    context = AnalysisContext(listeners=[lambda _event: active_contexts.add(current_context())])
+    pdfalyzer = Pdfalyzer(adobe_type1_fonts_pdf_path, context=context)
+    assert active_contexts == {pdfalyzer.context}
+    # The context didn't have a DecodeMemo so the Pdfalyzer's is a copy with one of its own
+    assert pdfalyzer.context.listeners == context.listeners
+    assert pdfalyzer.context.decode_memo is not None and context.decode_memo is None
+
+
+def test_with_options(analyzing_malicious_pdf_path):
+    context = AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--streams'])
+
+    with context.with_options(standalone_mode=True).activate():
+        assert YaralyzerConfig.args.standalone_mode is True
+
+    assert context.args.standalone_mode is False
+
+
+def test_concurrent_analyses_are_isolated(analyzing_malicious_pdf_path):
+    preview_lengths = [4, 8]
+    contexts = [
+        AnalysisContext.from_argv([analyzing_malicious_pdf_path, '--preview-stream-length', str(length)], StringIO())
+        for length in preview_lengths
+    ]
+
+    barrier = Barrier(len(contexts))
+
+    def print_previews(context: AnalysisContext) -> None:
+        scanner = BinaryScanner(STREAM_BYTES, None, Text('stream'), context=context)
+        barrier.wait()
+
+        for _i in range(20):
+            scanner.print_stream_preview()
+
+    with ThreadPoolExecutor(len(contexts)) as executor:
+        list(executor.map(print_previews, contexts))
+
+    for context, length, other_length in zip(contexts, preview_lengths, reversed(preview_lengths)):
+        output = context.output.getvalue()
+        assert output.count(f"END BEGIN FIRST AND LAST {length} BYTES") == 20
+        assert f"FIRST AND LAST {other_length} BYTES" not in output
@@ -0,0 +1,127 @@
+import asyncio
+import json
+from io import StringIO
+from threading import Event
+
+import pytest
+
+from pdfalyzer.async_analysis import AsyncAnalyzer, _analyze
+from pdfalyzer.events import NODE_DISCOVERED
+from pdfalyzer.output.json_presenter import FONT, NODE, SUMMARY, JsonPresenter
+from pdfalyzer.util.exceptions import AnalysisCancelled
+
+
+@pytest.fixture(scope='module')
+def async_analyzer():
+    analyzer = AsyncAnalyzer(max_workers=2)
+    yield analyzer
+    analyzer.shutdown()
+
+
+def test_analyze_matches_ndjson(async_analyzer, analyzing_malicious_pdfalyzer, analyzing_malicious_pdf_path):
+    ndjson = StringIO()
+    JsonPresenter(analyzing_malicious_pdfalyzer, ndjson).write_sections(['tree', 'counts'])
+    expected_events = [json.loads(line) for line in ndjson.getvalue().splitlines()]
+    events = asyncio.run(async_analyzer.analyze(analyzing_malicious_pdf_path, sections=['tree', 'counts']))
+    assert events == expected_events
+    assert events[-1]['event'] == SUMMARY
+
+
+def test_concurrent_analyses(async_analyzer, analyzing_malicious_pdf_path, adobe_type1_fonts_pdf_path):
+    async def analyze_both():
+        return await asyncio.gather(
+            async_analyzer.analyze(analyzing_malicious_pdf_path, sections=['tree']),
+            async_analyzer.analyze(adobe_type1_fonts_pdf_path, sections=['fonts'])
+        )
+
+    tree_events, font_events = asyncio.run(analyze_both())
+    assert len(tree_events) > 0 and len(font_events) > 0
+    assert {event['event'] for event in font_events} == {FONT}
+    assert {event['pdf'] for event in tree_events} == {'analyzing-malicious-document-files.pdf'}
+
+
+def test_stop_iterating_cancels_analysis(async_analyzer, analyzing_malicious_pdf_path):
+    async def first_event():
+        events = async_analyzer.analyze_events(analyzing_malicious_pdf_path, sections=['tree'])
+
+        async for event in events:
+            await events.aclose()
+            return event
+
+    assert asyncio.run(first_event())['event'] == NODE
+
+
+def test_cancelled_before_starting(async_analyzer, analyzing_malicious_pdf_path):
+    blocker = Event()
+
+    async def cancel_queued_analysis():
+        # Occupy both threads so the analysis has to wait for one
+        blockers = [asyncio.get_running_loop().run_in_executor(async_analyzer.executor, blocker.wait) for _i in range(2)]
+        task = asyncio.create_task(async_analyzer.analyze(analyzing_malicious_pdf_path, sections=['tree']))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        blocker.set()
+        await asyncio.gather(*blockers)
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_queued_analysis())
+
+
+def test_invalid_requests(async_analyzer, analyzing_malicious_pdf_path):
+    with pytest.raises(ValueError):
+        asyncio.run(async_analyzer.analyze(analyzing_malicious_pdf_path, sections=['nonsense']))
+
+    with pytest.raises(ValueError):
+        asyncio.run(async_analyzer.analyze(analyzing_malicious_pdf_path, options=['--not-an-option']))
+
+
+def test_analysis_cancelled_is_raised_in_worker(analyzing_malicious_pdf_path):
+    cancelled = Event()
+    cancelled.set()
+
+    with pytest.raises(AnalysisCancelled):
+        _analyze(analyzing_malicious_pdf_path, ['tree'], [], [], lambda _event: None, cancelled)
+
+
+def test_listeners(async_analyzer, adobe_type1_fonts_pdf_path):
+    typed_events = []
+    events = asyncio.run(async_analyzer.analyze(adobe_type1_fonts_pdf_path, ['tree'], listeners=[typed_events.append]))
+    node_count = sum(1 for event in events if event['event'] == NODE)
+    assert sum(1 for event in typed_events if event.event_type == NODE_DISCOVERED) == node_count
+
+
+def test_bounded_event_queue(analyzing_malicious_pdf_path):
+    analyzer = AsyncAnalyzer(max_workers=1, max_queued_events=2)
+
+    async def slow_consumer():
+        events = []
+
+        async for event in analyzer.analyze_events(analyzing_malicious_pdf_path, sections=['tree']):
+            events.append(event)
+
+        return events
+
+    async def abandon_after_first_event():
+        events = analyzer.analyze_events(analyzing_malicious_pdf_path, sections=['tree'])
+        await events.__anext__()
+        await events.aclose()
+
+    try:
+        all_events = asyncio.run(slow_consumer())
+        assert sum(1 for event in all_events if event['event'] == NODE) > 100
+        # The abandoned analysis is blocked on the full queue; it has to give its only thread back
+        asyncio.run(abandon_after_first_event())
+        assert asyncio.run(slow_consumer()) == all_events
+    finally:
+        analyzer.shutdown()
+
+
+def test_memory_options(async_analyzer, adobe_type1_fonts_pdf_path, tmp_dir):
+    with pytest.raises(ValueError):
+        asyncio.run(async_analyzer.analyze(adobe_type1_fonts_pdf_path, ['counts'], options=['--max-memory', '1GB']))
+
+    options = ['--stream-memory', '1KB', '--spill-dir', tmp_dir]
+    events = asyncio.run(async_analyzer.analyze(adobe_type1_fonts_pdf_path, ['fonts'], options=options))
+    assert len(events) > 0
@@ -0,0 +1,108 @@
+from collections import Counter
+from io import StringIO
+from os import path
+
+import pytest
+from PyPDF2 import PdfWriter
+from rich.text import Text
+from yaralyzer.output.rich_console import console
+from yaralyzer.yara.yara_rule_builder import REGEX
+
+from pdfalyzer.analysis_context import AnalysisContext
+from pdfalyzer.binary.binary_scanner import BinaryScanner
+from pdfalyzer.binary.decode_memo import DecodeMemo
+from pdfalyzer.events import (DANGEROUS_KEY_FOUND, DECODE_RESULT, NODE_DISCOVERED, NODE_PLACED, STREAM_DECODED,
+     YARA_MATCH_FOUND, AnalysisVisitor, DangerousKeyFound)
+from pdfalyzer.output.json_presenter import YARA_MATCH, JsonPresenter
+from pdfalyzer.pdfalyzer import Pdfalyzer
+from pdfalyzer.util.adobe_strings import JAVASCRIPT, JS
+from pdfalyzer.util.argument_parser import parse_arguments
+
+
+class Quarantined(Exception):
+    pass
+
+
+class Quarantine(AnalysisVisitor):
+    def __init__(self):
+        self.nodes_seen = 0
+
+    def on_node_discovered(self, _event) -> None:
+        self.nodes_seen += 1
+
+    def on_dangerous_key_found(self, event: DangerousKeyFound) -> None:
+        if event.key == JS:
+            raise Quarantined(event.node)
+
+
+@pytest.fixture
+def javascript_pdf_path(tmp_dir):
+    pdf_path = path.join(tmp_dir, 'events_javascript.pdf')
+    writer = PdfWriter()
+    writer.add_blank_page(72, 72)
+    writer.add_js('app.alert("boo");')
+
+    with open(pdf_path, 'wb') as pdf_file:
+        writer.write(pdf_file)
+
+    return pdf_path
+
+
+def test_tree_events(adobe_type1_fonts_pdf_path):
+    events = []
+    pdfalyzer = Pdfalyzer(adobe_type1_fonts_pdf_path, context=AnalysisContext(listeners=[events.append]))
+    event_counts = Counter(event.event_type for event in events)
+    assert event_counts[NODE_DISCOVERED] == len(pdfalyzer.nodes_encountered)
+    assert event_counts[STREAM_DECODED] == len(pdfalyzer.stream_nodes())
+    assert events[0].node is pdfalyzer.pdf_tree
+
+    # Every node but the root is placed once and only after it's been discovered
+    discovered = set()
+
+    for event in events:
+        if event.event_type == NODE_DISCOVERED:
+            discovered.add(event.node.idnum)
+        elif event.event_type == NODE_PLACED:
+            assert event.node.idnum in discovered
+            assert event.parent is event.node.parent
+
+    assert event_counts[NODE_PLACED] == len(pdfalyzer.nodes_encountered) - 1
+
+
+def test_dangerous_keys_and_quarantine(javascript_pdf_path):
+    events = []
+    Pdfalyzer(javascript_pdf_path, context=AnalysisContext(listeners=[events.append]))
+    assert {event.key for event in events if event.event_type == DANGEROUS_KEY_FOUND} == {JAVASCRIPT, JS}
+
+    quarantine = Quarantine()
+
+    with pytest.raises(Quarantined):
+        Pdfalyzer(javascript_pdf_path, context=AnalysisContext(listeners=[quarantine]))
+
+    assert 0 < quarantine.nodes_seen < sum(1 for event in events if event.event_type == NODE_DISCOVERED)
+
+
+def test_decode_result_events(analyzing_malicious_pdf_path):
+    parse_arguments([analyzing_malicious_pdf_path, '--streams'])
+    events = []
+    context = AnalysisContext(listeners=[events.append])
+    scanner = BinaryScanner(b"BT (eval me) Tj ET\n" * 40, None, Text('repeats'), DecodeMemo(), context)
+
+    with console.capture():
+        scanner.process_yara_matches(scanner._pattern_yaralyzer('eval', REGEX), 'eval', force=True)
+
+    assert len(events) == scanner.regex_extraction_stats['eval'].match_count
+    assert all(event.event_type == DECODE_RESULT and event.pattern == 'eval' for event in events)
+    assert not events[0].is_repeat
+    assert any(event.is_repeat for event in events)
+    assert len(events[0].decodings) > 0
+
+
+def test_yara_match_events(analyzing_malicious_pdf_path):
+    events = []
+    pdfalyzer = Pdfalyzer(analyzing_malicious_pdf_path, context=AnalysisContext(listeners=[events.append]))
+    ndjson = StringIO()
+    JsonPresenter(pdfalyzer, ndjson).write_yara_results()
+    yara_match_count = ndjson.getvalue().count(f'"event": "{YARA_MATCH}"')
+    assert yara_match_count > 0
+    assert sum(1 for event in events if event.event_type == YARA_MATCH_FOUND) == yara_match_count
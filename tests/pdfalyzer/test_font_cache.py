@@ -0,0 +1,67 @@
+from os import path
+
+from PyPDF2._cmap import build_char_map
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from benchmarks.synthetic_pdf import SyntheticPdfSpec, write_synthetic_pdf
+from pdfalyzer.font_cache import FontCache
+from pdfalyzer.pdfalyzer import Pdfalyzer
+
+TO_UNICODE_CMAP = b"begincmap\n1 beginbfchar\n<20> <0020>\nendbfchar\n1 beginbfrange\n<41> <5A> <0041>\nendbfrange\nendcmap"
+
+
+def test_identical_streams_are_shared():
+    font_cache = FontCache()
+    fonts = [_font(TO_UNICODE_CMAP), _font(TO_UNICODE_CMAP)]
+    to_unicode_maps = [font_cache.to_unicode_map(font) for font in fonts]
+    assert to_unicode_maps[0] is to_unicode_maps[1]
+    assert to_unicode_maps[0].map_dict['A'] == 'A'
+    assert to_unicode_maps[0].space_code == ' '
+    assert font_cache.to_unicode_parses == 1
+    assert font_cache.to_unicode_map(_font(TO_UNICODE_CMAP.replace(b'0041', b'0061'))).map_dict['A'] == 'a'
+    assert font_cache.to_unicode_parses == 2
+
+    font_files = [_stream(b'font binary'), _stream(b'font binary')]
+    assert font_cache.decoded_font_file(font_files[0]) is font_cache.decoded_font_file(font_files[1])
+    assert font_cache.font_file_decodes == 1
+    assert font_cache.font_file_store_key(font_files[1], 8) == font_cache.font_file_store_key(font_files[0], 7) == 8
+
+
+def test_build_char_map_matches_pypdf2():
+    font = _font(TO_UNICODE_CMAP)
+    fonts = DictionaryObject({NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})})
+    resources = DictionaryObject({NameObject('/Resources'): fonts})
+    assert FontCache().build_char_map(font, 250) == build_char_map('/F1', 250, resources)
+
+
+def test_fonts_are_extracted_once(tmp_dir):
+    spec = SyntheticPdfSpec(pages=5, fonts=3)
+    pdf_path = path.join(tmp_dir, 'synthetic_fonts.pdf')
+    write_synthetic_pdf(spec, pdf_path)
+    pdfalyzer = Pdfalyzer(pdf_path)
+    assert len(pdfalyzer.font_infos) == spec.fonts
+    # Nothing is decoded or parsed until something asks for it
+    assert pdfalyzer.font_cache.font_file_decodes == 0
+    assert pdfalyzer.font_cache.to_unicode_parses == 0
+
+    for font_info in pdfalyzer.font_infos:
+        assert font_info.stream_length == len(font_info.stream_data)
+        assert font_info.character_mapping is not None
+
+    assert pdfalyzer.font_cache.font_file_decodes == spec.fonts
+    assert pdfalyzer.font_cache.to_unicode_parses == spec.fonts
+
+
+def _font(to_unicode_cmap: bytes) -> DictionaryObject:
+    return DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Synth'),
+        NameObject('/ToUnicode'): _stream(to_unicode_cmap),
+    })
+
+
+def _stream(data: bytes) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return stream
@@ -0,0 +1,69 @@
+import pytest
+
+from pdfalyzer.output.pdfalyzer_presenter import PdfalyzerPresenter
+from pdfalyzer.pdfalyzer import PHASES, Pdfalyzer
+from pdfalyzer.util.argument_parser import RICH, TREE, output_sections, parse_arguments
+from pdfalyzer.util.exceptions import MemoryLimitExceeded
+from pdfalyzer.util.memory_accounting import (DEGRADATIONS, DROP_STREAM_DATA, SKIP_SYMLINKS, STREAM_OUTPUT,
+     MemoryAccountant, parse_size)
+
+
+def test_parse_size():
+    assert parse_size('1024') == 1024
+    assert parse_size('2KB') == 2048
+    assert parse_size('1.5mb') == int(1.5 * 1024 * 1024)
+    assert parse_size('3G') == 3 * 1024 ** 3
+
+    with pytest.raises(ValueError):
+        parse_size('lots')
+
+
+def test_memory_accounting(adobe_type1_fonts_pdf_path):
+    memory_accountant = MemoryAccountant()
+
+    try:
+        pdfalyzer = Pdfalyzer(adobe_type1_fonts_pdf_path, memory_accountant=memory_accountant)
+        report = memory_accountant.report(pdfalyzer)
+    finally:
+        memory_accountant.stop()
+
+    assert list(report['phases'].keys()) == PHASES
+    assert report['degradations'] == []
+    assert report['phases']['walk']['allocated'] > 0
+    assert report['peak_bytes'] >= report['traced_bytes']
+    assert sum(usage['count'] for usage in report['node_types'].values()) == len(pdfalyzer.nodes_encountered) - 1
+    assert report['suspects']['pdf_bytes'] == len(pdfalyzer.pdf_bytes)
+    assert report['suspects']['stream_data'] > 0
+    assert report['symlink_count'] > 0
+    assert len(report['top_allocations']) > 0
+
+
+def test_memory_ceiling(adobe_type1_fonts_pdf_path):
+    memory_accountant = MemoryAccountant(max_bytes=1024)
+
+    with pytest.raises(MemoryLimitExceeded) as exc_info:
+        try:
+            Pdfalyzer(adobe_type1_fonts_pdf_path, memory_accountant=memory_accountant)
+        finally:
+            memory_accountant.stop()
+
+    assert exc_info.value.report['degradations'] == DEGRADATIONS
+
+
+def test_degradations(adobe_type1_fonts_pdf_path):
+    memory_accountant = MemoryAccountant()
+    memory_accountant.degradations = [DROP_STREAM_DATA, SKIP_SYMLINKS, STREAM_OUTPUT]
+
+    try:
+        pdfalyzer = Pdfalyzer(adobe_type1_fonts_pdf_path, memory_accountant=memory_accountant)
+    finally:
+        memory_accountant.stop()
+
+    assert all(node.stream_data is None for node in pdfalyzer.stream_nodes())
+    assert any(node.stream_length > 0 for node in pdfalyzer.stream_nodes())
+    assert memory_accountant.report(pdfalyzer)['symlink_count'] == 0
+    args = parse_arguments([adobe_type1_fonts_pdf_path, '--tree', '--rich'])
+    presenter = PdfalyzerPresenter(pdfalyzer)
+    assert [section for section, _method in output_sections(args, presenter)] == [TREE]
+    args = parse_arguments([adobe_type1_fonts_pdf_path, '--rich'])
+    assert [method.__name__ for _section, method in output_sections(args, presenter)] == ['print_tree']
@@ -0,0 +1,150 @@
+"""
+Tests of the long running analysis server in pdfalyzer/daemon.py.
+"""
+import json
+import socket
+import time
+from http.client import HTTPConnection
+from os import path, remove, stat, umask
+from stat import S_IMODE
+from threading import Thread
+
+import pytest
+
+from pdfalyzer.daemon import (AnalysisDaemon, HttpJobHandler, HttpServer, SharedExclusiveLock, UnixSocketJobHandler,
+     UnixSocketServer)
+
+
+@pytest.fixture(scope='module')
+def analysis_daemon():
+    return AnalysisDaemon(cache_size=2)
+
+
+def test_run_job(analysis_daemon, adobe_type1_fonts_pdf_path):
+    job = {'file': adobe_type1_fonts_pdf_path, 'sections': ['tree', 'counts']}
+    result = analysis_daemon.run_job(job)
+    assert list(result['sections'].keys()) == ['tree', 'counts']
+    assert 'Simple tree view of Type1_Acrobat_Font_Explanation.pdf' in result['sections']['tree']
+    assert len(result['sections']['tree'].split('\n')) > 80
+    # Second run comes from the cache
+    assert analysis_daemon.run_job(job) is result
+    assert analysis_daemon.status()['jobs_run'] == 1
+
+
+def test_ndjson_job(analysis_daemon, adobe_type1_fonts_pdf_path):
+    result = analysis_daemon.run_job({'file': adobe_type1_fonts_pdf_path, 'sections': ['fonts'], 'format': 'ndjson'})
+    events = [json.loads(line) for line in result['sections']['fonts'].splitlines()]
+    assert len(events) > 0
+    assert all(event['event'] == 'font' for event in events)
+
+
+def test_memory_options(analysis_daemon, adobe_type1_fonts_pdf_path):
+    job = {'file': adobe_type1_fonts_pdf_path, 'sections': ['counts'], 'options': ['--memory-report']}
+    assert 'walk' in analysis_daemon.run_job(job)['memory_report']['phases']
+    result = analysis_daemon.run_job({**job, 'options': ['--max-memory', '1KB']})
+    assert result['error'].startswith('MemoryLimitExceeded')
+    assert len(result['memory_report']['degradations']) == 3
+
+
+def test_bad_jobs(analysis_daemon, adobe_type1_fonts_pdf_path):
+    assert 'error' in analysis_daemon.run_job({'sections': ['tree']})
+    assert 'error' in analysis_daemon.run_job({'file': '/not/a/real/file.pdf'})
+    assert 'error' in analysis_daemon.run_job({'file': adobe_type1_fonts_pdf_path, 'sections': ['nonsense']})
+    assert 'error' in analysis_daemon.run_job({'file': adobe_type1_fonts_pdf_path, 'format': 'docx'})
+    assert 'error' in analysis_daemon.run_job({'file': adobe_type1_fonts_pdf_path, 'options': ['--not-an-option']})
+
+
+@pytest.mark.parametrize('options', [
+    ['--charmap-dir', '/tmp'],
+    ['--spill-dir=/tmp'],
+    ['-txt'],
+    ['--output-dir', '/tmp'],
+    ['--yara-file', '/etc/passwd'],
+    ['--max-depth', '--log-level'],
+])
+def test_forbidden_options(analysis_daemon, adobe_type1_fonts_pdf_path, options):
+    result = analysis_daemon.run_job({'file': adobe_type1_fonts_pdf_path, 'sections': ['docinfo'], 'options': options})
+    assert "aren't allowed in jobs" in result['error']
+
+
+def test_cache_hits_dont_wait_for_running_jobs(adobe_type1_fonts_pdf_path):
+    analysis_daemon = AnalysisDaemon()
+    job = {'file': adobe_type1_fonts_pdf_path, 'sections': ['docinfo']}
+    result = analysis_daemon.run_job(job)
+
+    with analysis_daemon._jobs_lock.exclusive():
+        assert analysis_daemon.run_job(job) is result
+
+
+def test_shared_exclusive_lock():
+    lock = SharedExclusiveLock()
+    exclusive_acquired_at = []
+
+    def take_exclusive():
+        with lock.exclusive():
+            exclusive_acquired_at.append(time.perf_counter())
+
+    with lock.shared():
+        with lock.shared():
+            exclusive_taker = Thread(target=take_exclusive)
+            exclusive_taker.start()
+            time.sleep(0.05)
+            assert exclusive_acquired_at == []
+
+        released_at = time.perf_counter()
+
+    exclusive_taker.join()
+    assert exclusive_acquired_at[0] >= released_at
+
+
+def test_unix_socket_server(analysis_daemon, adobe_type1_fonts_pdf_path, tmp_dir):
+    socket_path = path.join(tmp_dir, 'pdfalyzer.sock')
+    original_umask = umask(0o022)
+
+    with UnixSocketServer(socket_path, UnixSocketJobHandler) as server:
+        # Created owner only and the process's umask is put back
+        assert S_IMODE(stat(socket_path).st_mode) == 0o600
+        assert umask(original_umask) == 0o022
+        server.analysis_daemon = analysis_daemon
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(socket_path)
+            client_file = client.makefile('rwb')
+            client_file.write(json.dumps({'file': adobe_type1_fonts_pdf_path, 'sections': ['docinfo']}).encode() + b"\n")
+            client_file.write(b"not json\n")
+            client_file.flush()
+            assert 'docinfo' in json.loads(client_file.readline())['sections']
+            assert 'Invalid JSON' in json.loads(client_file.readline())['error']
+
+        server.shutdown()
+
+    remove(socket_path)
+
+
+
+def test_http_server_authentication(analysis_daemon, adobe_type1_fonts_pdf_path):
+    with HttpServer(('127.0.0.1', 0), HttpJobHandler) as server:
+        server.analysis_daemon = analysis_daemon
+        server.token = 'sesame'
+        port = server.server_address[1]
+        Thread(target=server.serve_forever, daemon=True).start()
+        job = json.dumps({'file': adobe_type1_fonts_pdf_path, 'sections': ['docinfo']})
+
+        def request(method: str, url: str, body=None, **headers) -> int:
+            connection = HTTPConnection('127.0.0.1', port)
+            connection.request(method, url, body, headers={'Authorization': 'Bearer sesame', **headers})
+            response = connection.getresponse()
+            response_json = json.loads(response.read())
+            connection.close()
+            return response.status, response_json
+
+        status, result = request('POST', '/analyze', job)
+        assert status == 200 and 'docinfo' in result['sections']
+        assert request('GET', '/status')[0] == 200
+        assert request('GET', '/status', Authorization='Bearer wrong')[0] == 401
+        assert request('POST', '/analyze', job, Authorization='')[0] == 401
+        assert request('POST', '/analyze', job, Host=f"evil.example.com:{port}")[0] == 403
+        assert request('POST', '/analyze', job, Origin='http://evil.example.com')[0] == 403
+        assert request('POST', '/analyze', job, Origin=f"http://localhost:{port}")[0] == 200
+        server.shutdown()
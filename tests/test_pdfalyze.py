@@ -25,11 +25,18 @@ def test_bad_args(analyzing_malicious_pdf_path):
         _run_with_args(analyzing_malicious_pdf_path, '--extract-quoted', 'backtick', '--tree')
     with pytest.raises(CalledProcessError):
         _run_with_args(analyzing_malicious_pdf_path, '--force-decode-threshold', '105')
+    with pytest.raises(CalledProcessError):
+        _run_with_args(analyzing_malicious_pdf_path, '--tree-root', '99999', '--tree')
+    with pytest.raises(CalledProcessError):
+        _run_with_args(analyzing_malicious_pdf_path, '--max-memory', 'lots', '--tree')
+    with pytest.raises(CalledProcessError):
+        _run_with_args(analyzing_malicious_pdf_path, '--max-memory', '1KB', '--tree')
 
 
 def test_pdfalyze_CLI_basic_tree(adobe_type1_fonts_pdf_path, analyzing_malicious_pdf_path):
     _assert_args_yield_lines(90, adobe_type1_fonts_pdf_path, '-t')
     _assert_args_yield_lines(1022, analyzing_malicious_pdf_path, '-t')
+    _assert_args_yield_lines(29, analyzing_malicious_pdf_path, '-t', '--max-depth', '2', '--max-children', '3')
 
 
 def test_pdfalyze_CLI_rich_tree(adobe_type1_fonts_pdf_path, analyzing_malicious_pdf_path):
@@ -44,6 +51,7 @@ def test_pdfalyze_CLI_streams_scan(adobe_type1_fonts_pdf_path):
     _assert_args_yield_lines(1560, adobe_type1_fonts_pdf_path, '-s')
     _assert_args_yield_lines(1165, adobe_type1_fonts_pdf_path, '--suppress-boms', '-s')
     _assert_args_yield_lines(135, adobe_type1_fonts_pdf_path, '-s', '48')
+    _assert_args_yield_lines(1560, adobe_type1_fonts_pdf_path, '--stream-memory', '16KB', '-s')
 
 
 @pytest.mark.slow
@@ -52,6 +60,14 @@ def test_quote_extraction(adobe_type1_fonts_pdf_path):
     _assert_args_yield_lines(5736, adobe_type1_fonts_pdf_path, '--extract-quoted', 'backtick', '--extract-quoted', 'frontslash', '-s')
 
 
+def test_pdfalyze_CLI_triage(analyzing_malicious_pdf_path):
+    _assert_args_yield_lines(29, analyzing_malicious_pdf_path, '--triage')
+
+
+def test_pdfalyze_CLI_ndjson(analyzing_malicious_pdf_path):
+    _assert_args_yield_lines(1006, analyzing_malicious_pdf_path, '--ndjson', '-t')
+
+
 def test_pdfalyze_CLI_font_scan(adobe_type1_fonts_pdf_path, analyzing_malicious_pdf_path):
     _assert_args_yield_lines(197, adobe_type1_fonts_pdf_path, '-f')
     _assert_args_yield_lines(205, analyzing_malicious_pdf_path, '-f')
@@ -1,9 +1,23 @@
 """
 Test Pdfalyzer() methods.
 """
+from contextlib import contextmanager
+
+from pdfalyzer.pdfalyzer import PHASES, Pdfalyzer
 
 
 def test_is_in_tree(analyzing_malicious_pdfalyzer, page_node):
     assert analyzing_malicious_pdfalyzer.is_in_tree(page_node)
 
 
+def test_phase_hook(analyzing_malicious_pdf_path):
+    entered = []
+
+    @contextmanager
+    def phase_hook(phase):
+        entered.append(phase)
+        yield
+
+    pdfalyzer = Pdfalyzer(analyzing_malicious_pdf_path, phase_hook=phase_hook)
+    assert entered == PHASES
+    assert all(seconds >= 0 for seconds in pdfalyzer.phase_timings.values())
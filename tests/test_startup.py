@@ -0,0 +1,44 @@
+"""
+Guards against slow startup creeping back in: 'import pdfalyzer' happens before every command line invocation
+and the argument parser is loaded for every invocation, including things like 'pdfalyze -h'.
+"""
+import sys
+from subprocess import STDOUT, check_output
+
+# Modules that only the analyses themselves should load
+HEAVY_MODULES = [
+    'anytree',
+    'PyPDF2',
+    'pdfalyzer.decorators.pdf_tree_node',
+    'pdfalyzer.pdfalyzer',
+    'pdfalyzer.output.pdfalyzer_presenter',
+]
+
+# Cumulative microseconds 'import pdfalyzer' can take per 'python -X importtime' (was ~265,000 when it
+# imported everything up front, ~20,000 with deferred imports)
+MAX_PACKAGE_IMPORT_MICROSECONDS = 100_000
+
+
+def test_package_import_loads_no_third_party_modules():
+    for module in ['rich', 'yaralyzer', 'yara', 'dotenv', *HEAVY_MODULES]:
+        assert module not in _modules_loaded_by('pdfalyzer')
+
+
+def test_argument_parser_does_not_load_analysis_modules():
+    modules_loaded = _modules_loaded_by('pdfalyzer.util.argument_parser')
+
+    for module in HEAVY_MODULES:
+        assert module not in modules_loaded
+
+
+def test_package_import_time():
+    importtime_cmd = [sys.executable, '-X', 'importtime', '-c', 'import pdfalyzer']
+    importtime_output = check_output(importtime_cmd, text=True, stderr=STDOUT)
+    pdfalyzer_import = next(line for line in importtime_output.splitlines() if line.endswith('| pdfalyzer'))
+    cumulative_microseconds = int(pdfalyzer_import.split('|')[1])
+    assert cumulative_microseconds < MAX_PACKAGE_IMPORT_MICROSECONDS
+
+
+def _modules_loaded_by(module: str) -> set:
+    script = f"import sys; import {module}; print(' '.join(sys.modules))"
+    return set(check_output([sys.executable, '-c', script], text=True).split())